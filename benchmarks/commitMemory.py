@@ -0,0 +1,36 @@
+from __future__ import print_function
+import tracemalloc
+
+from gitcovery import Author, Commit, Repository
+
+'''
+Measure the memory used per commit when loading the metadata of a large synthetic history.
+Every commit has a single parent, a title and a short message, like a typical linear history.
+'''
+
+NUM_COMMITS = 100000
+
+
+def load_history():
+    """
+    Load the metadata of a synthetic history into the commit table.
+    """
+    for i in range(NUM_COMMITS):
+        parent = '%040x' % i if i else ''
+        row = ('%040x' % (i + 1), parent, 'Author Name', 'author@example.com', 1520887436 + i, 60,
+               'Committer Name', 'committer@example.com', 1520887436 + i, 60,
+               'Title of commit %d' % i, 'A short message explaining commit %d' % i)
+        Commit('%040x' % (i + 1))._set_from_row(row)
+
+
+if __name__ == '__main__':
+    # Register the authors up front, so no repository is needed to look them up
+    Repository.current()._authors = {'Author Name': Author('Author Name', 'author@example.com'),
+                       'Committer Name': Author('Committer Name', 'committer@example.com')}
+
+    tracemalloc.start()
+    load_history()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print('%d commits: %.1f MB (%d bytes per commit), peak %.1f MB' %
+          (NUM_COMMITS, current / 1e6, current // NUM_COMMITS, peak / 1e6))
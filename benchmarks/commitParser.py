@@ -0,0 +1,118 @@
+from __future__ import print_function
+import re
+import sys
+import time
+
+from gitcovery import Git, GitBackend
+
+'''
+Compare the throughput of the delimiter based commit parser with the regex that was used before.
+
+By default a synthetic log of 50000 commits is generated, with long messages and a diff for every commit.
+Pass the path to a repository to parse its real `git log -p` output instead:
+`python benchmarks/commitParser.py [path/to/repo]`
+'''
+
+NUM_COMMITS = 50000
+
+# The regex based parser that was used before `GitBackend._FORMAT`
+OLD_FORMAT = '%H%n%P%n%aN%n%aE%n%ai%n%cN%n%cE%n%ci%n%s%n%b'
+OLD_REGEX = re.compile('(?P<sha>([a-f0-9]+)\n)?(?P<parents>([a-f0-9]+\s?)*)\n' +
+                       '(?P<author>.+)\n(?P<authorMail>.+)\n(?P<authorDate>[0-9\-:\s+]+)\n' +
+                       '(?P<commit>.+)\n(?P<commitMail>.+)\n(?P<commitDate>[0-9\-:\s+]+)\n' +
+                       '(?P<title>.*)(?P<message>(.*\n)*?(?=(diff --git)|\Z|([0-9a-f]+\n)))?' +
+                       '(?P<diff>diff (.*\n)*?(?=([a-f0-9]+\n)|\Z))?')
+
+DIFF = ('diff --git a/file.py b/file.py\nindex 0123456..789abcd 100644\n--- a/file.py\n+++ b/file.py\n'
+        '@@ -1,3 +1,3 @@\n context\n-removed line\n+added line\n context\n')
+
+
+def synthetic_logs():
+    """
+    Generate the log output of a synthetic repository in both formats.
+
+    :rtype: (str, str)
+    :return: The output in the old and in the new format
+    """
+    old = []
+    new = []
+    for i in range(NUM_COMMITS):
+        sha = '%040x' % (i + 1)
+        parent = '%040x' % i if i else ''
+        date = '2018-03-12 21:43:56 +0100'
+        message = '\n'.join('Line %d of a longer commit message that explains the change' % j for j in range(i % 20))
+        fields = [sha, parent, 'Author Name', 'author@example.com', date,
+                  'Committer Name', 'committer@example.com', date, 'Title of commit %d' % i, message]
+        old.append('\n'.join(fields) + '\n' + DIFF)
+        new.append('\x1e' + '\x00'.join(fields) + '\x00\n' + DIFF)
+    return '\n'.join(old), '\n'.join(new)
+
+
+def repository_logs(path):
+    """
+    Get the log output of a real repository in both formats.
+
+    :type path: str
+    :param path: The path to the repository
+    :rtype: (str, str)
+    :return: The output in the old and in the new format
+    """
+    Git.set_root(path)
+    old = Git.call(['log', '-p', '--pretty=format:' + OLD_FORMAT])
+    new = Git.call(['log', '-p', '--pretty=format:%x1e' + GitBackend._FORMAT])
+    return old, new
+
+
+def parse_old(out):
+    """
+    Parse the log output with the old regex.
+
+    :type out: str
+    :param out: The log output
+    :rtype: int
+    :return: The number of parsed commits
+    """
+    count = 0
+    for matcher in OLD_REGEX.finditer(out):
+        matcher.group('sha'), matcher.group('message'), matcher.group('diff')
+        count += 1
+    return count
+
+
+def parse_new(out):
+    """
+    Parse the log output with the delimiter based parser.
+
+    :type out: str
+    :param out: The log output
+    :rtype: int
+    :return: The number of parsed commits
+    """
+    count = 0
+    for record in out.split('\x1e'):
+        if record and GitBackend._parse_record(record):
+            count += 1
+    return count
+
+
+def measure(name, parser, out):
+    """
+    Measure and print the throughput of a parser.
+
+    :type name: str
+    :param name: The name of the parser
+    :type parser: str -> int
+    :param parser: The parser to measure
+    :type out: str
+    :param out: The log output to parse
+    """
+    start = time.time()
+    count = parser(out)
+    duration = time.time() - start
+    print('%-10s %8d commits in %7.3fs: %10.0f commits/second' % (name, count, duration, count / duration))
+
+
+if __name__ == '__main__':
+    old_log, new_log = repository_logs(sys.argv[1]) if len(sys.argv) > 1 else synthetic_logs()
+    measure('regex', parse_old, old_log)
+    measure('delimiter', parse_new, new_log)
@@ -0,0 +1,40 @@
+from __future__ import print_function
+import sys
+import time
+
+from gitcovery import Author, Commit, CommitGraph, Git, MemoryBackend, Repository
+
+'''
+Measure the time spent in this module itself, without calling git, using a generated in-memory repository.
+Pass the number of commits to generate: `python benchmarks/memoryBackend.py [num_commits]`
+'''
+
+
+def measure(name, func):
+    """
+    Measure and print the duration of a function.
+
+    :type name: str
+    :param name: The name of the measurement
+    :type func: () -> int
+    :param func: The function to measure, which returns the number of processed items
+    """
+    start = time.time()
+    count = func()
+    duration = time.time() - start
+    print('%-12s %8d items in %7.3fs: %10.0f items/second' % (name, count, duration, count / duration))
+
+
+if __name__ == '__main__':
+    num_commits = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    start = time.time()
+    Git.set_backend(MemoryBackend.generate(num_commits))
+    print('Generated %d commits in %.3fs' % (num_commits, time.time() - start))
+
+    head = Git.get_head()
+    measure('walk', lambda: sum(1 for _ in CommitGraph.walk(head)))
+    measure('walk topo', lambda: sum(1 for _ in CommitGraph.walk(head, order='topo')))
+    measure('load_all', lambda: Commit.load_all() or len(Repository.current()._table))
+    measure('authors', lambda: sum(len(author.commits) for author in Author.list()))
+    first_parents = list(CommitGraph.first_parents(head))[:1000]
+    measure('changes', lambda: sum(len(commit.changes()) for commit in first_parents) and len(first_parents))
@@ -0,0 +1,38 @@
+from __future__ import print_function
+import sys
+import time
+
+from gitcovery import Git
+
+'''
+Compare reading all the objects of a repository through `git cat-file` with the in-process object reader.
+By default this repository is used, pass the path to another repository to use that one instead:
+`python benchmarks/objectReader.py [path/to/repo]`
+'''
+
+
+def measure(name, names):
+    """
+    Measure and print the throughput of reading the given objects.
+
+    :type name: str
+    :param name: The name of the reader
+    :type names: List[str]
+    :param names: The names of the objects to read
+    """
+    start = time.time()
+    size = 0
+    for obj in names:
+        size += len(Git.read_object(obj)[1])
+    duration = time.time() - start
+    print('%-10s %8d objects (%6.1f MB) in %7.3fs: %10.0f objects/second' %
+          (name, len(names), size / 1e6, duration, len(names) / duration))
+
+
+if __name__ == '__main__':
+    Git.set_root(sys.argv[1] if len(sys.argv) > 1 else '.')
+    objects = Git.call(['cat-file', '--batch-all-objects', '--batch-check=%(objectname)']).split()
+
+    measure('cat-file', objects)
+    Git.enable_object_reader()
+    measure('in-process', objects)
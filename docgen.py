@@ -73,7 +73,7 @@ class FunctionDef(object):
     # Regex for matching function definitions
     REGEX = re.compile('(@(?P<annotation>\w*)\s*\n\s{4})?'
                        'def (?P<name>\w+)\s?\((?P<arguments>\w*(,\s\w+)*(?=[,)]))(,\s)?'
-                       '(?P<optional_arguments>\w+=\w+(,\s\w)*)?\):\n\s{8}"""\n(?P<docs>(\s{8}.*\n)*?)'
+                       '(?P<optional_arguments>\w+=\w+(,\s\w+=\w+)*)?\):\n\s{8}"""\n(?P<docs>(\s{8}.*\n)*?)'
                        '(?P<arg_desc>\n?\s{8}:.*\n(\s{8}.*\n)*?)?\s{8}"""\n(?P<body>(\s{8}.*\n)*)')
     # Regex to match argument descriptions in the docs
     _ARG_DESCRIPTION_REGEX = re.compile('\s*:((((type)|(?P<raises>raise))\s(?P<name>\w+))|(rtype)|):\s*(?P<type>(.*))'
@@ -147,10 +147,8 @@ class FunctionDef(object):
         :return: The string representation
         """
         annotation = ' - _static_' if (self.annotation == 'classmethod' or self.annotation == 'staticmethod') else ''
-        if self.optional_arguments:
-            signature = '%s(%s, %s)' % (self.name, self.arguments, self.optional_arguments)
-        else:
-            signature = '%s(%s)' % (self.name, self.arguments)
+        arguments = [arguments for arguments in (self.arguments, self.optional_arguments) if arguments]
+        signature = '%s(%s)' % (self.name, ', '.join(arguments))
         signature = signature.replace('_', '\\_')
         docs = self.docs
 
@@ -127,7 +127,7 @@ for image in images:
     for tag in tags:
         print('-> %s' % tag)
         try:
-            tagSourceFolder = Git.checkout(tag).gitcovery
+            tagSourceFolder = Git.tree_at(tag).gitcovery
         except IOError:
             print('Folder not present yet')
             continue
@@ -18,7 +18,7 @@ readmeFile = root.get_file('README.md')
 history = list(reversed(readmeFile.history())) 
 
 # Get the number of newlines in the document at each commit in the history of the file
-fileSizes = list(map(lambda commit: readmeFile.count('\n', at=commit), history))
+fileSizes = [contents.count('\n') for _, contents in readmeFile.at_many(history)]
 
 # Draw the graph
 plt.plot(fileSizes)
@@ -1,8 +1,15 @@
 from .git import Git
+from .repository import Repository
+from .backend import Backend, GitBackend
+from .memory import MemoryBackend
 from .author import Author
+from .table import CommitTable
 from .commit import Commit
-from .diff import Diff, FileDiff, BlobDiff
+from .graph import CommitGraph
+from .diff import Diff, FileDiff, BlobDiff, TreeDiff
 from .gitfs import GitFile, GitFolder
+from .tree import TreeFile, TreeFolder
+from .stats import Stats
 
 """
 **TODO** Introduction here
@@ -23,6 +30,11 @@ With the root of the repository selected there are three main approaches to trav
   With this you can traverse the file tree by getting its children, 
   or even execute a function directly for all the children.
   These files have a number of functions to get access to their history and (historic) contents.
+  To continue the history of a file before it was renamed, use `<file>.history(follow=True)`.
+  A read-only snapshot of all the files at any commit, without a checkout, is available using `Git.tree_at(<commit>)`.
+  Two snapshots are compared using `Git.compare(<old commit>, <new commit>)`, which skips the unchanged folders.
+  Separate checkouts to run external tools on, for many commits at once, are leased using `Git.lease_worktree()`.
+  The contents of a file at every commit in its history are read at once using `<file>.at_many(<file>.history())`.
 - Author based  
   A list of all authors in the repository can be accessed via `authors = Author.list()`. 
   Besides their name and email addresses, these authors also contain all the commits made by them.
@@ -30,9 +42,28 @@ With the root of the repository selected there are three main approaches to trav
   You can also start by a list of all the commits made in the repository.
   Getting this list could be done by querying the history of the root folder: `root.history()`
   Note that there is currently no direct way to do this besides this call.
+  When only the latest commits are needed, `root.iter_history(limit=<n>)` stops git after those commits.
   When working with many commits, the speed of the interface with git can become a bottleneck,
   in this case you might want to consider pre-loading all the data.
-  This can be done using `Commit.load_all()`.
+  This can be done using `Commit.load_all()`, or `Commit.prefetch(<commits>)` for only a part of the commits.
+  When requesting the history of many files, `Git.enable_path_index()` indexes the history of all paths at once.
+  To reuse the loaded metadata in later runs, you can enable an on-disk cache using `Git.enable_store()`.
+  To avoid starting git processes altogether, objects can be read in-process using `Git.enable_object_reader()`.
+  The ancestors of a commit can be traversed using `CommitGraph.walk(<commit>)`,
+  which also provides ancestry queries like `CommitGraph.is_ancestor(<a>, <b>)` and `CommitGraph.merge_base(<a>, <b>)`.
+
+All data is read from the repository through a backend, which calls git by default (see `GitBackend`).
+Instead of setting the root, you can also use an in-memory repository with `Git.set_backend(MemoryBackend())`,
+for example a large generated history from `MemoryBackend.generate(<num_commits>)` for benchmarking.
+The backend and everything loaded from it belong to a `Repository`.
+To analyse multiple repositories at once, open a repository for each of them using `Repository.open(<path>)`
+and activate it in the thread that uses it with `with <repository>:`.
+From asyncio (Python 3.5 or newer) git can be queried without blocking the event loop,
+using `await <repository>.history_async()`, `await <commit>.load_async()` and `await <file>.at_async(<commit>)`.
+To find out where the time of an analysis goes, enable the instrumentation using `Stats.enable()`
+and inspect the calls to git, the parsing and the caches using `Git.stats()`.
+With `Stats.enable(trace=True)` every call is also recorded,
+to be viewed as a flame graph after exporting it using `Stats.write_trace(<path>)`.
   
 You must also note that you never have to use an constructor explicitly: 
 - Files can be accessed via the root of the repository
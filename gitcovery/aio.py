@@ -0,0 +1,369 @@
+"""
+Asynchronous counterparts of the queries that call git, for use with asyncio.
+Git is run using `asyncio.create_subprocess_exec`, so waiting for git does not block the event loop,
+and the number of git processes that run at once is limited per event loop (see `Git.set_async_limit()`).
+This module requires Python 3.5 or newer, it is imported by the `*_async()` methods when they are first called.
+"""
+import asyncio
+import subprocess
+import weakref
+
+import gitcovery
+from .git import Git
+from .stats import Stats
+
+# The maximum number of git processes that run at once per event loop
+_limit = 8
+# Event loop -> the semaphore that limits the number of git processes on that loop
+_semaphores = weakref.WeakKeyDictionary()
+# Event loop -> the loads that are in progress on that loop by key
+_pending = weakref.WeakKeyDictionary()
+# Event loop -> the commits of every repository that are requested together on that loop
+_queues = weakref.WeakKeyDictionary()
+
+
+def set_limit(limit):
+    """
+    Set the maximum number of git processes that run at once per event loop, see `Git.set_async_limit()`.
+
+    :type limit: int
+    :param limit: The maximum number of processes
+    """
+    global _limit
+    _limit = limit
+    _semaphores.clear()
+
+
+def _semaphore():
+    """
+    :rtype: asyncio.Semaphore
+    :return: The semaphore that limits the number of git processes on the running event loop
+    """
+    loop = asyncio.get_event_loop()
+    semaphore = _semaphores.get(loop)
+    if semaphore is None:
+        semaphore = _semaphores[loop] = asyncio.Semaphore(_limit)
+    return semaphore
+
+
+async def _single_flight(key, load):
+    """
+    Run a load once on the running event loop, tasks that need the same load while it runs wait for its result.
+
+    :type key: object
+    :param key: The key that identifies the load
+    :type load: () -> Awaitable
+    :param load: The function that starts the load
+    :return: The result of the load
+    """
+    pending = _pending.setdefault(asyncio.get_event_loop(), {})
+    task = pending.get(key)
+    if task is None:
+        task = pending[key] = asyncio.ensure_future(load())
+        task.add_done_callback(lambda _: pending.pop(key, None))
+    # Cancelling a waiting task should not cancel the load for the others
+    return await asyncio.shield(task)
+
+
+async def call_raw(cmds, root, stdin=None):
+    """
+    Run git asynchronously and return its raw output.
+
+    :type cmds: List[str]
+    :param cmds: The arguments to pass to git
+    :type root: str
+    :param root: The working directory to run git in
+    :type stdin: str
+    :param stdin: Optional input to write to the standard input of git
+    :rtype: bytes
+    :return: The output of git
+    :raise IOError: When git fails
+    """
+    async with _semaphore():
+        start = Stats._start()
+        process = await asyncio.create_subprocess_exec(
+            'git', *cmds, cwd=root, stdin=subprocess.PIPE if stdin is not None else None,
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        out, err = await process.communicate(stdin.encode(Git._char_encoding) if stdin is not None else None)
+        Stats._record('git', cmds[0], start, len(out))
+    if process.returncode != 0:
+        raise IOError(err.decode(Git._char_encoding, errors='replace'))
+    return out
+
+
+async def call(cmds, root, stdin=None):
+    """
+    Run git asynchronously and return its decoded output, see `Git.call_async()`.
+
+    :type cmds: List[str]
+    :param cmds: The arguments to pass to git
+    :type root: str
+    :param root: The working directory to run git in
+    :type stdin: str
+    :param stdin: Optional input to write to the standard input of git
+    :rtype: str
+    :return: The output of git
+    :raise IOError: When git fails
+    """
+    return Git._decode(await call_raw(cmds, root, stdin=stdin))
+
+
+async def resolve_refs(backend):
+    """
+    :type backend: Backend
+    :param backend: The backend of the repository
+    :rtype: Dict[str, str]
+    :return: The commit hash of HEAD and every ref, see `Backend.resolve_refs()`
+    """
+    if not isinstance(backend, gitcovery.GitBackend):
+        return backend.resolve_refs()
+    try:
+        out = await call(['show-ref', '--head'], backend.root)
+    except IOError:
+        # A repository without refs gives an error
+        return {}
+    refs = {}
+    for line in out.split('\n'):
+        if line:
+            sha, name = line.split(' ', 1)
+            refs[name] = sha
+    return refs
+
+
+async def rev_list(backend, revisions, path=None):
+    """
+    :type backend: Backend
+    :param backend: The backend of the repository
+    :type revisions: List[str]
+    :param revisions: The revisions to list the commits of
+    :type path: str | None
+    :param path: Optional path to list only the commits that changed it
+    :rtype: List[str]
+    :return: The hashes of the commits, newest first, see `Backend.rev_list()`
+    """
+    if not isinstance(backend, gitcovery.GitBackend):
+        return list(backend.rev_list(revisions, path=path))
+    if path:
+        cmd = ['log', '--stdin', '--pretty=format:%H', '--', path]
+    else:
+        cmd = ['rev-list', '--stdin']
+    out = await call(cmd, backend.root, stdin=backend._stdin(revisions))
+    return [sha for sha in out.split('\n') if sha]
+
+
+async def log_records(backend, shas):
+    """
+    Request the metadata of the given commits, in chunks that are requested concurrently.
+
+    :type backend: Backend
+    :param backend: The backend of the repository
+    :type shas: List[str]
+    :param shas: The hashes of the commits
+    :rtype: List[(tuple, None)]
+    :return: The row of every commit, see `Backend.log_records()`
+    """
+    if not isinstance(backend, gitcovery.GitBackend):
+        return list(backend.log_records(shas, walk=False))
+    cmd = ['log', '--no-walk', '--stdin', '--date=raw', '--pretty=format:%x1e' + backend._FORMAT]
+    chunks = [shas[i:i + backend._CHUNK_SIZE] for i in range(0, len(shas), backend._CHUNK_SIZE)]
+    outputs = await asyncio.gather(*[call(cmd, backend.root, stdin=backend._stdin(chunk)) for chunk in chunks])
+    return [backend._parse(record, False) for out in outputs for record in backend._join_records(out.split('\x1e'))]
+
+
+async def log_identities(backend, revisions):
+    """
+    :type backend: Backend
+    :param backend: The backend of the repository
+    :type revisions: List[str]
+    :param revisions: The revisions to list the commits of
+    :rtype: List[(str, str, str, str, str)]
+    :return: The author and committer of every commit, see `Backend.log_identities()`
+    """
+    if not isinstance(backend, gitcovery.GitBackend):
+        return list(backend.log_identities(revisions))
+    out = await call(['log', '--stdin', '--format=%aN%x00%aE%x00%cN%x00%cE%x00%H'], backend.root,
+                     stdin=backend._stdin(revisions))
+    identities = []
+    for line in out.split('\n'):
+        fields = line.split('\x00')
+        if len(fields) == 5:
+            identities.append(tuple(fields))
+    return identities
+
+
+async def read_blob(backend, commit, path):
+    """
+    :type backend: Backend
+    :param backend: The backend of the repository
+    :type commit: str
+    :param commit: The commit to read the file at
+    :type path: str
+    :param path: The path of the file, relative to the root of the repository
+    :rtype: bytes | None
+    :return: The contents of the file, or None when it does not exist at that commit
+    """
+    if not isinstance(backend, gitcovery.GitBackend):
+        return backend.read_blob(commit, path)
+    try:
+        return await call_raw(['cat-file', 'blob', '%s:%s' % (commit, path)], backend.root)
+    except IOError:
+        return None
+
+
+async def _flush(repository, queue):
+    """
+    Request the metadata of all the commits in a queue at once.
+
+    :type repository: Repository
+    :param repository: The repository of the commits
+    :type queue: (List[str], asyncio.Future)
+    :param queue: The hashes of the commits and the future to set the records by hash on
+    """
+    shas, future = queue
+    try:
+        records = await log_records(repository.get_backend(), sorted(set(shas)))
+    except Exception as e:
+        future.set_exception(e)
+    else:
+        future.set_result(dict((row[0], (row, diff)) for row, diff in records))
+
+
+async def _fetch_record(repository, sha):
+    """
+    Request the metadata of a commit.
+    All the commits that are requested in the same iteration of the event loop are requested at once,
+    so loading many commits concurrently does not start a git process for every commit.
+
+    :type repository: Repository
+    :param repository: The repository of the commit
+    :type sha: str
+    :param sha: The hash of the commit
+    :rtype: (tuple, None) | None
+    :return: The row of the commit, or None when it does not exist
+    """
+    loop = asyncio.get_event_loop()
+    queues = _queues.setdefault(loop, {})
+    queue = queues.get(repository)
+    if queue is None:
+        queue = queues[repository] = ([], asyncio.Future())
+        loop.call_soon(lambda: asyncio.ensure_future(_flush(repository, queues.pop(repository))))
+    queue[0].append(sha)
+    records = await asyncio.shield(queue[1])
+    return records.get(sha)
+
+
+async def _load_authors(repository):
+    """
+    Load all the authors of a repository, when they are not loaded yet, see `Author._load_authors()`.
+
+    :type repository: Repository
+    :param repository: The repository
+    """
+    backend = repository.get_backend()
+    tips = sorted(set((await resolve_refs(backend)).values()))
+    identities = await log_identities(backend, tips) if tips else []
+    with repository._authors_lock:
+        # The authors might have been loaded by another thread in the meantime
+        if not repository._authors:
+            gitcovery.Author._register_identities(repository, identities)
+            repository._author_tips = tips
+
+
+async def load_authors(repository):
+    """
+    Make sure the authors of a repository are loaded, so loading commits does not call git synchronously.
+
+    :type repository: Repository
+    :param repository: The repository
+    """
+    if not repository._authors:
+        await _single_flight((repository, 'authors'), lambda: _load_authors(repository))
+
+
+async def _load_commit(commit):
+    """
+    Load the metadata of a commit, see `Commit.load()`.
+
+    :type commit: Commit
+    :param commit: The commit to load
+    :rtype: bool
+    :return: True when successfully loaded, False when already loaded
+    """
+    if commit.is_loaded():
+        return False
+    repository = commit._repo
+    await load_authors(repository)
+
+    store = repository._get_store()
+    rows = store.get([commit.sha]) if store else {}
+    record = None
+    if commit.sha not in rows:
+        record = await _fetch_record(repository, commit.sha)
+        if not record:
+            raise Exception('Commit %s could not be loaded' % commit.sha)
+
+    with repository._commit_locks.hold(commit._id):
+        # A thread might have loaded the commit synchronously in the meantime
+        if commit.is_loaded():
+            return False
+        if record is None:
+            commit._set_from_row(rows[commit.sha])
+            return True
+        row, diff = record
+        commit._set_from_log(row, diff)
+    if store:
+        store.add([row])
+    return True
+
+
+async def load_commit(commit):
+    """
+    Load the metadata of a commit, see `Commit.load_async()`.
+
+    :type commit: Commit
+    :param commit: The commit to load
+    :rtype: bool
+    :return: True when successfully loaded, False when already loaded
+    """
+    if commit.is_loaded():
+        return False
+    key = (commit._repo, commit._id)
+    # Like `Commit.load()`, only the task that loaded the commit gets True
+    joined = key in _pending.get(asyncio.get_event_loop(), ())
+    loaded = await _single_flight(key, lambda: _load_commit(commit))
+    return loaded and not joined
+
+
+async def history(repository, path=None, revision='HEAD'):
+    """
+    Get the commits that changed a path, see `Repository.history_async()`.
+
+    :type repository: Repository
+    :param repository: The repository
+    :type path: str | None
+    :param path: The path relative to the root of the repository, None for the whole repository
+    :type revision: str
+    :param revision: The revision to list the history of
+    :rtype: List[Commit]
+    :return: The commits, newest first
+    """
+    shas = await rev_list(repository.get_backend(), [revision], path=path)
+    commits = [gitcovery.Commit(sha, repository=repository) for sha in shas]
+    gitcovery.Commit._group(commits)
+    return commits
+
+
+async def file_at(file, commit):
+    """
+    Get the contents of a file at a commit, see `GitFile.at_async()`.
+
+    :type file: GitFile
+    :param file: The file
+    :type commit: Commit | str
+    :param commit: The commit to get the contents at
+    :rtype: str
+    :return: The contents of the file, or the empty string when it does not exist at that commit
+    """
+    sha = commit if isinstance(commit, str) else commit.sha
+    raw = await read_blob(file._repo.get_backend(), sha, file.relative_path)
+    return Git._decode(raw) if raw is not None else ''
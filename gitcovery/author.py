@@ -1,7 +1,9 @@
-import re
+import threading
+from array import array
 
 import gitcovery
-from gitcovery import Git
+from gitcovery import Git, Repository
+from .stats import Stats
 
 
 class Author(object):
@@ -9,13 +11,10 @@ class Author(object):
     A commit author.
     Stores the name and email of the author alongside with all the commits that are known to be of this author.
 
-    This class also keeps a static cache of all the authors in the repository.
+    The authors of a repository are cached in its `Repository` object.
     """
-    _authors = {}  # :type: Dict[str, Author]
-    _AUTHOR_REGEX = re.compile('(?P<name>.+)\n(?P<email>.+)\n(?P<commit>.+)\n' +
-                               '(?P<commit_email>.+)\n(?P<sha>[a-f0-9]+)\n\n')
 
-    def __init__(self, name, email):
+    def __init__(self, name, email, repository=None):
         """
         Constructor for the author object from a name and email.
 
@@ -23,14 +22,26 @@ class Author(object):
         :param name: The name of the author
         :type email: str
         :param email: The email of the author
+        :type repository: Repository
+        :param repository: The repository of the author, by default the current repository
         """
+        self._repo = repository or Repository.current()
 
         # The name of the author.
         self.name = name       # :type: str
         # The email addresses of this author.
         self.emails = [email]  # :type: List[str]
-        # The commits made by this author.
-        self.commits = []      # :type: List[Commit]
+        self._commit_ids = array('i')
+        self._commit_set = set()
+        self._lock = threading.Lock()
+
+    @property
+    def commits(self):
+        """
+        :rtype: List[Commit]
+        :return: The commits made by this author.
+        """
+        return [gitcovery.Commit._from_id(row, self._repo) for row in self._commit_ids]
 
     def register_commit(self, commit):
         """
@@ -41,11 +52,13 @@ class Author(object):
         :rtype: bool
         :return: True when registration was successful, False otherwise
         """
-        if commit not in self.commits:
-            self.commits.append(commit)
-            return True
-        else:
-            return False
+        with self._lock:
+            if commit._id not in self._commit_set:
+                self._commit_set.add(commit._id)
+                self._commit_ids.append(commit._id)
+                return True
+            else:
+                return False
 
     def register_email(self, email):
         """
@@ -56,32 +69,74 @@ class Author(object):
         :rtype: bool
         :return: True when registration was successful, False otherwise
         """
-        if email not in self.emails:
-            self.emails.append(email)
-            return True
-        else:
-            return False
+        with self._lock:
+            if email not in self.emails:
+                self.emails.append(email)
+                return True
+            else:
+                return False
 
     @classmethod
-    def _load_authors(cls):
+    def _load_authors(cls, repository, refresh=False):
         """
         Load all the authors of the repository.
         Adds all the email-addresses and associated commits.
+        The commits that HEAD and the refs pointed to are remembered,
+        so refreshing only loads the authors of commits that were added since.
+        The authors are loaded by a single thread at once.
+
+        :type repository: Repository
+        :param repository: The repository to load the authors of
+        :type refresh: bool
+        :param refresh: Whether to load the authors of new commits when the authors are already loaded
+        """
+        with repository._authors_lock:
+            authors = repository._authors
+            if not authors:
+                repository._author_tips = []
+            elif not refresh:
+                return
+
+            tips = repository._get_tips()
+            revisions = Git._revisions_since(tips, repository._author_tips)
+            if revisions is None:
+                return
+
+            backend = repository.get_backend()
+            if repository._get_store():
+                # Use the on-disk cache, only the commits that are not cached are requested from git
+                shas = list(backend.rev_list(revisions))
+                rows = gitcovery.Commit._fetch_rows(repository, shas)
+                identities = ((rows[sha][2], rows[sha][3], rows[sha][6], rows[sha][7], sha) for sha in shas)
+            else:
+                identities = backend.log_identities(revisions)
+            cls._register_identities(repository, identities)
+            repository._author_tips = tips
+
+    @classmethod
+    def _register_identities(cls, repository, identities):
         """
-        if cls._authors:
-            return
-        out = Git.call(['log', '--all', '--format=%aN%n%aE%n%cN%n%cE%n%H%n'])
+        Register the authors and committers of commits, adding the authors that are not known yet.
+        The authors lock of the repository must be held.
 
-        def register(name, email):
-            if name not in cls._authors:
-                cls._authors[name] = Author(name, email)
+        :type repository: Repository
+        :param repository: The repository of the commits
+        :type identities: Iterable[(str, str, str, str, str)]
+        :param identities: The author name and email, committer name and email and hash of every commit
+        """
+        authors = repository._authors
+
+        def register(name, email, commit):
+            if name not in authors:
+                authors[name] = Author(name, email, repository=repository)
             else:
-                cls._authors[name].register_email(email)
-            cls._authors[name].register_commit(gitcovery.Commit.get_commit(match.group('sha')))
+                authors[name].register_email(email)
+            authors[name].register_commit(commit)
 
-        for match in cls._AUTHOR_REGEX.finditer(out):
-            register(match.group('name'), match.group('email'))
-            register(match.group('commit'), match.group('commit_email'))
+        for name, email, commit_name, commit_email, sha in identities:
+            commit = gitcovery.Commit(sha, repository=repository)
+            register(name, email, commit)
+            register(commit_name, commit_email, commit)
 
     @classmethod
     def list(cls):
@@ -91,8 +146,9 @@ class Author(object):
         :rtype: List[Author]
         :return: A list of all authors
         """
-        cls._load_authors()
-        return cls._authors.values()
+        repository = Repository.current()
+        cls._load_authors(repository, refresh=True)
+        return list(repository._authors.values())
 
     @classmethod
     def get_author(cls, name, email=''):
@@ -100,6 +156,23 @@ class Author(object):
         Get the Author object of the author with the given name.
         The email address is not necessary when searching and is appended to a known author.
 
+        :type name: str
+        :param name: The name of the author
+        :type email: str
+        :param email: (str) The email of the author (this value is optional)
+        :rtype: Author
+        :return: The requested Author object
+        :raise Exception: When the author does not exist
+        """
+        return cls._get_author(Repository.current(), name, email=email)
+
+    @classmethod
+    def _get_author(cls, repository, name, email=''):
+        """
+        Get the Author object of the author with the given name in a repository, see `Author.get_author()`.
+
+        :type repository: Repository
+        :param repository: The repository of the author
         :type name: str
         :param name: The name of the author
         :type email: str
@@ -109,22 +182,22 @@ class Author(object):
         :raise Exception: When the author does not exist
         """
         name = name.strip()
-        cls._load_authors()
+        author = repository._authors.get(name)
+        Stats._count('authors', hits=author is not None, misses=author is None)
+        if author is None:
+            cls._load_authors(repository)
+            author = repository._authors.get(name)
 
-        # If not known, try reload
-        if name not in cls._authors:
-            cls._load_authors()
+        # If not known, try to load the authors of new commits
+        if author is None:
+            cls._load_authors(repository, refresh=True)
+            author = repository._authors.get(name)
 
         # If already reloaded and still not found, throw exception
-        if cls._authors[name] is None:
+        if author is None:
             raise Exception(
                 'Author <%s> not known' % name)
 
-        if email:
-            author = cls._authors[name]
-            if email not in author.emails:
-                author.register_email(email)
-            return author
-
-        else:
-            return cls._authors[name]
+        if email and email not in author.emails:
+            author.register_email(email)
+        return author
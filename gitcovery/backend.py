@@ -0,0 +1,868 @@
+import binascii
+import os
+import re
+import threading
+from multiprocessing.pool import ThreadPool
+
+from .catfile import _CatFile
+from .commitgraph import _CommitGraph
+from .git import Git
+from .objects import _ObjectDatabase
+from .stats import Stats
+
+
+class Backend(object):
+    """
+    Interface between the classes of this module and the repository they analyse.
+    `Commit`, `Author`, `CommitGraph`, `GitFile` and `GitFolder` only access the repository through the backend,
+    which is set with `Git.set_backend()`. By default a `GitBackend` for the root of the repository is used.
+
+    Commits are returned as rows of the form `(sha, parents, author, author_email, author_time, author_tz,
+    committer, committer_email, commit_time, commit_tz, title, message)`, where the parents are separated by spaces,
+    the times are unix timestamps and the timezones are offsets in minutes.
+    Revisions are lists of commits, where commits prefixed with '^' exclude their ancestors, like `git rev-list`.
+    """
+
+    def resolve_refs(self):
+        """
+        Get the commits (or tags) that HEAD and all refs point to.
+
+        :rtype: Dict[str, str]
+        :return: The SHA hash per ref name, including 'HEAD'
+        """
+        raise NotImplementedError()
+
+    def rev_parse(self, name):
+        """
+        Resolve a revision, for example a ref name or an abbreviated hash, to its full SHA hash.
+
+        :type name: str
+        :param name: The revision to resolve, this may end with '^{commit}' to peel tags
+        :rtype: str
+        :return: The full SHA hash
+        :raise IOError: When the revision cannot be resolved
+        """
+        raise NotImplementedError()
+
+    def rev_list(self, revisions, path=None, limit=None, since=None, until=None, first_parent=False):
+        """
+        List the commits in the given revisions, newest first.
+        The commits are produced while the history is walked, so stopping early avoids walking the rest.
+
+        :type revisions: List[str]
+        :param revisions: The revisions to list
+        :type path: str
+        :param path: Optional path, only the commits that changed this path are listed
+        :type limit: int
+        :param limit: Optional maximum number of commits to list
+        :type since: int
+        :param since: Optional unix timestamp, only the commits that were committed at or after it are listed
+        :type until: int
+        :param until: Optional unix timestamp, only the commits that were committed at or before it are listed
+        :type first_parent: bool
+        :param first_parent: Whether to only follow the first parent of merges
+        :rtype: Iterator[str]
+        :return: The SHA hashes of the commits
+        """
+        raise NotImplementedError()
+
+    def log_records(self, revisions, walk=True, load_diff=False, workers=1):
+        """
+        Get the metadata of the commits in the given revisions.
+
+        :type revisions: List[str]
+        :param revisions: The revisions to get the commits of
+        :type walk: bool
+        :param walk: Whether to include all the ancestors, False to get only the listed commits
+        :type load_diff: bool
+        :param load_diff: Whether to include the raw diff of each commit
+        :type workers: int
+        :param workers: The number of parallel requests the backend may use, when supported
+        :rtype: Iterator[(tuple, str | None)]
+        :return: The row of each commit and its diff, which is None when not requested
+        """
+        raise NotImplementedError()
+
+    def log_identities(self, revisions):
+        """
+        Get the authors and committers of the commits in the given revisions.
+
+        :type revisions: List[str]
+        :param revisions: The revisions to get the commits of
+        :rtype: Iterator[(str, str, str, str, str)]
+        :return: The author name and email, the committer name and email and the SHA hash of each commit
+        """
+        for row, _ in self.log_records(revisions):
+            yield row[2], row[3], row[6], row[7], row[0]
+
+    def log_paths(self, revisions):
+        """
+        Get the files that were changed by the commits in the given revisions, newest first.
+
+        :type revisions: List[str]
+        :param revisions: The revisions to get the commits of
+        :rtype: Iterator[(str, List[List[str]])]
+        :return: The SHA hash of each commit and the files that differ from each of its parents,
+            or from the empty tree for an initial commit
+        """
+        raise NotImplementedError()
+
+    def log_renames(self, revisions):
+        """
+        Get the files that were renamed by the commits in the given revisions, newest first.
+        Only the commits that renamed a file are listed, renames in merges are not detected.
+
+        :type revisions: List[str]
+        :param revisions: The revisions to get the commits of
+        :rtype: Iterator[(str, List[(str, str)])]
+        :return: The SHA hash of each commit and the old and new path of every renamed file
+        """
+        raise NotImplementedError()
+
+    def graph_records(self, revisions):
+        """
+        Get the parents and commit dates of the commits in the given revisions, which is all that is needed to
+        traverse the commit graph.
+
+        :type revisions: List[str]
+        :param revisions: The revisions to get the commits of
+        :rtype: Iterator[(str, int, List[str])]
+        :return: The SHA hash, commit date as unix timestamp and parent hashes of each commit
+        """
+        for row, _ in self.log_records(revisions):
+            yield row[0], row[8], row[1].split()
+
+    def commit_graph(self, sha):
+        """
+        Look up the parents, commit date and generation number of a single commit,
+        when this is possible without walking the history.
+        When None is returned, the commit is requested together with its ancestors using `graph_records()`.
+
+        :type sha: str
+        :param sha: The SHA hash of the commit
+        :rtype: (List[str], int, int) | None
+        :return: The parent hashes, commit date as unix timestamp and generation number (0 when unknown)
+        """
+        return None
+
+    def read_object(self, obj, check_only=False):
+        """
+        Read a git object.
+
+        :type obj: str
+        :param obj: The object to read, for example a SHA hash or `<commit>:<path>`
+        :type check_only: bool
+        :param check_only: Whether only the object info is needed, in which case the contents may be None
+        :rtype: (str, str, int, bytes | None) | None
+        :return: The SHA hash, type, size and contents of the object, or None when it does not exist
+        """
+        raise NotImplementedError()
+
+    def read_blob(self, commit, path):
+        """
+        Read the contents of a file at a commit.
+
+        :type commit: str
+        :param commit: The SHA hash of the commit
+        :type path: str
+        :param path: The path of the file, relative to the root of the repository
+        :rtype: bytes | None
+        :return: The contents of the file, or None when the file does not exist at that commit
+        """
+        entry = self.read_object('%s:%s' % (commit, path))
+        return entry[3] if entry and entry[1] == 'blob' else None
+
+    def blob_ids(self, commits, path):
+        """
+        Get the SHA hashes of the blobs of a file at many commits, without reading their contents.
+
+        :type commits: List[str]
+        :param commits: The SHA hashes of the commits
+        :type path: str
+        :param path: The path of the file, relative to the root of the repository
+        :rtype: List[str | None]
+        :return: The hash of the blob at every commit, or None when the file does not exist at that commit
+        """
+        ids = []
+        for commit in commits:
+            entry = self.read_object('%s:%s' % (commit, path), check_only=True)
+            ids.append(entry[0] if entry and entry[1] == 'blob' else None)
+        return ids
+
+    def list_tree(self, obj):
+        """
+        Get the entries of a tree.
+
+        :type obj: str
+        :param obj: The tree to read, for example a tree hash, a commit hash or `<commit>:<path>`
+        :rtype: List[(str, str, bytes)]
+        :return: The mode, SHA hash and undecoded name of each entry
+        :raise IOError: When the object does not exist or is not a tree
+        """
+        entry = self.read_object(obj)
+        if entry and entry[1] in ('commit', 'tag'):
+            entry = self.read_object(obj + '^{tree}')
+        if not entry or entry[1] != 'tree':
+            raise IOError('Object %s is not a tree' % obj)
+
+        raw = entry[3]
+        hash_size = len(entry[0]) // 2
+        entries = []
+        pos = 0
+        while pos < len(raw):
+            space = raw.index(b' ', pos)
+            nul = raw.index(b'\0', space)
+            sha = binascii.hexlify(raw[nul + 1:nul + 1 + hash_size]).decode('ascii')
+            entries.append((raw[pos:space].decode('ascii'), sha, raw[space + 1:nul]))
+            pos = nul + 1 + hash_size
+        return entries
+
+    def commit_diff(self, sha):
+        """
+        Get the raw diff of the changes made in a commit.
+
+        :type sha: str
+        :param sha: The SHA hash of the commit
+        :rtype: str
+        :return: The diff in the format of `git show`
+        """
+        raise NotImplementedError()
+
+    def diff(self, from_commit, to_commit, path=None):
+        """
+        Get the raw diff between two commits.
+
+        :type from_commit: str
+        :param from_commit: The SHA hash of the old commit
+        :type to_commit: str
+        :param to_commit: The SHA hash of the new commit
+        :type path: str
+        :param path: Optional path to limit the diff to
+        :rtype: str
+        :return: The diff in the format of `git diff`
+        """
+        raise NotImplementedError()
+
+    def diff_stats(self, commit, base=None):
+        """
+        Get the number of added and removed lines per changed file.
+
+        :type commit: str
+        :param commit: The SHA hash of the new commit
+        :type base: str
+        :param base: The SHA hash of the old commit, by default the first parent of the commit
+        :rtype: List[(int | None, int | None, str)]
+        :return: The added and removed lines (None for binary files) and the path of each changed file
+        """
+        raise NotImplementedError()
+
+    def status(self, path):
+        """
+        Get the status of a path in the working tree.
+
+        :type path: str
+        :param path: The path to get the status of
+        :rtype: str
+        :return: The status in the format of `git status --short`
+        :raise IOError: When the path is not in a repository
+        """
+        return ''
+
+    def close(self):
+        """
+        Release all the resources held by this backend, they are acquired again when needed.
+        """
+        pass
+
+
+class GitBackend(Backend):
+    """
+    The default backend, which calls git for every request.
+    Objects are read through long-running `git cat-file` processes, or in-process from the object database
+    when the object reader is enabled. When the repository has a commit-graph file, it is used for the commit graph.
+    These resources are opened once, also when they are first needed by multiple threads at the same time.
+    """
+
+    # The format used to request commits from git. Fields are separated by NUL characters,
+    # so a record can be split in linear time. Anything after the last field is the diff.
+    # The dates are requested as '<unix timestamp> <timezone offset>', which requires `--date=raw`.
+    _FORMAT = '%H%x00%P%x00%aN%x00%aE%x00%ad%x00%cN%x00%cE%x00%cd%x00%s%x00%b%x00'
+    # The number of fields in the format, excluding the diff
+    _NUM_FIELDS = 10
+    # The maximum number of commits requested in a single call
+    _CHUNK_SIZE = 500
+    _REGEX_TIMEZONE = re.compile('^[+-][0-9]{4}$')
+    # Records are prefixed with a record separator, which git does not escape in messages, paths and diffs,
+    # so only a separator followed by a full SHA hash and the end of the first field starts a new record
+    _REGEX_RECORD_START = re.compile('^[0-9a-f]{40}([0-9a-f]{24})?[\x00 \n]')
+    # The characters git considers whitespace when splitting a commit message in a title and a message
+    _WHITESPACE = b' \t\r'
+
+    def __init__(self, root, object_reader=False):
+        """
+        Constructor for a GitBackend.
+
+        :type root: str
+        :param root: The root of the repository
+        :type object_reader: bool
+        :param object_reader: Whether to read objects in-process instead of through `git cat-file`
+        """
+        self.root = root
+        self._object_reader_enabled = object_reader
+        self._object_reader = None  # :type: _ObjectDatabase | None
+        self._cat_file = None  # :type: _CatFile | None
+        self._cat_file_check = None  # :type: _CatFile | None
+        # The commit-graph file of the repository, False when it was found to be absent
+        self._commit_graph = None  # :type: _CommitGraph | bool | None
+        # Guards opening and closing the resources above
+        self._lock = threading.RLock()
+
+    def _call(self, cmds, kill_on_error=True, stdin=None):
+        """
+        Call git in the root of the repository, see `Git.call()`.
+        """
+        return Git.call(cmds, root=self.root, kill_on_error=kill_on_error, stdin=stdin)
+
+    def _call_stream(self, cmds, separator='\n', stdin=None):
+        """
+        Call git in the root of the repository and stream the output, see `Git.call_stream()`.
+        """
+        return Git.call_stream(cmds, separator=separator, root=self.root, stdin=stdin)
+
+    @staticmethod
+    def _stdin(revisions):
+        """
+        :type revisions: List[str]
+        :param revisions: The revisions
+        :rtype: str
+        :return: The input for a git command using `--stdin`
+        """
+        return ''.join(revision + '\n' for revision in revisions)
+
+    def _get_cat_file(self, check_only=False):
+        """
+        Get a persistent cat-file process of the repository, creating it when needed.
+
+        :type check_only: bool
+        :param check_only: Whether to get the `--batch-check` process instead of the `--batch` process
+        :rtype: _CatFile
+        :return: The cat-file process
+        """
+        with self._lock:
+            if check_only:
+                if not self._cat_file_check:
+                    self._cat_file_check = _CatFile(self.root, check_only=True)
+                return self._cat_file_check
+            if not self._cat_file:
+                self._cat_file = _CatFile(self.root)
+            return self._cat_file
+
+    def set_object_reader(self, enabled):
+        """
+        Enable or disable reading objects in-process.
+
+        :type enabled: bool
+        :param enabled: Whether to read objects in-process instead of through `git cat-file`
+        """
+        with self._lock:
+            self._object_reader_enabled = enabled
+            if not enabled and self._object_reader:
+                self._object_reader.close()
+                self._object_reader = None
+
+    def _get_object_reader(self):
+        """
+        Get the in-process object reader, opening it when needed.
+
+        :rtype: _ObjectDatabase | None
+        :return: The object reader, or None when it is not enabled
+        """
+        if not self._object_reader_enabled:
+            return None
+        with self._lock:
+            if not self._object_reader:
+                objects_dir = os.path.join(self.root, self._call(['rev-parse', '--git-path', 'objects']).strip())
+                try:
+                    object_format = self._call(['rev-parse', '--show-object-format'], kill_on_error=False).strip()
+                except IOError:
+                    # Versions of git without SHA-256 support do not know this option
+                    object_format = 'sha1'
+                self._object_reader = _ObjectDatabase(objects_dir,
+                                                      hash_size=32 if object_format == 'sha256' else 20)
+            return self._object_reader
+
+    def _get_log_reader(self):
+        """
+        Get the in-process object reader, when commits can be parsed from their objects directly.
+        This is not the case when the repository has a mailmap, replace refs or grafts,
+        as `git log` applies these to the commits it shows.
+
+        :rtype: _ObjectDatabase | None
+        :return: The object reader, or None when it is not enabled or cannot be used for commits
+        """
+        reader = self._get_object_reader()
+        if not reader:
+            return None
+        if reader.log_compatible is None:
+            self._check_log_compatible(reader)
+        return reader if reader.log_compatible else None
+
+    def _check_log_compatible(self, reader):
+        """
+        Check once whether commits can be parsed from their objects like `git log` shows them,
+        see `GitBackend._get_log_reader()`.
+
+        :type reader: _ObjectDatabase
+        :param reader: The object reader to store the result in
+        """
+        with self._lock:
+            if reader.log_compatible is not None:
+                return
+            try:
+                self._call(['config', '--get-regexp', '^mailmap\\.'], kill_on_error=False)
+                has_config = True
+            except IOError:
+                # git config fails when no key matches
+                has_config = False
+            grafts = os.path.join(self.root, self._call(['rev-parse', '--git-path', 'info/grafts']).strip())
+            reader.log_compatible = not (has_config or os.path.exists(os.path.join(self.root, '.mailmap')) or
+                                         self._get_cat_file(check_only=True).query('HEAD:.mailmap') or
+                                         os.path.exists(grafts) or
+                                         self._call(['for-each-ref', '--count=1', 'refs/replace/']).strip())
+
+    def _get_commit_graph(self):
+        """
+        Get the commit-graph file of the repository, opening it when needed.
+
+        :rtype: _CommitGraph | None
+        :return: The commit-graph, or None when the repository has none
+        """
+        if self._commit_graph is None:
+            with self._lock:
+                if self._commit_graph is None:
+                    info_dir = os.path.join(self.root,
+                                            self._call(['rev-parse', '--git-path', 'objects/info']).strip())
+                    self._commit_graph = _CommitGraph.open(info_dir) or False
+        return self._commit_graph or None
+
+    def write_commit_graph(self, force=False):
+        """
+        Let git write a commit-graph file for all reachable commits, see `Git.write_commit_graph()`.
+
+        :type force: bool
+        :param force: Whether to rewrite an existing commit-graph
+        :rtype: bool
+        :return: True when the commit-graph was written, False otherwise
+        :raise IOError: When git fails to write the commit-graph
+        """
+        with self._lock:
+            if self._get_commit_graph() and not force:
+                return False
+            if self._commit_graph:
+                self._commit_graph.close()
+            self._commit_graph = None
+            self._call(['commit-graph', 'write', '--reachable'], kill_on_error=False)
+            return self._get_commit_graph() is not None
+
+    @classmethod
+    def _join_records(cls, pieces):
+        """
+        Join the output of git that was split on record separators back into records.
+        A piece that does not start a record was split on a record separator inside a field, so it is rejoined
+        with the record before it.
+
+        :type pieces: Iterable[str]
+        :param pieces: The output of a command with `%x1e` in front of the format, split on record separators
+        :rtype: Iterator[str]
+        :return: The records, without the record separators in front of them
+        """
+        record = None
+        for piece in pieces:
+            if cls._REGEX_RECORD_START.match(piece):
+                if record is not None:
+                    yield record
+                record = piece
+            elif record is not None:
+                record += '\x1e' + piece
+        if record is not None:
+            yield record
+
+    @classmethod
+    def _parse_record(cls, record):
+        """
+        Split a record in the format of `GitBackend._FORMAT` into its fields.
+
+        :type record: str
+        :param record: The record to split
+        :rtype: List[str] | None
+        :return: The fields of the record followed by the diff, or None when the record is malformed
+        """
+        fields = record.split('\x00', cls._NUM_FIELDS)
+        if len(fields) != cls._NUM_FIELDS + 1:
+            return None
+        return fields
+
+    @staticmethod
+    def _parse_date(raw):
+        """
+        Parse a raw git date of the form '<unix timestamp> <timezone offset>', eg. '1520887436 +0100'.
+
+        :type raw: str
+        :param raw: The raw date to parse
+        :rtype: (int, int)
+        :return: The unix timestamp and the timezone offset in minutes
+        """
+        timestamp, offset = raw.split(' ')
+        minutes = int(offset[1:3]) * 60 + int(offset[3:5])
+        return int(timestamp), -minutes if offset[0] == '-' else minutes
+
+    @classmethod
+    def _record_to_row(cls, fields):
+        """
+        Convert the fields of a record to a row.
+
+        :type fields: List[str]
+        :param fields: The fields of the record, as returned by `GitBackend._parse_record()`
+        :rtype: tuple
+        :return: The row containing the metadata of the commit
+        """
+        (sha, parents, author, author_mail, author_date, commit,
+         commit_mail, commit_date, title, message, _) = fields
+        author_time, author_tz = cls._parse_date(author_date)
+        commit_time, commit_tz = cls._parse_date(commit_date)
+        return (sha, parents, author, author_mail, author_time, author_tz,
+                commit, commit_mail, commit_time, commit_tz, title, message.strip())
+
+    @classmethod
+    def _parse(cls, record, load_diff):
+        """
+        Parse a record of the log output.
+
+        :type record: str
+        :param record: The record in the format of `GitBackend._FORMAT`
+        :type load_diff: bool
+        :param load_diff: Whether the record includes the diff
+        :rtype: (tuple, str | None)
+        :return: The row and the diff
+        :raise: Exception, when the record could not be parsed
+        """
+        start = Stats._start()
+        fields = cls._parse_record(record)
+        try:
+            if fields is None:
+                raise ValueError('Expected %d fields' % cls._NUM_FIELDS)
+            result = cls._record_to_row(fields), fields[-1] if load_diff else None
+            Stats._record('parse', 'log', start, len(record))
+            return result
+        except Exception as e:
+            raise Exception('git show output could not be parsed for: %s\n' % record[:40] +
+                            'Please report the commit hash and repository so I can improve the parser', e)
+
+    @classmethod
+    def _parse_ident(cls, value):
+        """
+        Parse an identity line of a commit object, of the form 'Name <email> <unix timestamp> <timezone offset>'.
+
+        :type value: bytes
+        :param value: The identity
+        :rtype: (str, str, int, int) | None
+        :return: The name, email address, unix timestamp and timezone offset in minutes, or None when malformed
+        """
+        start = value.find(b'<')
+        end = value.find(b'>', start)
+        if start < 0 or end < 0:
+            return None
+        date = value[end + 1:].split()
+        if len(date) != 2 or not cls._REGEX_TIMEZONE.match(date[1].decode('ascii', 'replace')):
+            return None
+        timestamp, offset = cls._parse_date(date[0].decode('ascii') + ' ' + date[1].decode('ascii'))
+        return (Git._decode(value[:start].rstrip(cls._WHITESPACE)), Git._decode(value[start + 1:end]),
+                timestamp, offset)
+
+    @classmethod
+    def _object_to_row(cls, sha, raw):
+        """
+        Convert a raw commit object to a row, with the same contents as when parsed from the output of `git log`.
+        The title is the first paragraph of the message joined on a single line and the message is the rest.
+
+        :type sha: str
+        :param sha: The SHA hash of the commit
+        :type raw: bytes
+        :param raw: The contents of the commit object
+        :rtype: tuple | None
+        :return: The row containing the metadata of the commit, or None when it cannot be converted like git does
+        """
+        header, _, body = raw.partition(b'\n\n')
+        parents = []
+        author = commit = None
+        for line in header.split(b'\n'):
+            key, _, value = line.partition(b' ')
+            if key == b'parent':
+                parents.append(value.decode('ascii'))
+            elif key == b'author':
+                author = cls._parse_ident(value)
+            elif key == b'committer':
+                commit = cls._parse_ident(value)
+            elif key == b'encoding' and value.lower() not in (b'utf-8', b'utf8'):
+                # git log re-encodes these messages
+                return None
+        if not author or not commit:
+            return None
+
+        lines = Git._decode(body).split('\n')
+        whitespace = cls._WHITESPACE.decode('ascii')
+        start = 0
+        while start < len(lines) and not lines[start].strip(whitespace):
+            start += 1
+        end = start
+        while end < len(lines) and lines[end].strip(whitespace):
+            end += 1
+        title = ' '.join(line.rstrip(whitespace) for line in lines[start:end])
+        message = '\n'.join(lines[end:]).strip()
+        return (sha, ' '.join(parents), author[0], author[1], author[2], author[3],
+                commit[0], commit[1], commit[2], commit[3], title, message)
+
+    def _read_row(self, reader, sha):
+        """
+        Read the metadata of a commit with the in-process object reader.
+
+        :type reader: _ObjectDatabase
+        :param reader: The object reader
+        :type sha: str
+        :param sha: The SHA hash of the commit
+        :rtype: tuple | None
+        :return: The row containing the metadata of the commit, or None when it should be requested from git instead
+        """
+        entry = reader.read(sha)
+        if not entry or entry[0] != 'commit':
+            return None
+        start = Stats._start()
+        row = self._object_to_row(sha, entry[1])
+        Stats._record('parse', 'commit object', start, len(entry[1]))
+        return row
+
+    def _fetch(self, shas, workers=1, load_diff=False):
+        """
+        Request the given commits from git in chunks, using `git log --no-walk --stdin`.
+        The git calls of the chunks are spread over a pool of threads, the output is parsed on this thread.
+
+        :type shas: List[str]
+        :param shas: The hashes of the commits to request
+        :type workers: int
+        :param workers: The number of git calls to run in parallel
+        :type load_diff: bool
+        :param load_diff: Whether to request the diffs as well
+        :rtype: Iterator[(tuple, str | None)]
+        :return: The row and diff of each commit
+        """
+        if not shas:
+            return
+        size = min(self._CHUNK_SIZE, -(-len(shas) // max(workers, 1)))
+        chunks = [shas[i:i + size] for i in range(0, len(shas), size)]
+        cmd = ['log', '--no-walk', '--stdin', '--date=raw', '--pretty=format:%x1e' + self._FORMAT]
+        if load_diff:
+            cmd.insert(1, '-p')
+
+        def fetch(chunk):
+            return self._call(cmd, kill_on_error=False, stdin=self._stdin(chunk))
+
+        pool = ThreadPool(min(workers, len(chunks))) if workers > 1 and len(chunks) > 1 else None
+        try:
+            outputs = pool.imap(fetch, chunks) if pool else map(fetch, chunks)
+            for out in outputs:
+                for record in self._join_records(out.split('\x1e')):
+                    yield self._parse(record, load_diff)
+        finally:
+            if pool:
+                pool.close()
+                pool.join()
+
+    def resolve_refs(self):
+        try:
+            out = self._call(['show-ref', '--head'], kill_on_error=False)
+        except IOError:
+            # A repository without refs gives an error
+            return {}
+        refs = {}
+        for line in out.split('\n'):
+            if line:
+                sha, name = line.split(' ', 1)
+                refs[name] = sha
+        return refs
+
+    def rev_parse(self, name):
+        return self._call(['rev-parse', '--verify', name], kill_on_error=False).strip()
+
+    def rev_list(self, revisions, path=None, limit=None, since=None, until=None, first_parent=False):
+        options = []
+        if limit is not None:
+            options.append('--max-count=%d' % limit)
+        if since is not None:
+            options.append('--max-age=%d' % since)
+        if until is not None:
+            options.append('--min-age=%d' % until)
+        if first_parent:
+            options.append('--first-parent')
+        if path:
+            cmd = ['log', '--stdin', '--pretty=format:%H'] + options + ['--', path]
+        else:
+            cmd = ['rev-list', '--stdin'] + options
+        for sha in self._call_stream(cmd, stdin=self._stdin(revisions)):
+            if sha:
+                yield sha
+
+    def log_records(self, revisions, walk=True, load_diff=False, workers=1):
+        if not walk:
+            shas = list(revisions)
+            reader = self._get_log_reader() if not load_diff else None
+            if reader:
+                remaining = []
+                for sha in shas:
+                    row = self._read_row(reader, sha)
+                    if row:
+                        yield row, None
+                    else:
+                        remaining.append(sha)
+                shas = remaining
+            for result in self._fetch(shas, workers=workers, load_diff=load_diff):
+                yield result
+            return
+
+        cmd = ['log', '--stdin', '--date=raw', '--pretty=format:%x1e' + self._FORMAT]
+        if load_diff:
+            cmd.insert(1, '-p')
+        # Each commit is prefixed with a record separator, so only a single commit is held in memory at once
+        for record in self._join_records(self._call_stream(cmd, separator='\x1e', stdin=self._stdin(revisions))):
+            yield self._parse(record, load_diff)
+
+    def log_identities(self, revisions):
+        cmd = ['log', '--stdin', '--format=%aN%x00%aE%x00%cN%x00%cE%x00%H']
+        for line in self._call_stream(cmd, stdin=self._stdin(revisions)):
+            fields = line.split('\x00')
+            if len(fields) == 5:
+                yield tuple(fields)
+
+    def log_paths(self, revisions):
+        # Merges are listed once for every parent they differ from, the parents without changes are left out.
+        # Renames are listed as a removal and an addition, as the history of both paths changes.
+        cmd = ['log', '--stdin', '-z', '-m', '--no-renames', '--name-only', '--pretty=format:%x1e%H %P']
+        sha = None
+        changes = []
+        for record in self._join_records(self._call_stream(cmd, separator='\x1e', stdin=self._stdin(revisions))):
+            header, _, paths = record.partition('\n')
+            commit = header.strip('\x00').split(' ')
+            if commit[0] != sha:
+                if sha:
+                    yield sha, changes
+                sha = commit[0]
+                changes = [[] for _ in range(max(len(commit) - 1, 1))]
+                index = 0
+            if index < len(changes):
+                changes[index] = [path for path in paths.split('\x00') if path]
+            index += 1
+        if sha:
+            yield sha, changes
+
+    def log_renames(self, revisions):
+        cmd = ['log', '--stdin', '-z', '-M', '--diff-filter=R', '--name-status', '--pretty=format:%x1e%H']
+        for record in self._join_records(self._call_stream(cmd, separator='\x1e', stdin=self._stdin(revisions))):
+            sha, _, changes = record.partition('\n')
+            # Every rename consists of the status, the old path and the new path
+            fields = changes.split('\x00')
+            renames = [(fields[i + 1], fields[i + 2]) for i in range(0, len(fields) - 2, 3)
+                       if fields[i].startswith('R')]
+            if renames:
+                yield sha, renames
+
+    def graph_records(self, revisions):
+        # Each line has the form '<commit timestamp> <sha> <parent sha>*'
+        cmd = ['rev-list', '--timestamp', '--parents', '--stdin']
+        for line in self._call_stream(cmd, stdin=self._stdin(revisions)):
+            fields = line.split(' ')
+            if len(fields) >= 2:
+                yield fields[1], int(fields[0]), fields[2:]
+
+    def commit_graph(self, sha):
+        commit_graph = self._get_commit_graph()
+        if not commit_graph:
+            return None
+        position = commit_graph.find(sha)
+        if position >= 0:
+            parents, commit_time, generation = commit_graph.commit(position)
+            return [commit_graph.sha(parent) for parent in parents], commit_time, generation
+
+        # Commits that are newer than the commit-graph are read from their objects
+        entry = self.read_object(sha)
+        if not entry or entry[1] != 'commit':
+            return None
+        parents = []
+        commit_time = 0
+        for line in entry[3].split(b'\n'):
+            if not line:
+                # The headers end at the first empty line
+                break
+            if line.startswith(b'parent '):
+                parents.append(line[7:].decode('ascii'))
+            elif line.startswith(b'committer '):
+                commit_time = int(line.rsplit(b' ', 2)[1])
+        return parents, commit_time, 0
+
+    def read_object(self, obj, check_only=False):
+        reader = self._get_object_reader()
+        if reader:
+            try:
+                return reader.lookup(obj, check_only=check_only)
+            except ValueError:
+                # Object names the object reader cannot resolve, like branch names, are passed to git
+                pass
+        return self._get_cat_file(check_only).query(obj)
+
+    def blob_ids(self, commits, path):
+        if len(commits) < 2 or '\n' in path or self._get_object_reader():
+            return super(GitBackend, self).blob_ids(commits, path)
+        # A single `git cat-file` for all commits, instead of a round trip to the persistent process per commit
+        out = self._call(['cat-file', '--batch-check=%(objectname) %(objecttype)'],
+                         stdin=''.join('%s:%s\n' % (commit, path) for commit in commits))
+        ids = []
+        for line in out.split('\n')[:len(commits)]:
+            # Missing objects give '<commit>:<path> missing'
+            fields = line.split(' ')
+            ids.append(fields[0] if len(fields) == 2 and fields[1] == 'blob' else None)
+        return ids
+
+    def commit_diff(self, sha):
+        return self._call(['show', '--pretty=format:', sha])
+
+    def diff(self, from_commit, to_commit, path=None):
+        return self._call(['diff', from_commit, to_commit, '--'] + ([path] if path else []))
+
+    def diff_stats(self, commit, base=None):
+        if base:
+            out = self._call(['diff', '--numstat', '--no-renames', '-z', base, commit])
+        else:
+            out = self._call(['log', '-1', '--numstat', '--no-renames', '-z', '--format=', '-m', '--first-parent',
+                              commit])
+        stats = []
+        for record in out.split('\x00'):
+            fields = record.strip('\n').split('\t', 2)
+            if len(fields) == 3:
+                added, removed, path = fields
+                stats.append((None if added == '-' else int(added), None if removed == '-' else int(removed), path))
+        return stats
+
+    def status(self, path):
+        return self._call(['status', path, '--short'], kill_on_error=False)
+
+    def close(self):
+        with self._lock:
+            if self._commit_graph:
+                self._commit_graph.close()
+            self._commit_graph = None
+            if self._object_reader:
+                self._object_reader.close()
+                self._object_reader = None
+            for cat_file in (self._cat_file, self._cat_file_check):
+                if cat_file:
+                    cat_file.close()
+            self._cat_file = None
+            self._cat_file_check = None
@@ -0,0 +1,102 @@
+import threading
+from collections import OrderedDict
+
+from .stats import Stats
+
+
+class _BlobCache(object):
+    """
+    A cache of the contents of blobs by their SHA hash.
+    As blobs never change, the cached contents never go stale, even when HEAD moves.
+    The least recently used blobs are removed first when the total size of the cached blobs exceeds the limit.
+    The cache can be used from multiple threads at once.
+    """
+
+    # The default maximum number of bytes of blobs kept in memory
+    _DEFAULT_SIZE = 64 * 1024 * 1024
+
+    def __init__(self, max_size=_DEFAULT_SIZE):
+        """
+        Constructor for a _BlobCache.
+
+        :type max_size: int
+        :param max_size: The maximum number of bytes of blobs kept in memory
+        """
+        self._max_size = max_size
+        self._blobs = OrderedDict()  # SHA hash -> contents
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        """
+        :rtype: int
+        :return: The number of cached blobs
+        """
+        return len(self._blobs)
+
+    def size(self):
+        """
+        :rtype: int
+        :return: The number of bytes of the cached blobs
+        """
+        return self._size
+
+    def set_max_size(self, max_size):
+        """
+        Set the maximum number of bytes of blobs kept in memory, removing blobs when needed.
+
+        :type max_size: int
+        :param max_size: The maximum number of bytes, 0 disables the cache
+        """
+        with self._lock:
+            self._max_size = max_size
+            self._evict()
+
+    def clear(self):
+        """
+        Remove all the cached blobs.
+        """
+        with self._lock:
+            self._blobs = OrderedDict()
+            self._size = 0
+
+    def get(self, sha):
+        """
+        :type sha: str
+        :param sha: The SHA hash of the blob
+        :rtype: bytes | None
+        :return: The cached contents of the blob, or None when it is not cached
+        """
+        with self._lock:
+            data = self._blobs.pop(sha, None)
+            if data is not None:
+                # Move the entry to the end, so the least recently used entries are removed first
+                self._blobs[sha] = data
+        Stats._count('blobs', hits=data is not None, misses=data is None)
+        return data
+
+    def put(self, sha, data):
+        """
+        Add a blob to the cache. Blobs larger than a quarter of the cache are not cached.
+
+        :type sha: str
+        :param sha: The SHA hash of the blob
+        :type data: bytes
+        :param data: The contents of the blob
+        """
+        if len(data) > self._max_size // 4:
+            return
+        with self._lock:
+            if sha in self._blobs:
+                return
+            self._blobs[sha] = data
+            self._size += len(data)
+            self._evict()
+
+    def _evict(self):
+        """
+        Remove the least recently used blobs until the cache fits its limit, the lock must be held.
+        """
+        while self._size > self._max_size:
+            _, data = self._blobs.popitem(last=False)
+            self._size -= len(data)
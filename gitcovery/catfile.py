@@ -0,0 +1,119 @@
+import os
+import subprocess
+import threading
+
+from .git import Git
+from .stats import Stats
+
+
+class _CatFile(object):
+    """
+    A long-lived `git cat-file --batch` (or `--batch-check`) process.
+    Object queries are written to its stdin and the answers are read back from its stdout,
+    so reading many objects only costs a single process startup.
+    When the process dies, it is transparently restarted on the next query.
+    """
+
+    def __init__(self, root, check_only=False):
+        """
+        Constructor for a _CatFile. The process itself is only started on the first query.
+
+        :type root: str
+        :param root: The root of the repository to run in
+        :type check_only: bool
+        :param check_only: Whether to only query the object info (`--batch-check`)
+        """
+        self.root = root
+        self._check_only = check_only
+        self._process = None
+        self._devnull = None
+        self._lock = threading.Lock()
+
+    def _start(self):
+        """
+        Start the cat-file process, stopping any previous instance.
+        """
+        self._stop()
+        self._devnull = open(os.devnull, 'wb')
+        mode = '--batch-check' if self._check_only else '--batch'
+        self._process = subprocess.Popen(['git', 'cat-file', mode], cwd=self.root, stdin=subprocess.PIPE,
+                                         stdout=subprocess.PIPE, stderr=self._devnull, close_fds=Git._CLOSE_FDS)
+
+    def _stop(self):
+        """
+        Stop the cat-file process when it is running.
+        """
+        if self._process:
+            try:
+                self._process.stdin.close()
+            except (IOError, OSError):
+                pass
+            if self._process.poll() is None:
+                self._process.kill()
+            self._process.wait()
+            self._process.stdout.close()
+            self._process = None
+        if self._devnull:
+            self._devnull.close()
+            self._devnull = None
+
+    def _communicate(self, obj):
+        """
+        Send a single object query to the process and read the answer.
+
+        :type obj: str
+        :param obj: The object to query, this can be anything that `git rev-parse` understands
+        :rtype: (str, str, int, bytes) | None
+        :return: The SHA, type, size and contents (None for batch-check) or None when the object is missing
+        :raise IOError: When the process cannot be reached
+        """
+        if not self._process or self._process.poll() is not None:
+            self._start()
+        self._process.stdin.write(obj.encode('utf-8') + b'\n')
+        self._process.stdin.flush()
+
+        header = self._process.stdout.readline()
+        if not header:
+            raise IOError('git cat-file terminated unexpectedly')
+        fields = header.decode('utf-8').split()
+        if len(fields) != 3 or not fields[2].isdigit():
+            # '<obj> missing' or '<obj> ambiguous', where the object name can contain spaces
+            return None
+
+        sha, typ, size = fields[0], fields[1], int(fields[2])
+        if self._check_only:
+            return sha, typ, size, None
+
+        content = self._process.stdout.read(size + 1)
+        if len(content) != size + 1:
+            raise IOError('git cat-file terminated unexpectedly')
+        return sha, typ, size, content[:-1]
+
+    def query(self, obj):
+        """
+        Query the given object, restarting the process once when it crashed.
+
+        :type obj: str
+        :param obj: The object to query, this can be anything that `git rev-parse` understands
+        :rtype: (str, str, int, bytes) | None
+        :return: The SHA, type, size and contents (None for batch-check) or None when the object is missing
+        """
+        if '\n' in obj:
+            return None
+        start = Stats._start()
+        with self._lock:
+            try:
+                result = self._communicate(obj)
+            except (IOError, OSError):
+                self._start()
+                result = self._communicate(obj)
+        size = result[2] if result and not self._check_only else 0
+        Stats._record('git', 'cat-file --batch-check' if self._check_only else 'cat-file --batch', start, size)
+        return result
+
+    def close(self):
+        """
+        Stop the process, it is restarted when a new query is made.
+        """
+        with self._lock:
+            self._stop()
@@ -1,10 +1,72 @@
+import datetime
 import re
+import threading
 import warnings
-from dateutil import parser as dp
 
+from dateutil import tz
+
+import gitcovery
 from gitcovery import Author
 from .git import Git
+from .repository import Repository
 from .diff import Diff
+from .stats import Stats
+
+
+class _CommitBatch(object):
+    """
+    A group of commits that were returned together, for example by a call to `history()`.
+    When many of these commits are loaded one by one, the rest of the group is loaded in batches instead.
+    The first load is done on its own, after that each load takes a window of the following unloaded commits.
+    This window doubles on every load, until it reaches the maximum set with `Commit.set_batch_window()`.
+    """
+    # Guards the statistics in `Commit._batch_stats`
+    _stats_lock = threading.Lock()
+
+    def __init__(self, commits):
+        """
+        Constructor for a _CommitBatch.
+
+        :type commits: List[Commit]
+        :param commits: The commits in the group, in the order they are expected to be accessed
+        """
+        self._commits = commits
+        self._index = {}
+        self._loads = 0
+        self._lock = threading.Lock()
+        for i, commit in enumerate(commits):
+            self._index.setdefault(commit._id, i)
+
+    def load(self, commit):
+        """
+        Load the given commit together with the window of commits that follow it.
+
+        :type commit: Commit
+        :param commit: The commit that is being loaded
+        :rtype: bool
+        :return: True when the commit was loaded, False when it should be loaded on its own
+        """
+        with self._lock:
+            self._loads += 1
+            loads = self._loads
+        max_window = Commit._batch_window
+        if loads == 1 or max_window <= 1 or commit._id not in self._index:
+            return False
+
+        window = min(max_window, 2 ** loads)
+        batch = []
+        for other in self._commits[self._index[commit._id]:]:
+            if not other.is_loaded():
+                batch.append(other)
+                if len(batch) == window:
+                    break
+
+        Commit.prefetch(batch, workers=1)
+        with self._stats_lock:
+            Commit._batch_stats['batches'] += 1
+            Commit._batch_stats['commits'] += len(batch)
+            Commit._batch_stats['calls_avoided'] += len(batch) - 1
+        return True
 
 
 class Commit(object):
@@ -12,16 +74,22 @@ class Commit(object):
     Class representing a commit.
     A commit stores all the relevant data on a commit like the author,
     the date of the commit, the commit message and the diff.
+
+    The data itself is stored in the `CommitTable` of the repository the commit belongs to,
+    a Commit object is only a lightweight view on a row of this table.
     """
+    __slots__ = ('_id', '_repo')
 
-    _REGEX_COMMIT = re.compile('(?P<sha>([a-f0-9]+)\n)?(?P<parents>([a-f0-9]+\s?)*)\n' +
-                               '(?P<author>.+)\n(?P<authorMail>.+)\n(?P<authorDate>[0-9\-:\s+]+)\n' +
-                               '(?P<commit>.+)\n(?P<commitMail>.+)\n(?P<commitDate>[0-9\-:\s+]+)\n' +
-                               '(?P<title>.*)(?P<message>(.*\n)*?(?=(diff --git)|\Z|([0-9a-f]+\n)))?' +
-                               '(?P<diff>diff (.*\n)*?(?=([a-f0-9]+\n)|\Z))?')
-    _commits = {}  # :type: Dict[str, Commit]
+    # The maximum number of rows added to the on-disk cache at once
+    _STORE_CHUNK_SIZE = 500
+    # Regex matching full SHA hashes, both SHA-1 and SHA-256
+    _REGEX_SHA = re.compile('^[0-9a-f]{40}([0-9a-f]{24})?$')
 
-    def __init__(self, sha, preload=False):
+    # The maximum number of commits loaded at once when loading commits that were returned together
+    _batch_window = 256  # :type: int
+    _batch_stats = {'batches': 0, 'commits': 0, 'calls_avoided': 0}  # :type: Dict[str, int]
+
+    def __init__(self, sha, preload=False, repository=None):
         """
         Construct a Commit instance for a given commit SHA hash.
         By default the other data is only loaded when it is needed.
@@ -31,61 +99,86 @@ class Commit(object):
         :param sha: The SHA has of the commit
         :type preload: bool
         :param preload: Whether to load all the data directly, False by default
+        :type repository: Repository
+        :param repository: The repository of the commit, by default the current repository
         """
-        # The SHA hash of the commit.
-        self.sha = sha         # :type: str
-        self._author = None
-        self._authorDate = ''
-        self._commit = None
-        self._commitDate = ''
-        self._title = ''
-        self._msg = ''
-        self._diff = None
-        self._parents = []
+        self._repo = repository or Repository.current()
+        if not self._REGEX_SHA.match(sha):
+            sha = self._repo.get_backend().rev_parse(sha + '^{commit}')
+        self._id = self._table.intern(sha)
 
         if preload:
             self.load()
 
-    def _set_from_string(self, matcher, load_diff=True):
+    @property
+    def _table(self):
         """
-        Set the contents of this commit with the data from the given matcher.
+        :rtype: CommitTable
+        :return: The table that stores the data of this commit
+        """
+        return self._repo._table
 
-        :type matcher: matcher
-        :param matcher: The used to load
-        :type load_diff: bool
-        :param load_diff: Whether to load the diff from the string
+    @property
+    def sha(self):
         """
+        :rtype: str
+        :return: The SHA hash of the commit.
+        """
+        return self._table.sha(self._id)
 
-        if not matcher:
-            raise Exception(
-                'git show output could not be matched for: %s\n' % self.sha +
-                'Please report the commit hash and repository so I can improve the regex')
+    @staticmethod
+    def _to_datetime(timestamp, offset):
+        """
+        Convert a unix timestamp and timezone offset to a timezone aware datetime.
 
-        try:
-            # Parse parents
-            for sha in matcher.group('parents').split(' '):
-                if sha == '':
-                    continue
-                self._parents.append(self.get_commit(sha))
+        :type timestamp: int
+        :param timestamp: The unix timestamp
+        :type offset: int
+        :param offset: The timezone offset in minutes
+        :rtype: datetime.datetime
+        :return: The datetime in the given timezone
+        """
+        return datetime.datetime.fromtimestamp(timestamp, tz.tzoffset(None, offset * 60))
+
+    def _set_from_row(self, row):
+        """
+        Set the metadata of this commit from a row, as returned by the backend or stored in the on-disk cache.
 
-            # Parse authors
-            self._author = Author.get_author(matcher.group('author'), email=matcher.group('authorMail'))
-            self._commit = Author.get_author(matcher.group('commit'), email=matcher.group('commitMail'))
+        :type row: tuple
+        :param row: The row containing the metadata of the commit
+        """
+        start = Stats._start()
+        (_, parents, author, author_mail, author_time, author_tz,
+         commit, commit_mail, commit_time, commit_tz, title, message) = row
 
-            self._author.register_commit(self)
+        # Parse parents
+        parent_ids = []
+        for sha in parents.split(' '):
+            if sha == '':
+                continue
+            parent_ids.append(self._table.intern(sha))
 
-            self._authorDate = dp.parse(matcher.group('authorDate'))
-            self._commitDate = dp.parse(matcher.group('commitDate'))
+        # Parse authors
+        author = Author._get_author(self._repo, author, email=author_mail)
+        commit = Author._get_author(self._repo, commit, email=commit_mail)
 
-            # Parse the commit contents
-            self._title = matcher.group('title')
-            self._msg = matcher.group('message').strip() if matcher.group('message') else ''
+        self._table.set_row(self._id, parent_ids, author, author_time, author_tz,
+                            commit, commit_time, commit_tz, title, message)
+        author.register_commit(self)
+        Stats._record('parse', 'commit', start)
 
-            # Parse the diff if provided
-            if load_diff:
-                self._diff = Diff(matcher.group('diff'))
-            else:
-                self._diff = None
+    def _set_from_log(self, row, diff):
+        """
+        Set the metadata and optionally the diff of this commit, as returned by `Backend.log_records()`.
+
+        :type row: tuple
+        :param row: The row containing the metadata of the commit
+        :type diff: str | None
+        :param diff: The raw diff of the commit, or None when it was not requested
+        """
+        try:
+            self._set_from_row(row)
+            self._table.set_diff(self._id, Diff(diff) if diff is not None else None)
         except Exception as e:
             raise Exception('Cannot construct commit %s from the given output' % self.sha +
                             'Please report the commit hash and repository so I can fix the problem', e)
@@ -94,38 +187,109 @@ class Commit(object):
         """
         Load only the diff data for this commit.
         """
-        if self._diff:
+        if self._table.get_diff(self._id) is not None:
             return
-        self._diff = Diff(Git.call(['show', '--pretty=format:', self.sha]))
+        with self._repo._commit_locks.hold(self._id):
+            if self._table.get_diff(self._id) is None:
+                self._table.set_diff(self._id, Diff(self._repo.get_backend().commit_diff(self.sha)))
 
     def load(self):
         """
-        Load the data for this commit.
-        This function calls 'git show' and parses the output.
+        Load the metadata for this commit, the diff is loaded when it is first needed.
+        This function requests the commit from the backend, which calls `git log` and parses the output
+        or reads the commit object directly when the object reader is enabled (see `Git.enable_object_reader()`).
+        When this commit was returned together with other commits, for example by `history()`,
+        and many of those are being loaded, the following commits are loaded in the same call.
+        When multiple threads load the same commit at once, only one of them loads it while the others wait.
 
         :rtype: bool
         :return: True when successfully loaded, False when already loaded
         """
         # If already loaded, skip
-        if self._author:
+        if self._table.is_loaded(self._id):
+            Stats._count('commits', hits=1)
             return False
 
-        out = Git.call(['show', '--pretty=format:%P%n%aN%n%aE%n%ai%n%cN%n%cE%n%ci%n%s%n%b', self.sha])
-        self._set_from_string(self._REGEX_COMMIT.search(out))
-        return True
+        with self._repo._commit_locks.hold(self._id):
+            # Another thread might have loaded the commit in the meantime
+            if self._table.is_loaded(self._id):
+                Stats._count('commits', hits=1)
+                return False
+            Stats._count('commits', misses=1)
+
+            batch = self._table.get_batch(self._id)
+            if batch and batch.load(self):
+                return True
+
+            store = self._repo._get_store()
+            if store:
+                rows = store.get([self.sha])
+                if self.sha in rows:
+                    self._set_from_row(rows[self.sha])
+                    return True
+
+            for row, diff in self._repo.get_backend().log_records([self.sha], walk=False):
+                self._set_from_log(row, diff)
+                break
+            else:
+                raise Exception('Commit %s could not be loaded' % self.sha)
+            if store:
+                store.add([row])
+            return True
+
+    def load_async(self):
+        """
+        Load the metadata for this commit from asyncio, see `Commit.load()`.
+        The commits that are loaded concurrently on the same event loop are requested from git at once,
+        and git is run without blocking the event loop (see `Git.call_async()`).
+        This requires Python 3.5 or newer.
+
+        :rtype: Awaitable[bool]
+        :return: True when successfully loaded, False when already loaded
+        """
+        from . import aio
+        return aio.load_commit(self)
 
     def unload(self):
         """
         Unload all the cached data for this commit.
         """
-        self._author = None
-        self._authorDate = ''
-        self._commit = None
-        self._commitDate = ''
-        self._title = ''
-        self._msg = ''
-        self._diff = None
-        self._parents = []
+        self._table.unload(self._id)
+
+    def is_loaded(self):
+        """
+        Check whether the metadata of this commit is loaded.
+
+        :rtype: bool
+        :return: True when loaded, False otherwise
+        """
+        return self._table.is_loaded(self._id)
+
+    def _load_graph(self):
+        """
+        Make sure the parents and commit date of this commit are known.
+        These are read from the commit-graph file when the commit is in there, otherwise the commit is loaded.
+        """
+        if self._table.has_parents(self._id):
+            return
+        if not gitcovery.CommitGraph._load_from_commit_graph(self._repo, self._id):
+            self.load()
+
+    @property
+    def _author(self):
+        """
+        :rtype: Author | None
+        :return: The author of this commit, or None when not loaded
+        """
+        return self._table.author(self._id)
+
+    @property
+    def _diff(self):
+        """
+        :rtype: Diff | None
+        :return: The diff of this commit, or None when not loaded
+        """
+        return self._table.get_diff(self._id)
 
     @property
     def author(self):
@@ -134,7 +298,7 @@ class Commit(object):
         :return: The author of this commit
         """
         self.load()
-        return self._author
+        return self._table.author(self._id)
 
     @property
     def author_date(self):
@@ -143,7 +307,16 @@ class Commit(object):
         :return: The author date
         """
         self.load()
-        return self._authorDate
+        return self._to_datetime(*self._table.author_date(self._id))
+
+    @property
+    def author_timestamp(self):
+        """
+        :rtype: int
+        :return: The author date as a unix timestamp, which is cheaper to compare than `author_date`
+        """
+        self.load()
+        return self._table.author_date(self._id)[0]
 
     @property
     def commit(self):
@@ -152,7 +325,7 @@ class Commit(object):
         :return: The commit author of this commit
         """
         self.load()
-        return self._commit
+        return self._table.committer(self._id)
 
     @property
     def commit_date(self):
@@ -161,7 +334,16 @@ class Commit(object):
         :return: The commit author date
         """
         self.load()
-        return self._commitDate
+        return self._to_datetime(*self._table.commit_date(self._id))
+
+    @property
+    def commit_timestamp(self):
+        """
+        :rtype: int
+        :return: The commit date as a unix timestamp, which is cheaper to compare than `commit_date`
+        """
+        self._load_graph()
+        return self._table.commit_date(self._id)[0]
 
     @property
     def title(self):
@@ -170,7 +352,7 @@ class Commit(object):
         :return: The commit title
         """
         self.load()
-        return self._title
+        return self._table.title(self._id)
 
     @property
     def message(self):
@@ -179,7 +361,7 @@ class Commit(object):
         :return: The commit message
         """
         self.load()
-        return self._msg
+        return self._table.message(self._id)
 
     @property
     def parents(self):
@@ -187,8 +369,8 @@ class Commit(object):
         :rtype: List[Commit]
         :return: A list of the parents of this commit
         """
-        self.load()
-        return self._parents
+        self._load_graph()
+        return [self._from_id(parent, self._repo) for parent in self._table.parents(self._id)]
 
     def changes(self, file_name=None):
         """
@@ -200,8 +382,8 @@ class Commit(object):
         :rtype: _DiffContainer
         :return: The diff of this commit
         """
-        if not self._diff and not self.load():
-            self._load_diff()
+        self.load()
+        self._load_diff()
         if file_name:
             return self._diff.get_file(file_name)
         else:
@@ -219,13 +401,11 @@ class Commit(object):
         if not isinstance(other, Commit):
             raise TypeError
 
-        self.load()
-
-        return self.author_date < other.author_date
+        return self.author_timestamp < other.author_timestamp
 
     def __eq__(self, other):
         """
-        Two Commits are equal when their hashes match.
+        Two Commits are equal when they belong to the same repository and their hashes match.
 
         :type other: object
         :param other: The object to compare with
@@ -233,26 +413,42 @@ class Commit(object):
         :return: True when they are equal, False otherwise
         """
         if isinstance(other, Commit):
-            return self.sha == other.sha
+            return self._repo is other._repo and self._id == other._id
         return False
 
+    def __ne__(self, other):
+        """
+        :type other: object
+        :param other: The object to compare with
+        :rtype: bool
+        :return: True when they are not equal, False otherwise
+        """
+        return not self == other
+
+    def __hash__(self):
+        """
+        :rtype: int
+        :return: The hash of this commit, based on its repository and its id
+        """
+        return hash((id(self._repo), self._id))
+
     def for_each_parent(self, func):
         """
         Execute a function for this commit and all its parents (AKA the tree that this commit is part of).
 
+        The commits are visited in topological order, so a commit is visited before its parents.
+
         :type func: Commit -> None
         :param func: The function to apply for each parent recursively
         """
-        func(self)
-
-        for child in self.parents():
-            child.forEachChild(func)
+        for commit in gitcovery.CommitGraph.walk(self, order='topo'):
+            func(commit)
 
     @classmethod
     def get_commit(cls, sha):
         """
-        Get a commit with the given hash from the cache.
-        When it is not present in the cache, a new commit is created.
+        Get a commit with the given hash from the commit table of the current repository.
+        When it is not present in the table, a new row is created.
 
         :type sha: str
         :param sha: The SHA hash of the commit to get
@@ -262,12 +458,61 @@ class Commit(object):
         """
         if not sha:
             raise Exception('Invalid sha \'%s\'' % sha)
-        if sha in cls._commits:
-            return cls._commits[sha]
-        else:
-            commit = Commit(sha)
-            cls._commits[sha] = commit
-            return commit
+        return Commit(sha)
+
+    @classmethod
+    def _from_id(cls, row, repository):
+        """
+        Get the commit with the given id in the commit table of a repository.
+
+        :type row: int
+        :param row: The id of the commit
+        :type repository: Repository
+        :param repository: The repository of the commit
+        :rtype: Commit
+        :return: The commit
+        """
+        commit = cls.__new__(cls)
+        commit._id = row
+        commit._repo = repository
+        return commit
+
+    @classmethod
+    def _group(cls, commits):
+        """
+        Mark the given commits as being returned together,
+        so they are loaded in batches when they are loaded one by one.
+
+        :type commits: List[Commit]
+        :param commits: The commits, in the order they are expected to be accessed
+        """
+        batch = _CommitBatch(commits)
+        for commit in commits:
+            commit._table.set_batch(commit._id, batch)
+
+    @classmethod
+    def set_batch_window(cls, size):
+        """
+        Set the maximum number of commits that are loaded at once,
+        when loading commits that were returned together (for example by `history()`) one by one.
+        A size of 1 disables loading these commits in batches.
+
+        :type size: int
+        :param size: The maximum number of commits to load at once
+        """
+        cls._batch_window = size
+
+    @classmethod
+    def batch_stats(cls):
+        """
+        Get statistics on the commits that were loaded in batches.
+        This includes the number of batches, the number of commits loaded in those batches
+        and the number of calls to git that were avoided by doing so.
+
+        :rtype: Dict[str, int]
+        :return: The number of 'batches', 'commits' and 'calls_avoided'
+        """
+        return dict(cls._batch_stats)
 
     @classmethod
     def load_all(cls, load_diff=False):
@@ -279,15 +524,119 @@ class Commit(object):
         This is done to reduce the execution time and most notably the memory usage.
         You can specify to load the diffs, but this is not recommended unless you need the diffs for all commits.
 
+        The commits that HEAD and the refs pointed to are remembered,
+        so calling this method again (for example after `Git.update()`) only loads the new commits.
+
         :type load_diff: bool
         :param load_diff: Whether to load the diff data
         """
+        repository = Repository.current()
+        tips = repository._get_tips()
+        loaded_tips = repository._commit_tips
+        old_tips = loaded_tips[True] if load_diff else loaded_tips[False] + loaded_tips[True]
+        revisions = Git._revisions_since(tips, old_tips)
+        if revisions is None:
+            return
+
+        store = repository._get_store()
+        backend = repository.get_backend()
+        if store and not load_diff:
+            # Only the commits that are not in the on-disk cache are requested from git
+            cls.prefetch([cls(sha, repository=repository) for sha in backend.rev_list(revisions)], workers=1)
+            loaded_tips[load_diff] = tips
+            return
+
         if load_diff:
             warnings.warn('Loading all the diff data can take very much memory for large repositories '
                           '(Multiple GBs for > 20000 commits)')
 
-            out = Git.call(['log', '-p', '--pretty=format:%H%n%P%n%aN%n%aE%n%ai%n%cN%n%cE%n%ci%n%s%n%b'])
-        else:
-            out = Git.call(['log', '--pretty=format:%H%n%P%n%aN%n%aE%n%ai%n%cN%n%cE%n%ci%n%s%n%b'])
-        for matcher in cls._REGEX_COMMIT.finditer(out):
-            cls.get_commit(matcher.group('sha').strip())._set_from_string(matcher, load_diff=load_diff)
+        # The commits are streamed, so only a single commit is held in memory at once
+        rows = []
+        for row, diff in backend.log_records(revisions, load_diff=load_diff):
+            cls(row[0], repository=repository)._set_from_log(row, diff)
+            rows.append(row)
+            if store and len(rows) == cls._STORE_CHUNK_SIZE:
+                store.add(rows)
+                rows = []
+        if store:
+            store.add(rows)
+        loaded_tips[load_diff] = tips
+
+    @classmethod
+    def _fetch_rows(cls, repository, shas):
+        """
+        Get the metadata rows of the given commits, without loading the commits themselves.
+        Rows are read from the on-disk cache when enabled, and the missing rows are requested from git.
+
+        :type repository: Repository
+        :param repository: The repository of the commits
+        :type shas: List[str]
+        :param shas: The hashes of the commits
+        :rtype: Dict[str, tuple]
+        :return: The rows by commit hash
+        """
+        store = repository._get_store()
+        rows = store.get(shas) if store else {}
+        missing = [sha for sha in shas if sha not in rows]
+        fetched = [row for row, _ in repository.get_backend().log_records(missing, walk=False)]
+        if store:
+            store.add(fetched)
+        for row in fetched:
+            rows[row[0]] = row
+        return rows
+
+    @classmethod
+    def prefetch(cls, commits, workers=4, load_diff=False):
+        """
+        Load the metadata of the given commits using as few calls to git as possible.
+        The commits are requested in chunks via `git log --no-walk --stdin`,
+        where the chunks are spread over a pool of threads.
+        Use this when you are going to access the data of many commits, for example those in a history,
+        as loading them one by one costs a call to git per commit.
+
+        :type commits: Iterable[Commit]
+        :param commits: The commits to load, commits that are already loaded are skipped
+        :type workers: int
+        :param workers: The number of git calls to run in parallel
+        :type load_diff: bool
+        :param load_diff: Whether to load the diffs as well
+        :rtype: int
+        :return: The number of commits that were loaded
+        """
+        pending = {}
+        for commit in commits:
+            if not commit.is_loaded() or (load_diff and commit._diff is None):
+                pending.setdefault(commit._repo, {})[commit.sha] = commit
+        loaded = 0
+        for repository, commits_by_sha in pending.items():
+            loaded += len(commits_by_sha)
+            cls._prefetch(repository, commits_by_sha, workers, load_diff)
+        return loaded
+
+    @classmethod
+    def _prefetch(cls, repository, pending, workers, load_diff):
+        """
+        Load the metadata of the given commits of a single repository, see `Commit.prefetch()`.
+
+        :type repository: Repository
+        :param repository: The repository of the commits
+        :type pending: Dict[str, Commit]
+        :param pending: The commits to load by their hash
+        :type workers: int
+        :param workers: The number of git calls to run in parallel
+        :type load_diff: bool
+        :param load_diff: Whether to load the diffs as well
+        """
+        store = repository._get_store()
+        if store and not load_diff:
+            for sha, row in store.get(list(pending.keys())).items():
+                pending.pop(sha)._set_from_row(row)
+
+        rows = []
+        for row, diff in repository.get_backend().log_records(list(pending.keys()), walk=False,
+                                                              load_diff=load_diff, workers=workers):
+            if row[0] in pending:
+                pending[row[0]]._set_from_log(row, diff)
+                rows.append(row)
+        if store:
+            store.add(rows)
@@ -0,0 +1,253 @@
+import binascii
+import mmap
+import os
+import struct
+
+
+class _CommitGraphLayer(object):
+    """
+    A single memory-mapped commit-graph file.
+    All lookups read directly from the mapped file, nothing is parsed up front besides the chunk offsets.
+    """
+
+    _SIGNATURE = b'CGPH'
+    # Size of the fixed part of a commit data entry, following the root tree hash
+    _DATA_SIZE = 16
+
+    def __init__(self, path, base):
+        """
+        Constructor for a _CommitGraphLayer.
+
+        :type path: str
+        :param path: The path of the commit-graph file
+        :type base: int
+        :param base: The number of commits in the layers this layer is based on
+        :raise IOError: When the file cannot be read or is not a valid commit-graph file
+        """
+        self.base = base
+        with open(path, 'rb') as f:
+            try:
+                self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except (ValueError, mmap.error):
+                raise IOError('Cannot map commit-graph file %s' % path)
+
+        try:
+            signature, version, hash_version, num_chunks = struct.unpack_from('>4sBBB', self._map, 0)
+            if signature != self._SIGNATURE or version != 1 or hash_version not in (1, 2):
+                raise IOError('Unsupported commit-graph file %s' % path)
+            self.hash_size = 20 if hash_version == 1 else 32
+
+            chunks = {}
+            for i in range(num_chunks):
+                chunk_id, offset = struct.unpack_from('>4sQ', self._map, 8 + 12 * i)
+                chunks[chunk_id] = offset
+            if not all(chunk in chunks for chunk in (b'OIDF', b'OIDL', b'CDAT')):
+                raise IOError('Commit-graph file %s misses required chunks' % path)
+        except struct.error:
+            self.close()
+            raise IOError('Truncated commit-graph file %s' % path)
+        except IOError:
+            self.close()
+            raise
+
+        self._fanout = chunks[b'OIDF']
+        self._oids = chunks[b'OIDL']
+        self._data = chunks[b'CDAT']
+        self._edges = chunks.get(b'EDGE')
+        self.count = struct.unpack_from('>I', self._map, self._fanout + 4 * 255)[0]
+
+    def find(self, key):
+        """
+        Find a commit in this layer using the fanout table and a binary search.
+
+        :type key: bytes
+        :param key: The binary SHA hash of the commit
+        :rtype: int
+        :return: The position of the commit in this layer, or -1 when not present
+        """
+        first = ord(key[0:1])
+        low = struct.unpack_from('>I', self._map, self._fanout + 4 * (first - 1))[0] if first else 0
+        high = struct.unpack_from('>I', self._map, self._fanout + 4 * first)[0]
+        while low < high:
+            middle = (low + high) // 2
+            start = self._oids + middle * self.hash_size
+            oid = self._map[start:start + self.hash_size]
+            if oid < key:
+                low = middle + 1
+            elif oid > key:
+                high = middle
+            else:
+                return middle
+        return -1
+
+    def sha(self, position):
+        """
+        :type position: int
+        :param position: The position of the commit in this layer
+        :rtype: bytes
+        :return: The binary SHA hash of the commit
+        """
+        start = self._oids + position * self.hash_size
+        return self._map[start:start + self.hash_size]
+
+    def commit(self, position):
+        """
+        Read the data of a commit.
+
+        :type position: int
+        :param position: The position of the commit in this layer
+        :rtype: (List[int], int, int)
+        :return: The global positions of the parents, the commit date as unix timestamp
+                 and the generation number (0 when not computed by git)
+        """
+        start = self._data + position * (self.hash_size + self._DATA_SIZE) + self.hash_size
+        parent1, parent2, high, low = struct.unpack_from('>IIII', self._map, start)
+        parents = []
+        if parent1 != _CommitGraph._NO_PARENT:
+            parents.append(parent1)
+        if parent2 != _CommitGraph._NO_PARENT:
+            if parent2 & _CommitGraph._EXTRA_EDGES:
+                # Octopus merge, the other parents are stored in the extra edge list
+                index = parent2 & ~_CommitGraph._EXTRA_EDGES
+                while True:
+                    edge = struct.unpack_from('>I', self._map, self._edges + 4 * index)[0]
+                    parents.append(edge & ~_CommitGraph._LAST_EDGE)
+                    if edge & _CommitGraph._LAST_EDGE:
+                        break
+                    index += 1
+            else:
+                parents.append(parent2)
+        # The upper 30 bits hold the generation number, the remaining 34 bits the commit date
+        return parents, ((high & 3) << 32) | low, high >> 2
+
+    def close(self):
+        """
+        Unmap the file.
+        """
+        self._map.close()
+
+
+class _CommitGraph(object):
+    """
+    Reader for the commit-graph files git writes with `git commit-graph write`,
+    either a single `objects/info/commit-graph` file or a chain of layers in `objects/info/commit-graphs`.
+    These files store the parents, commit date and generation number of every commit in them,
+    so the commit graph can be traversed without calling git.
+    Positions are global over the chain, the positions of a layer follow those of the layers it is based on.
+    """
+
+    _NO_PARENT = 0x70000000
+    _EXTRA_EDGES = 0x80000000
+    _LAST_EDGE = 0x80000000
+
+    def __init__(self, paths):
+        """
+        Constructor for a _CommitGraph.
+
+        :type paths: List[str]
+        :param paths: The paths of the layers, starting with the base layer
+        :raise IOError: When one of the files is not a valid commit-graph file
+        """
+        self._layers = []
+        base = 0
+        try:
+            for path in paths:
+                layer = _CommitGraphLayer(path, base)
+                self._layers.append(layer)
+                base += layer.count
+        except IOError:
+            self.close()
+            raise
+        self.hash_size = self._layers[0].hash_size if self._layers else 20
+
+    @classmethod
+    def open(cls, info_dir):
+        """
+        Open the commit-graph of a repository.
+
+        :type info_dir: str
+        :param info_dir: The `objects/info` folder of the repository
+        :rtype: _CommitGraph | None
+        :return: The commit-graph, or None when the repository has no (valid) commit-graph
+        """
+        single = os.path.join(info_dir, 'commit-graph')
+        chain = os.path.join(info_dir, 'commit-graphs', 'commit-graph-chain')
+        if os.path.isfile(single):
+            paths = [single]
+        elif os.path.isfile(chain):
+            with open(chain) as f:
+                paths = [os.path.join(info_dir, 'commit-graphs', 'graph-%s.graph' % line.strip())
+                         for line in f if line.strip()]
+        else:
+            return None
+
+        try:
+            return cls(paths)
+        except (IOError, OSError):
+            return None
+
+    def __len__(self):
+        """
+        :rtype: int
+        :return: The number of commits in the commit-graph
+        """
+        return sum(layer.count for layer in self._layers)
+
+    def _layer(self, position):
+        """
+        :type position: int
+        :param position: The global position of a commit
+        :rtype: _CommitGraphLayer
+        :return: The layer that contains the commit
+        """
+        for layer in self._layers:
+            if position < layer.base + layer.count:
+                return layer
+        raise IndexError('Position %d is not in the commit-graph' % position)
+
+    def find(self, sha):
+        """
+        :type sha: str
+        :param sha: The SHA hash of the commit
+        :rtype: int
+        :return: The global position of the commit, or -1 when it is not in the commit-graph
+        """
+        if len(sha) != 2 * self.hash_size:
+            return -1
+        key = binascii.unhexlify(sha)
+        for layer in self._layers:
+            position = layer.find(key)
+            if position >= 0:
+                return layer.base + position
+        return -1
+
+    def sha(self, position):
+        """
+        :type position: int
+        :param position: The global position of the commit
+        :rtype: str
+        :return: The SHA hash of the commit
+        """
+        layer = self._layer(position)
+        return binascii.hexlify(layer.sha(position - layer.base)).decode('ascii')
+
+    def commit(self, position):
+        """
+        Read the data of a commit.
+
+        :type position: int
+        :param position: The global position of the commit
+        :rtype: (List[int], int, int)
+        :return: The global positions of the parents, the commit date as unix timestamp
+                 and the generation number (0 when not computed by git)
+        """
+        layer = self._layer(position)
+        return layer.commit(position - layer.base)
+
+    def close(self):
+        """
+        Unmap all the files.
+        """
+        for layer in self._layers:
+            layer.close()
+        self._layers = []
@@ -1,5 +1,7 @@
 import re
 
+from .stats import Stats
+
 
 class _Diffable(object):
     """
@@ -169,10 +171,12 @@ class Diff(_DiffContainer):
         self.data = {}  # :type: Dict[str, FileDiff]
         if not diffstr:     # Empty diff, do not parse
             return
+        start = Stats._start()
         match_iter = self._REGEX_DIFF.finditer(diffstr)
         for matcher in match_iter:
             diff = FileDiff(matcher.group('fname'), matcher.group('diff'))
             self.add(diff)
+        Stats._record('parse', 'diff', start, len(diffstr))
 
     def add(self, file_diff):
         """
@@ -196,3 +200,55 @@ class Diff(_DiffContainer):
         :return: The FileDiff for the given file
         """
         return self.data[fname]
+
+
+class TreeDiff(_Diffable):
+    """
+    The changes between two snapshots of the repository, see `Git.compare()`.
+    The number of added and removed lines is only available when requested using `numstat=True`.
+    """
+
+    def __init__(self, added, removed, modified, renamed, stats=None):
+        """
+        Constructor for a TreeDiff.
+
+        :type added: List[str]
+        :param added: The paths of the added files
+        :type removed: List[str]
+        :param removed: The paths of the removed files
+        :type modified: List[str]
+        :param modified: The paths of the modified files
+        :type renamed: List[(str, str)]
+        :param renamed: The old and new path of the renamed files
+        :type stats: Dict[str, (int | None, int | None)] | None
+        :param stats: Optional number of added and removed lines per changed file
+        """
+        # The paths of the files that were added
+        self.added = added  # :type: List[str]
+        # The paths of the files that were removed
+        self.removed = removed  # :type: List[str]
+        # The paths of the files whose contents changed
+        self.modified = modified  # :type: List[str]
+        # The old and new paths of the files that were renamed without changing their contents
+        self.renamed = renamed  # :type: List[(str, str)]
+        # The added and removed lines (None for binary files) by the path of each changed file, or None
+        self.stats = stats  # :type: Dict[str, (int | None, int | None)] | None
+
+    def _stats(self):
+        """
+        :rtype: Dict[str, (int | None, int | None)]
+        :return: The added and removed lines by path
+        :raise: Exception, when the line counts were not requested
+        """
+        if self.stats is None:
+            raise Exception('The number of lines is only counted when comparing with numstat=True')
+        return self.stats
+
+    def __len__(self):
+        return self.num_added() + self.num_removed()
+
+    def num_added(self):
+        return sum(added or 0 for added, _ in self._stats().values())
+
+    def num_removed(self):
+        return sum(removed or 0 for _, removed in self._stats().values())
@@ -1,8 +1,29 @@
+import codecs
 import os
-import re
 import subprocess
+import tempfile
+import warnings
 
 import gitcovery
+from .stats import Stats
+
+
+class _CurrentRoot(object):
+    """
+    The deprecated `Git.root` attribute, which forwards to the root of the current repository.
+    """
+
+    def __get__(self, instance, owner):
+        """
+        :type instance: Git | None
+        :param instance: The instance the attribute is read from, None when read from the class
+        :type owner: type
+        :param owner: The class the attribute is read from
+        :rtype: GitFolder | None
+        :return: The root of the current repository, None when the root is not set
+        """
+        warnings.warn('Git.root is deprecated, use Git.get_root() instead', DeprecationWarning, stacklevel=2)
+        return gitcovery.Repository.current().root
 
 
 class Git(object):
@@ -12,20 +33,23 @@ class Git(object):
     It exposes a number of static methods that allow you to select or clone
     the repository, do a checkout on a specific branch or make direct calls to Git.
 
-    In addition to this, the Git class also contains a cache of all the commits
-    and the tags in the repository and a reference to HEAD and the initial commit.
+    The repository itself, with its caches of the commits and the tags and a reference to HEAD and the initial commit,
+    is a `Repository`. The static methods apply to the current repository (see `Repository.current()`),
+    so multiple repositories can be analysed at once by activating a different repository in every thread.
+
+    All requests for repository data go through a `Backend`, by default a `GitBackend` for the root.
+    A different backend can be set using `Git.set_backend()`, for example a `MemoryBackend`.
     """
     _decode_error_policy = 'strict'  # :type: str
     _char_encoding = 'utf-8'         # :type: str
+    # The root of the current repository, `None` when the root is not set. Deprecated, use `Git.get_root()` instead.
+    root = _CurrentRoot()  # :type: GitFolder
 
-    _tags = None          # :type: Dict[str, Commit] | None
-    _initialCommits = []  # :type: List[Commit]
-    _head = None          # :type: Commit
-    # The root of the repository, `None` when the root is not set.
-    root = None  # :type: GitFolder
-
-    # Regex for matching tags and their commit hashes
-    _REGEX_TAGS = re.compile('(?P<commit>[0-9a-z]+) refs/tags/(?P<tag>.*)')
+    # The number of bytes read at once when streaming output
+    _STREAM_CHUNK_SIZE = 65536
+    # Python 2 lets git inherit the pipes of other git processes that are started by other threads,
+    # which keeps those processes from seeing the end of their input. Windows cannot close them with pipes.
+    _CLOSE_FDS = os.name == 'posix'
 
     @classmethod
     def _verify_root(cls):
@@ -35,8 +59,20 @@ class Git(object):
 
         :raise: Exception, when the root is not set
         """
-        if not cls.root:
-            raise Exception('Please set the git root first')
+        gitcovery.Repository.current()._verify_root()
+
+    @classmethod
+    def get_root(cls):
+        """
+        Get the root of the current repository.
+
+        :rtype: GitFolder
+        :return: A reference to the root
+        :raise: Exception, when the root is not set
+        """
+        repository = gitcovery.Repository.current()
+        repository._verify_root()
+        return repository.root
 
     @classmethod
     def clone(cls, loc, address, update=False):
@@ -58,16 +94,7 @@ class Git(object):
         :rtype: GitFolder
         :return: A reference to the root
         """
-        name = re.search('/(?P<name>[^/]+)\.git$', address).group('name')
-        loc = loc[0:-1] if loc.endswith('/') else loc
-        if not os.path.exists(loc):
-            os.mkdir(loc)
-        path = loc + os.sep + name
-        if not os.path.isdir(path):
-            cls.call(['clone', address], root=loc)
-        elif update:
-            cls.update()
-        return cls.set_root(path)
+        return gitcovery.Repository.current().clone(loc, address, update=update)
 
     @classmethod
     def checkout(cls, name):
@@ -83,9 +110,7 @@ class Git(object):
         :rtype: GitFolder
         :return: A reference to the root
         """
-        cls._verify_root()
-        cls.call(['checkout', name])
-        return cls.set_root(cls.root.path)
+        return gitcovery.Repository.current().checkout(name)
 
     @classmethod
     def update(cls):
@@ -98,13 +123,7 @@ class Git(object):
         :rtype: GitFolder
         :return: The root of the repository
         """
-        cls._verify_root()
-
-        cls.call(['fetch', '--all'])
-        cls.call(['pull'])
-
-        # Update the root as its contents might have changed
-        return cls.set_root(cls.root.path)
+        return gitcovery.Repository.current().update()
 
     @classmethod
     def set_root(cls, root):
@@ -119,20 +138,7 @@ class Git(object):
         :rtype: GitFolder
         :return: A reference to the root
         """
-        if root == '':
-            # Converting this to a . is easy, but it might not be what the user wants.
-            # Therefore the error is thrown containing a possible solution.
-            raise Exception('Using the current directory is only supported by setting the root to \'.\'')
-        folder = gitcovery.GitFolder(root)
-        cls.root = folder
-
-        # Check if the root is a git repository
-        try:
-            folder.status()
-        except IOError:
-            raise Exception('%s is not a Git repository' % root)
-
-        return folder
+        return gitcovery.Repository.current().set_root(root)
 
     @classmethod
     def set_decode_settings(cls, char_encoding=None, decode_error_policy=None):
@@ -166,10 +172,11 @@ class Git(object):
         return cls._char_encoding, cls._decode_error_policy
 
     @classmethod
-    def call(cls, cmds, root=None, kill_on_error=True):
+    def call(cls, cmds, root=None, kill_on_error=True, stdin=None):
         """
         Call the git subsystem via the command line and return the output.
         Kills the process when the call fails (unless specified otherwise).
+        This can be called from multiple threads at once, every call starts its own git process.
         You are not encouraged to use this call directly, when you have a valid reason to do so
         you might want to consider to request a feature on GitHub.
 
@@ -181,25 +188,453 @@ class Git(object):
             When not specified the root of the repository is used.
         :type kill_on_error: bool
         :param kill_on_error: Indicates whether an error should kill the process (True by default)
+        :type stdin: str
+        :param stdin: Optional input to write to the standard input of the command
         :rtype: str
         :return: The output of running the command
         :raise IOError: When the command fails and kill_on_error==False
         """
+        start = Stats._start()
         try:
             if not root:
-                cls._verify_root()
-                root = cls.root.path
-            return subprocess.check_output(['git'] + cmds, stderr=subprocess.STDOUT, cwd=root).decode(cls._char_encoding, errors=cls._decode_error_policy)
+                root = cls.get_root().path
+            if stdin is None:
+                out = subprocess.check_output(['git'] + cmds, stderr=subprocess.STDOUT, cwd=root,
+                                              close_fds=cls._CLOSE_FDS)
+                Stats._record('git', cmds[0], start, len(out))
+                return cls._decode(out)
+
+            process = subprocess.Popen(['git'] + cmds, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                       stderr=subprocess.STDOUT, cwd=root, close_fds=cls._CLOSE_FDS)
+            out = process.communicate(stdin.encode(cls._char_encoding))[0]
+            if process.returncode != 0:
+                raise subprocess.CalledProcessError(process.returncode, ['git'] + cmds, output=out)
+            Stats._record('git', cmds[0], start, len(out))
+            return cls._decode(out)
         except subprocess.CalledProcessError as e:
             if kill_on_error:
                 print(e.cmd, e.output.decode())
                 exit(-1)
             else:
                 raise IOError(e)
+
+    @classmethod
+    def call_stream(cls, cmds, separator='\n', root=None, kill_on_error=True, stdin=None):
+        """
+        Call the git subsystem via the command line and yield the output incrementally.
+        The output is split into records on the given separator, which are yielded as soon as git produces them.
+        This keeps the memory usage bounded by the size of a single record instead of the size of the whole output.
+        When the iteration is stopped early, the git process is killed.
+
+        :type cmds: List[str]
+        :param cmds: A list of arguments to pass to the command line.
+            Note that 'git' is always prepended
+        :type separator: str
+        :param separator: The string that separates the records in the output
+        :type root: str
+        :param root: When set uses a different working directory to run the command.
+            When not specified the root of the repository is used.
+        :type kill_on_error: bool
+        :param kill_on_error: Indicates whether an error should kill the process (True by default)
+        :type stdin: str
+        :param stdin: Optional input to write to the standard input of the command before reading its output
+        :rtype: Iterator[str]
+        :return: The records in the output of the command
+        :raise IOError: When the command fails and kill_on_error==False
+        """
+        if not root:
+            root = cls.get_root().path
+        start = Stats._start()
+        size = 0
+        decoder = codecs.getincrementaldecoder(cls._char_encoding)(errors=cls._decode_error_policy)
+        stderr = tempfile.TemporaryFile()
+        process = subprocess.Popen(['git'] + cmds, stdin=subprocess.PIPE if stdin is not None else None,
+                                   stdout=subprocess.PIPE, stderr=stderr, cwd=root, close_fds=cls._CLOSE_FDS)
+        try:
+            if stdin is not None:
+                try:
+                    process.stdin.write(stdin.encode(cls._char_encoding))
+                    process.stdin.close()
+                except (IOError, OSError):
+                    # The process stopped early, the error is reported using its return code
+                    pass
+
+            pending = []
+            while True:
+                chunk = os.read(process.stdout.fileno(), cls._STREAM_CHUNK_SIZE)
+                size += len(chunk)
+                text = cls._decode(chunk, decoder=decoder, final=not chunk)
+                if separator in text:
+                    records = text.split(separator)
+                    pending.append(records[0])
+                    yield ''.join(pending)
+                    for record in records[1:-1]:
+                        yield record
+                    pending = [records[-1]]
+                elif text:
+                    pending.append(text)
+                if not chunk:
+                    break
+            rest = ''.join(pending)
+            if rest:
+                yield rest
+        finally:
+            if process.poll() is None:
+                process.kill()
+            process.wait()
+            process.stdout.close()
+            Stats._record('git', cmds[0], start, size)
+            stderr.seek(0)
+            error = stderr.read()
+            stderr.close()
+
+        if process.returncode != 0:
+            if kill_on_error:
+                print(['git'] + cmds, error.decode())
+                exit(-1)
+            else:
+                raise IOError(error.decode())
+
+    @classmethod
+    def call_async(cls, cmds, root=None, stdin=None):
+        """
+        Call the git subsystem via the command line from asyncio and return the output.
+        The process is started using `asyncio.create_subprocess_exec`, so waiting for it does not block the event loop.
+        The number of processes that run at once on an event loop is limited, see `Git.set_async_limit()`.
+        This requires Python 3.5 or newer.
+
+        :type cmds: List[str]
+        :param cmds: A list of arguments to pass to the command line.
+            Note that 'git' is always prepended
+        :type root: str
+        :param root: When set uses a different working directory to run the command.
+            When not specified the root of the repository is used.
+        :type stdin: str
+        :param stdin: Optional input to write to the standard input of the command
+        :rtype: Awaitable[str]
+        :return: The output of running the command
+        :raise IOError: When the command fails
+        """
+        from . import aio
+        return aio.call(cmds, root or cls.get_root().path, stdin=stdin)
+
+    @classmethod
+    def set_async_limit(cls, limit):
+        """
+        Set the maximum number of git processes that run at once on an event loop for the asynchronous calls.
+        By default 8 processes run at once.
+
+        :type limit: int
+        :param limit: The maximum number of processes
+        """
+        from . import aio
+        aio.set_limit(limit)
+
+    @classmethod
+    def stats(cls):
+        """
+        Get a snapshot of the instrumentation, which is collected after enabling it using `Stats.enable()`.
+        The snapshot contains the categories 'git' (the git subcommands, including the cat-file queries),
+        'parse' (the parsers of the output) and 'cache' (the caches of the repositories and files).
+        For every git subcommand and parser it contains the number of 'calls', the total wall 'time' in seconds,
+        the number of 'bytes' read and a 'histogram' of (upper bound in seconds, number of calls) pairs,
+        where the upper bound of the last bucket is None. For every cache it contains the 'hits' and 'misses'.
+
+        :rtype: Dict[str, Dict[str, dict]]
+        :return: The instrumentation by category and name
+        """
+        return Stats.snapshot()
+
+    @classmethod
+    def _decode(cls, raw, decoder=None, final=False):
+        """
+        Decode raw git output using the current decode settings.
+
+        :type raw: bytes
+        :param raw: The raw output to decode
+        :type decoder: codecs.IncrementalDecoder
+        :param decoder: Optional incremental decoder to use, for output that is decoded in chunks
+        :type final: bool
+        :param final: Whether this is the last chunk for the incremental decoder
+        :rtype: str
+        :return: The decoded output
+        """
+        try:
+            if decoder:
+                return decoder.decode(raw, final)
+            return raw.decode(cls._char_encoding, errors=cls._decode_error_policy)
         except UnicodeDecodeError as e:
             e.reason += '\nTry changing the default decoding policy using \'Git.set_decode_settings()\''
             raise e
 
+    @classmethod
+    def set_backend(cls, backend):
+        """
+        Set the backend that is used to access the repository.
+        This closes the previous backend and clears the cached tags, HEAD and initial commits.
+        Setting the root (see `Git.set_root()`) sets a `GitBackend` for that root.
+        Note that the commits and authors that were loaded from the previous backend are kept,
+        but `Commit.load_all()` and `Author.list()` load all commits of the new backend again.
+        To analyse another repository next to the current one, create a separate `Repository` instead.
+
+        :type backend: Backend
+        :param backend: The backend to use
+        """
+        gitcovery.Repository.current().set_backend(backend)
+
+    @classmethod
+    def get_backend(cls):
+        """
+        Get the backend that is used to access the repository.
+
+        :rtype: Backend
+        :return: The current backend
+        :raise: Exception, when no backend is set
+        """
+        return gitcovery.Repository.current().get_backend()
+
+    @classmethod
+    def enable_object_reader(cls):
+        """
+        Read git objects in-process instead of through `git cat-file`.
+        Loose objects and packfiles are read directly from the object database of the repository,
+        which avoids starting processes and copying all the data through pipes.
+        This is used when reading files, trees and commits.
+        """
+        gitcovery.Repository.current().enable_object_reader()
+
+    @classmethod
+    def disable_object_reader(cls):
+        """
+        Read git objects through `git cat-file` again.
+        """
+        gitcovery.Repository.current().disable_object_reader()
+
+    @classmethod
+    def read_object(cls, obj):
+        """
+        Read the raw contents of a git object.
+        All reads share a single long-running `git cat-file --batch` process,
+        which is a lot faster than calling `git show` for every object.
+        When the object reader is enabled, objects are read in-process instead (see `Git.enable_object_reader()`).
+
+        :type obj: str
+        :param obj: The object to read, for example a SHA hash or `<commit>:<path>`
+        :rtype: (str, bytes)
+        :return: The type of the object and its raw contents
+        :raise IOError: When the object does not exist
+        """
+        return gitcovery.Repository.current().read_object(obj)
+
+    @classmethod
+    def cat_file(cls, obj):
+        """
+        Get the decoded contents of a git object.
+        This is mostly useful for reading blobs, like the contents of a file at a specific commit.
+
+        :type obj: str
+        :param obj: The object to read, for example a SHA hash or `<commit>:<path>`
+        :rtype: str
+        :return: The contents of the object
+        :raise IOError: When the object does not exist
+        """
+        return gitcovery.Repository.current().cat_file(obj)
+
+    @classmethod
+    def object_info(cls, obj):
+        """
+        Get the SHA hash, type and size of a git object without reading its contents.
+
+        :type obj: str
+        :param obj: The object to query, for example a SHA hash or `<commit>:<path>`
+        :rtype: (str, str, int)
+        :return: The SHA hash, type and size of the object
+        :raise IOError: When the object does not exist
+        """
+        return gitcovery.Repository.current().object_info(obj)
+
+    @classmethod
+    def read_tree(cls, obj):
+        """
+        Get the entries of a tree object.
+
+        :type obj: str
+        :param obj: The tree to read, for example a tree hash or `<commit>:<path>`
+        :rtype: List[(str, str, str)]
+        :return: The mode, SHA hash and name of each entry
+        :raise IOError: When the object does not exist or is not a tree
+        """
+        return gitcovery.Repository.current().read_tree(obj)
+
+    @classmethod
+    def tree_at(cls, commit):
+        """
+        Get a read-only snapshot of the files in the repository at a commit, without checking it out.
+        The snapshot has the same interface as the root folder (see `Git.set_root()`),
+        but its folders are read from the tree objects of the commit and its files from their blobs,
+        so the working tree is never touched and snapshots at many commits can be analysed at once.
+        The history of the files in a snapshot is their history up to the commit of the snapshot.
+        Snapshots share what they read for the folders and files they have in common, with the metrics computed
+        for them, see `TreeFolder`.
+
+        :type commit: Commit | str
+        :param commit: The commit, or any revision that resolves to a commit, like a tag name
+        :rtype: TreeFolder
+        :return: The root folder of the snapshot
+        :raise IOError: When the revision does not resolve to a commit
+        """
+        return gitcovery.Repository.current().tree_at(commit)
+
+    @classmethod
+    def compare(cls, from_commit, to_commit, numstat=False):
+        """
+        Compare the snapshots of the repository at two commits, for example two releases.
+        The trees of both commits are walked together, and every folder with the same tree hash in both is skipped,
+        so comparing two commits takes time proportional to what changed between them.
+        Files that were moved without changing their contents are reported as renamed,
+        other renames are reported as a removed and an added file. Changes of only the file mode are not reported.
+
+        :type from_commit: Commit | str
+        :param from_commit: The old commit, or any revision that resolves to a commit
+        :type to_commit: Commit | str
+        :param to_commit: The new commit, or any revision that resolves to a commit
+        :type numstat: bool
+        :param numstat: Whether to also count the added and removed lines of every changed file, using `git diff`
+        :rtype: TreeDiff
+        :return: The changes between the commits
+        :raise IOError: When a revision does not resolve to a commit
+        """
+        return gitcovery.Repository.current().compare(from_commit, to_commit, numstat=numstat)
+
+    @classmethod
+    def lease_worktree(cls, commit):
+        """
+        Lease a separate checkout of a commit, for the duration of a with statement:
+        `with Git.lease_worktree(<tag>) as root: <run a linter in root.path>`.
+        Unlike `Git.checkout()`, this does not change the working tree of the repository,
+        so many commits can be analysed at once, for example from a thread pool.
+        The checkouts are detached `git worktree`s in `.git/gitcovery/worktrees`,
+        that are reused for later leases by only updating the files that changed.
+        Any local changes and untracked files in a worktree are removed when it is leased again.
+        When all the worktrees are leased (see `Git.set_worktree_limit()`), this waits until one is released.
+        The worktrees are removed when exiting the interpreter, or using `Git.remove_worktrees()`.
+
+        The root that is given is a folder of a separate repository for the worktree,
+        so the history of its files is their history up to the leased commit.
+
+        :type commit: Commit | str
+        :param commit: The commit, or any revision that resolves to a commit, like a tag name
+        :rtype: ContextManager[GitFolder]
+        :return: A context manager that gives the root of the worktree
+        :raise IOError: When the revision does not resolve to a commit or cannot be checked out
+        """
+        return gitcovery.Repository.current().lease_worktree(commit)
+
+    @classmethod
+    def set_worktree_limit(cls, limit):
+        """
+        Set the maximum number of worktrees that can be leased at once, by default the number of processors.
+
+        :type limit: int
+        :param limit: The maximum number of worktrees
+        """
+        gitcovery.Repository.current().set_worktree_limit(limit)
+
+    @classmethod
+    def remove_worktrees(cls):
+        """
+        Remove the worktrees that are not leased, including their folders.
+        """
+        gitcovery.Repository.current().remove_worktrees()
+
+    @classmethod
+    def set_blob_cache_size(cls, size):
+        """
+        Set the maximum size of the cache of file contents.
+        The contents of files at many commits (see `GitFile.at_many()`) and of the files in snapshots
+        (see `Git.tree_at()`) are cached by their blob hash, so contents shared by many commits are only read once.
+        When the cache is full, the least recently used contents are removed first. The default size is 64 MiB.
+
+        :type size: int
+        :param size: The maximum number of bytes, 0 disables the cache
+        """
+        gitcovery.Repository.current().set_blob_cache_size(size)
+
+    @classmethod
+    def enable_store(cls, path=None):
+        """
+        Enable the on-disk cache of commit metadata.
+        When enabled, the metadata of commits is read from this cache before calling git,
+        and commits that are loaded from git are added to it.
+        By default the cache is stored in `.git/gitcovery/commits.sqlite`, so it is shared by all users of the repository.
+
+        :type path: str
+        :param path: Optional path of the cache file, this path is used for all repositories
+        """
+        gitcovery.Repository.current().enable_store(path)
+
+    @classmethod
+    def disable_store(cls):
+        """
+        Disable the on-disk cache of commit metadata. The cache file itself is not removed.
+        """
+        gitcovery.Repository.current().disable_store()
+
+    @classmethod
+    def enable_path_index(cls):
+        """
+        Enable the index of the commits that changed every path.
+        Without the index, every call to `history()` walks the whole history of the repository using `git log <path>`.
+        The index is built from a single `git log` when a history is first requested,
+        after which the history of every file and folder is looked up without calling git.
+        When HEAD moves (see `Git.update()`), only the new commits are added to the index.
+        Note that unlike `git log <path>`, the index does not hide the commits on a side branch
+        whose changes to the path were discarded when the branch was merged.
+        """
+        gitcovery.Repository.current().enable_path_index()
+
+    @classmethod
+    def disable_path_index(cls):
+        """
+        Disable the index of the commits that changed every path and free its memory.
+        """
+        gitcovery.Repository.current().disable_path_index()
+
+    @classmethod
+    def _get_store(cls):
+        """
+        Get the on-disk cache of commit metadata, opening it when needed.
+
+        :rtype: _CommitStore | None
+        :return: The cache, or None when it is not enabled
+        """
+        return gitcovery.Repository.current()._get_store()
+
+    @classmethod
+    def write_commit_graph(cls, force=False):
+        """
+        Let git write a commit-graph file for all reachable commits, using `git commit-graph write`.
+        This file stores the parents and dates of all commits, so the history can be traversed without calling git.
+        By default the file is only written when the repository has no commit-graph yet.
+
+        :type force: bool
+        :param force: Whether to rewrite an existing commit-graph, for example to include new commits
+        :rtype: bool
+        :return: True when the commit-graph was written, False otherwise
+        :raise IOError: When git fails to write the commit-graph
+        """
+        return gitcovery.Repository.current().write_commit_graph(force=force)
+
+    @classmethod
+    def close(cls):
+        """
+        Stop the background git processes used for reading objects and close all opened files,
+        like the on-disk cache, the commit-graph and the packfiles.
+        These are reopened automatically when needed,
+        and are also closed when changing the root or exiting the interpreter.
+        """
+        gitcovery.Repository.current().close()
+
     @classmethod
     def get_tags(cls):
         """
@@ -209,13 +644,7 @@ class Git(object):
         :rtype: List[str]
         :return: A list of all tags, without ordering.
         """
-        if cls._tags is None:
-            cls._tags = {}
-            out = cls.call(['show-ref', '--tags'], kill_on_error=False)  # A repo without tags gives an error
-            matcher = cls._REGEX_TAGS.finditer(out)
-            for match in matcher:
-                cls._tags[match.group('tag')] = gitcovery.Commit.get_commit(match.group('commit'))
-        return list(cls._tags.keys())
+        return gitcovery.Repository.current().get_tags()
 
     @classmethod
     def get_tags_by_commit(cls):
@@ -226,9 +655,7 @@ class Git(object):
         :rtype: (List[(Commit, str)])
         :return: A list of all tags and commits.
         """
-        if cls._tags is None:
-            cls.get_tags()
-        return list(map(lambda tag: (cls._tags[tag], tag), cls._tags.keys()))
+        return gitcovery.Repository.current().get_tags_by_commit()
 
     @classmethod
     def get_tag(cls, tag):
@@ -240,9 +667,7 @@ class Git(object):
         :rtype: Commit
         :return: The commit associated with the tag
         """
-        if cls._tags is None:
-            cls.get_tags()
-        return cls._tags[tag]
+        return gitcovery.Repository.current().get_tag(tag)
 
     @classmethod
     def get_initial_commits(cls):
@@ -253,10 +678,36 @@ class Git(object):
         :rtype: List[Commit]
         :return: A list of initial commits
         """
-        if not cls._initialCommits:
-            out = cls.call(['rev-list', '--max-parents=0', 'HEAD'])
-            cls._initialCommits = map(lambda x: gitcovery.Commit.get_commit(x), out.split('\n')[0:-1])
-        return cls._initialCommits
+        return gitcovery.Repository.current().get_initial_commits()
+
+    @classmethod
+    def _get_tips(cls):
+        """
+        Get the commits that HEAD and all the refs in the repository point to.
+        All commits in the repository (except unreachable ones) are ancestors of these tips.
+
+        :rtype: List[str]
+        :return: The sorted hashes of the tips, without duplicates
+        """
+        return gitcovery.Repository.current()._get_tips()
+
+    @classmethod
+    def _revisions_since(cls, tips, old_tips):
+        """
+        Get the revisions that select the commits reachable from the tips,
+        excluding those that were already reachable from the old tips.
+
+        :type tips: List[str]
+        :param tips: The current tips
+        :type old_tips: List[str]
+        :param old_tips: The tips that were processed before
+        :rtype: List[str] | None
+        :return: The revisions, or None when there are no new tips
+        """
+        old_tips = set(old_tips)
+        if all(tip in old_tips for tip in tips):
+            return None
+        return tips + ['^' + tip for tip in sorted(old_tips)]
 
     @classmethod
     def get_head(cls):
@@ -266,7 +717,4 @@ class Git(object):
         :rtype: Commit
         :return: The commit at HEAD
         """
-        if not cls._head:
-            out = cls.call(['rev-parse', 'HEAD'])
-            cls._head = gitcovery.Commit.get_commit(out.strip())
-        return cls._head
+        return gitcovery.Repository.current().get_head()
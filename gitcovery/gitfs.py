@@ -1,9 +1,11 @@
 import os
 import re
+import threading
 
-from gitcovery import Commit
+from gitcovery import Commit, Repository
 from .diff import FileDiff
 from .git import Git
+from .stats import Stats
 
 
 class _AbsGitFile(object):
@@ -14,6 +16,8 @@ class _AbsGitFile(object):
 
     # Regex for splitting a line with whitespace at the head
     _REGEX_LINESPLIT = re.compile('\n\s*')
+    # The revision of which the history is listed
+    _revision = 'HEAD'
 
     def __init__(self, path):
         """
@@ -23,6 +27,9 @@ class _AbsGitFile(object):
         :type path: str
         :param path: The filepath of this file
         """
+        # The repository of this file, set before anything else as GitFolder looks up unknown attributes
+        self._repo = Repository.current()
+
         # Make sure the file exists
         assert os.path.exists(path) is True, 'The file %s does not exist' % path
 
@@ -53,7 +60,7 @@ class _AbsGitFile(object):
         :return: The path relative to the repository root
         """
         if self._path:
-            root = Git.root.path
+            root = self._repo.root.path
             return (self._path + os.sep + self.name).replace(root if root.endswith('/') else root + '/', '')
         else:
             return self.name
@@ -121,7 +128,7 @@ class _AbsGitFile(object):
         :rtype: str
         :return: The status of this file
         """
-        out = Git.call(['status', self.path, '--short'], kill_on_error=False)
+        out = self._repo.get_backend().status(self.path)
         return self._REGEX_LINESPLIT.split(out[1:] if out.startswith(' ') else out)[:-1]
 
     def history(self):
@@ -132,12 +139,39 @@ class _AbsGitFile(object):
         :rtype: List[Commit]
         :return: A list of all the commits that made changes to this file
         """
-        lines = Git.call(['log', '--pretty=format:%H', self.path]).split('\n')
+        return self._repo.history(self.relative_path, revision=self._revision)
+
+    def iter_history(self, limit=None, since=None, until=None, first_parent=False):
+        """
+        Iterate over the history of this file, new -> old.
+        Unlike `history()`, the commits are produced while git walks the history,
+        so getting the latest changes only costs as much as the number of commits that are taken.
+        When the iteration is stopped early, git stops walking the history.
+
+        :type limit: int
+        :param limit: Optional maximum number of commits
+        :type since: datetime.datetime | int
+        :param since: Optional datetime or unix timestamp, only the commits that were committed at or after it
+        :type until: datetime.datetime | int
+        :param until: Optional datetime or unix timestamp, only the commits that were committed at or before it
+        :type first_parent: bool
+        :param first_parent: Whether to only follow the first parent of merges
+        :rtype: Iterator[Commit]
+        :return: The commits that made changes to this file
+        """
+        return self._repo.iter_history(self.relative_path, limit=limit, since=since, until=until,
+                                       first_parent=first_parent, revision=self._revision)
 
-        res = [None] * len(lines)
-        for i, sha in enumerate(lines):
-            res[i] = Commit.get_commit(sha)
-        return res
+    def history_async(self):
+        """
+        Get the history of this file from asyncio, see `_AbsGitFile.history()`.
+        This requires Python 3.5 or newer.
+
+        :rtype: Awaitable[List[Commit]]
+        :return: A list of all the commits that made changes to this file
+        """
+        from . import aio
+        return aio.history(self._repo, path=self.relative_path, revision=self._revision)
 
 
 class GitFile(_AbsGitFile):
@@ -160,12 +194,35 @@ class GitFile(_AbsGitFile):
         assert os.path.isfile(path) is True, '%s must be a file' % path
         self._contents = None
 
-    def changes(self):
+    def history(self, follow=False):
+        """
+        Get the history of this file as a list of commits.
+        These commits are stored new -> old.
+        When following renames, the history continues with the history of the old file at every commit that
+        renamed a file to this file. The renames are detected once for the whole repository using `git log -M`,
+        so unlike `git log --follow` this does not walk the whole history for every file.
+
+        :type follow: bool
+        :param follow: Whether to continue the history before the file was renamed
+        :rtype: List[Commit]
+        :return: A list of all the commits that made changes to this file
+        """
+        return self._repo.history(self.relative_path, follow=follow, revision=self._revision)
+
+    def changes(self, follow=False):
         """
-        :rtype: List[FileDiff]
-        :return: For each of the commits in the history, the relevant part of the diff
+        :type follow: bool
+        :param follow: Whether to continue the history before the file was renamed, see `GitFile.history()`
+        :rtype: List[FileDiff | None]
+        :return: For each of the commits in the history, the relevant part of the diff,
+            or None when the diff of the commit does not contain this file, like for merges and renames
         """
-        return list(map(lambda commit: commit.getDiff(file=self.path), self.history()))
+        if follow:
+            history = self._repo._follow(self.relative_path, revision=self._revision)
+            Commit._group([commit for commit, _ in history])
+        else:
+            history = [(commit, self.relative_path) for commit in self.history()]
+        return [commit.changes().data.get(path) for commit, path in history]
 
     def changes_from(self, from_commit, to_commit=None):
         """
@@ -180,15 +237,15 @@ class GitFile(_AbsGitFile):
         :return: The diff between the from and to commit
         """
         if isinstance(from_commit, str):
-            from_commit = Commit.get_commit(from_commit)
+            from_commit = self._repo.get_commit(from_commit)
         if to_commit is None:
-            to_commit = Git.get_head()
+            to_commit = self._repo.get_head()
         elif isinstance(to_commit, str):
-            to_commit = Commit.get_commit(to_commit)
+            to_commit = self._repo.get_commit(to_commit)
 
         assert from_commit < to_commit, 'The from commit should be older than the to commit'
 
-        out = Git.call(['diff', from_commit, to_commit, self.relative_path])
+        out = self._repo.get_backend().diff(from_commit.sha, to_commit.sha, self.relative_path)
         return FileDiff(self.name, out)
 
     def at(self, commit):
@@ -205,11 +262,46 @@ class GitFile(_AbsGitFile):
         else:
             sha = commit.sha
 
-        try:
-            return Git.call(['show', '%s:%s' % (sha, self.relative_path)], kill_on_error=False)
-        except IOError:
-            # File does not exist at that commit
-            return ''
+        raw = self._repo.get_backend().read_blob(sha, self.relative_path)
+        # The file does not exist at that commit when there is no blob
+        return Git._decode(raw) if raw is not None else ''
+
+    def at_many(self, commits):
+        """
+        Get the contents of this file at many commits, for example at every commit in its history.
+        The blobs of the file at all the commits are looked up at once, and every distinct blob is only read once,
+        so the commits that did not change the file do not read it again.
+        The contents of the blobs are cached, see `Git.set_blob_cache_size()`.
+        For a single commit, `GitFile.at()` is faster as it reads the file in one go.
+
+        :type commits: List[Commit | str]
+        :param commits: The commits for which to get the corresponding file contents
+        :rtype: Iterator[(Commit | str, str)]
+        :return: Every commit with the content of the file at that commit, in the given order
+        """
+        commits = list(commits)
+        shas = [commit if isinstance(commit, str) else commit.sha for commit in commits]
+        ids = self._repo.get_backend().blob_ids(shas, self.relative_path)
+
+        contents = {None: ''}  # :type: Dict[str | None, str]
+        for commit, blob in zip(commits, ids):
+            # The file does not exist at that commit when there is no blob
+            if blob not in contents:
+                contents[blob] = Git._decode(self._repo._read_blob(blob))
+            yield commit, contents[blob]
+
+    def at_async(self, commit):
+        """
+        Get the contents of this file at the given commit from asyncio, see `GitFile.at()`.
+        This requires Python 3.5 or newer.
+
+        :type commit: Commit | str
+        :param commit: The commit for which to get the corresponding file content
+        :rtype: Awaitable[str]
+        :return: The content of the file
+        """
+        from . import aio
+        return aio.file_at(self, commit)
 
     def count(self, pattern, at=None):
         """
@@ -253,6 +345,7 @@ class GitFile(_AbsGitFile):
         :rtype: str
         :return: The contents of this file
         """
+        Stats._count('contents', hits=bool(self._contents), misses=not self._contents)
         if not self._contents:
             (encoding, error_policy) = Git.get_decode_settings()
             try:
@@ -318,6 +411,8 @@ class GitFolder(_AbsGitFile):
         :param gitignore: A list of patterns for files to ignore
         """
         super(GitFolder, self).__init__(path)
+        # Makes sure the children are only listed by a single thread
+        self._lock = threading.Lock()
         if gitignore is None:
             gitignore = ['\.git']
         assert os.path.isdir(path) is True, '%s must be a folder' % path
@@ -349,24 +444,32 @@ class GitFolder(_AbsGitFile):
         :rtype: Dict[str, GitFile]
         :return: A dictionary containing all children
         """
-        if not self._children:
-            files = os.listdir(self.path)
-            if '.gitignore' in files:
-                self._load_gitignore()
-
-            for f in files:
-                fname = self.path + os.sep + f
-                if self._REGEX_GITIGNORE.search(f):
-                    continue
-                if os.path.isdir(fname):
-                    folder = GitFolder(fname, gitignore=self._gitignore)
-                    self._children[f] = folder
-                    self._folders[f] = folder
-                else:
-                    fil = GitFile(fname)
-                    self._children[f] = fil
-                    self._files[f] = fil
-        return self._children
+        if self._children:
+            return self._children
+        with self._lock:
+            if not self._children:
+                files = os.listdir(self.path)
+                if '.gitignore' in files:
+                    self._load_gitignore()
+
+                children = {}
+                for f in files:
+                    fname = self.path + os.sep + f
+                    if self._REGEX_GITIGNORE.search(f):
+                        continue
+                    if os.path.isdir(fname):
+                        folder = GitFolder(fname, gitignore=self._gitignore)
+                        folder._repo = self._repo
+                        children[f] = folder
+                        self._folders[f] = folder
+                    else:
+                        fil = GitFile(fname)
+                        fil._repo = self._repo
+                        children[f] = fil
+                        self._files[f] = fil
+                # Other threads only use the children once they are all listed
+                self._children = children
+            return self._children
 
     def files(self):
         """
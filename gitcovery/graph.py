@@ -0,0 +1,454 @@
+import heapq
+
+import gitcovery
+
+
+class _Bitset(object):
+    """
+    A set of commit ids, stored as one bit per row of the commit table.
+    The bitset grows when ids are added that are beyond its current size.
+    """
+
+    def __init__(self, size=0):
+        """
+        Constructor for an empty _Bitset.
+
+        :type size: int
+        :param size: The number of ids to reserve space for
+        """
+        self._bits = bytearray((size + 7) >> 3)
+
+    def add(self, row):
+        """
+        Add an id to the set.
+
+        :type row: int
+        :param row: The id to add
+        :rtype: bool
+        :return: True when the id was added, False when it was already in the set
+        """
+        index = row >> 3
+        if index >= len(self._bits):
+            self._bits.extend(bytearray(index + 1 - len(self._bits)))
+        mask = 1 << (row & 7)
+        if self._bits[index] & mask:
+            return False
+        self._bits[index] |= mask
+        return True
+
+    def __contains__(self, row):
+        """
+        :type row: int
+        :param row: The id to check
+        :rtype: bool
+        :return: Whether the id is in the set
+        """
+        index = row >> 3
+        return index < len(self._bits) and bool(self._bits[index] & (1 << (row & 7)))
+
+
+class CommitGraph(object):
+    """
+    Iterative traversal of the commit graph and ancestry queries.
+    Only the parents and commit dates of the commits are needed, without loading any other metadata.
+    These are read from the commit-graph file of the repository when present (see `Git.write_commit_graph()`),
+    otherwise they are requested from the backend for a complete history at once (using `git rev-list --parents`).
+    Visited commits are tracked in bitsets over the ids in the commit table,
+    and generation numbers are used to stop ancestry queries as early as possible.
+    """
+
+    # Flags used when searching for merge bases
+    _PARENT1 = 1
+    _PARENT2 = 2
+    _STALE = 4
+    _RESULT = 8
+    # Generation numbers in a commit-graph file are capped at this value
+    _MAX_GENERATION = 0x3FFFFFFF
+
+    @classmethod
+    def _load(cls, repo, rows):
+        """
+        Make sure the parents and commit dates of the given commits are known.
+        Commits are first looked up one by one, which uses the commit-graph file of the repository when present.
+        The remaining commits and all their ancestors are requested from the backend in a single call.
+
+        :type repo: Repository
+        :param repo: The repository of the commits
+        :type rows: Iterable[int]
+        :param rows: The ids of the commits
+        """
+        table = repo._table
+        missing = [row for row in rows if not table.has_parents(row) and not cls._load_from_commit_graph(repo, row)]
+        if not missing:
+            return
+
+        for sha, commit_time, parents in repo.get_backend().graph_records([table.sha(row) for row in missing]):
+            row = table.intern(sha)
+            if not table.has_parents(row):
+                table.set_graph(row, [table.intern(parent) for parent in parents], commit_time)
+
+    @classmethod
+    def _load_from_commit_graph(cls, repo, row):
+        """
+        Look up the parents, commit date and generation number of a single commit in the backend,
+        which reads them from the commit-graph file for git repositories.
+
+        :type repo: Repository
+        :param repo: The repository of the commits
+        :type row: int
+        :param row: The id of the commit
+        :rtype: bool
+        :return: True when the commit was read, False when it has to be requested with its ancestors instead
+        """
+        table = repo._table
+        info = repo.get_backend().commit_graph(table.sha(row))
+        if not info:
+            return False
+
+        parents, commit_time, generation = info
+        table.set_graph(row, [table.intern(parent) for parent in parents], commit_time)
+        # Git stores 0 when it did not compute the generation, and caps generations that do not fit
+        if 0 < generation < cls._MAX_GENERATION:
+            table.set_generation(row, generation)
+        return True
+
+    @classmethod
+    def _commit_time(cls, repo, row):
+        """
+        :type repo: Repository
+        :param repo: The repository of the commits
+        :type row: int
+        :param row: The id of the commit
+        :rtype: int
+        :return: The commit date of the commit as unix timestamp
+        """
+        if not repo._table.has_parents(row):
+            cls._load(repo, [row])
+        return repo._table.commit_date(row)[0]
+
+    @classmethod
+    def _parents(cls, repo, row):
+        """
+        :type repo: Repository
+        :param repo: The repository of the commits
+        :type row: int
+        :param row: The id of the commit
+        :rtype: List[int]
+        :return: The ids of the parents of the commit
+        """
+        table = repo._table
+        if not table.has_parents(row):
+            cls._load(repo, [row])
+        return table.parents(row)
+
+    @classmethod
+    def generation(cls, commit):
+        """
+        Get the generation number of a commit.
+        Commits without parents have generation 1, every other commit has
+        one more than the maximum generation of its parents.
+        A commit can only be an ancestor of commits with a higher generation number.
+
+        :type commit: Commit
+        :param commit: The commit
+        :rtype: int
+        :return: The generation number
+        """
+        return cls._generation(commit._repo, commit._id)
+
+    @classmethod
+    def _generation(cls, repo, row):
+        """
+        Get the generation number of a commit, computing it for all its ancestors when needed.
+
+        :type repo: Repository
+        :param repo: The repository of the commits
+        :type row: int
+        :param row: The id of the commit
+        :rtype: int
+        :return: The generation number
+        """
+        table = repo._table
+        if table.generation(row):
+            return table.generation(row)
+
+        cls._load(repo, [row])
+        # Iterative post-order traversal, a commit is finished once all its parents are
+        stack = [row]
+        while stack:
+            current = stack[-1]
+            if table.generation(current):
+                stack.pop()
+                continue
+            generation = 0
+            pending = False
+            for parent in table.parents(current):
+                parent_generation = table.generation(parent)
+                if not parent_generation:
+                    if not table.has_parents(parent):
+                        cls._load(repo, [parent])
+                    stack.append(parent)
+                    pending = True
+                elif parent_generation > generation:
+                    generation = parent_generation
+            if not pending:
+                table.set_generation(current, generation + 1)
+                stack.pop()
+        return table.generation(row)
+
+    @classmethod
+    def walk(cls, commits, order='date', first_parent=False):
+        """
+        Iterate over the given commits and all their ancestors, each commit is returned once.
+        With order 'date' the commits are returned newest first by commit date, like `git log`.
+        With order 'topo' no commit is returned before all its children within the walk are returned,
+        ties are broken by commit date.
+
+        :type commits: Commit | Iterable[Commit]
+        :param commits: The commits to start from
+        :type order: str
+        :param order: The order to walk in, either 'date' or 'topo'
+        :type first_parent: bool
+        :param first_parent: Whether to only follow the first parent of merge commits
+        :rtype: Iterator[Commit]
+        :return: The commits in the requested order
+        :raise: Exception, when the order is not known
+        """
+        if isinstance(commits, gitcovery.Commit):
+            commits = [commits]
+        commits = list(commits)
+        if order not in ('date', 'topo'):
+            raise Exception('Unknown order \'%s\'' % order)
+        if not commits:
+            return
+        repo = commits[0]._repo
+        rows = [commit._id for commit in commits]
+        if order == 'date':
+            walker = cls._walk_date(repo, rows, first_parent)
+        else:
+            walker = cls._walk_topo(repo, rows, first_parent)
+        for row in walker:
+            yield gitcovery.Commit._from_id(row, repo)
+
+    @classmethod
+    def _walk_date(cls, repo, rows, first_parent):
+        """
+        Walk from the given commits, newest first by commit date.
+
+        :type repo: Repository
+        :param repo: The repository of the commits
+        :type rows: List[int]
+        :param rows: The ids of the commits to start from
+        :type first_parent: bool
+        :param first_parent: Whether to only follow the first parent of merge commits
+        :rtype: Iterator[int]
+        :return: The ids of the walked commits
+        """
+        table = repo._table
+        cls._load(repo, rows)
+        visited = _Bitset(len(table))
+        queue = []
+        for row in rows:
+            if visited.add(row):
+                heapq.heappush(queue, (-cls._commit_time(repo, row), row))
+
+        while queue:
+            _, row = heapq.heappop(queue)
+            yield row
+            parents = cls._parents(repo, row)
+            for parent in parents[:1] if first_parent else parents:
+                if visited.add(parent):
+                    heapq.heappush(queue, (-cls._commit_time(repo, parent), parent))
+
+    @classmethod
+    def _walk_topo(cls, repo, rows, first_parent):
+        """
+        Walk from the given commits in topological order, children before their parents.
+
+        :type repo: Repository
+        :param repo: The repository of the commits
+        :type rows: List[int]
+        :param rows: The ids of the commits to start from
+        :type first_parent: bool
+        :param first_parent: Whether to only follow the first parent of merge commits
+        :rtype: Iterator[int]
+        :return: The ids of the walked commits
+        """
+        table = repo._table
+        cls._load(repo, rows)
+
+        # Count the children of every reachable commit within the walk
+        visited = _Bitset(len(table))
+        children = {}
+        stack = []
+        for row in rows:
+            if visited.add(row):
+                stack.append(row)
+        while stack:
+            parents = cls._parents(repo, stack.pop())
+            for parent in parents[:1] if first_parent else parents:
+                children[parent] = children.get(parent, 0) + 1
+                if visited.add(parent):
+                    stack.append(parent)
+
+        queue = []
+        for row in set(rows):
+            if not children.get(row):
+                heapq.heappush(queue, (-table.commit_date(row)[0], row))
+        while queue:
+            _, row = heapq.heappop(queue)
+            yield row
+            parents = table.parents(row)
+            for parent in parents[:1] if first_parent else parents:
+                children[parent] -= 1
+                if not children[parent]:
+                    heapq.heappush(queue, (-table.commit_date(parent)[0], parent))
+
+    @classmethod
+    def ancestors(cls, commit, first_parent=False):
+        """
+        Get all the ancestors of a commit, newest first by commit date.
+        The commit itself is not included.
+
+        :type commit: Commit
+        :param commit: The commit
+        :type first_parent: bool
+        :param first_parent: Whether to only follow the first parent of merge commits
+        :rtype: List[Commit]
+        :return: The ancestors of the commit
+        """
+        return [other for other in cls.walk(commit, first_parent=first_parent) if other._id != commit._id]
+
+    @classmethod
+    def first_parents(cls, commit):
+        """
+        Iterate over the first-parent chain of a commit, starting with the commit itself.
+        This is the history of the branch the commit is on, without the commits that were merged into it.
+
+        :type commit: Commit
+        :param commit: The commit to start from
+        :rtype: Iterator[Commit]
+        :return: The commit, its first parent, the first parent of that commit and so on
+        """
+        repo = commit._repo
+        row = commit._id
+        while True:
+            yield gitcovery.Commit._from_id(row, repo)
+            parents = cls._parents(repo, row)
+            if not parents:
+                return
+            row = parents[0]
+
+    @classmethod
+    def is_ancestor(cls, ancestor, commit):
+        """
+        Check whether a commit is an ancestor of another commit, like `git merge-base --is-ancestor`.
+        A commit is considered an ancestor of itself.
+
+        :type ancestor: Commit
+        :param ancestor: The possible ancestor
+        :type commit: Commit
+        :param commit: The commit to search the ancestors of
+        :rtype: bool
+        :return: True when ancestor is reachable from commit, False otherwise
+        """
+        repo = commit._repo
+        target = ancestor._id
+        if target == commit._id:
+            return True
+        target_generation = cls._generation(repo, target)
+        if target_generation >= cls._generation(repo, commit._id):
+            return False
+
+        table = repo._table
+        visited = _Bitset(len(table))
+        visited.add(commit._id)
+        stack = [commit._id]
+        while stack:
+            for parent in cls._parents(repo, stack.pop()):
+                if parent == target:
+                    return True
+                # Commits with a lower or equal generation cannot reach the target
+                if cls._generation(repo, parent) > target_generation and visited.add(parent):
+                    stack.append(parent)
+        return False
+
+    @classmethod
+    def merge_bases(cls, a, b):
+        """
+        Get the best common ancestors of two commits, like `git merge-base --all`.
+        A common ancestor is best when it is not an ancestor of another common ancestor.
+
+        :type a: Commit
+        :param a: The first commit
+        :type b: Commit
+        :param b: The second commit
+        :rtype: List[Commit]
+        :return: The merge bases, newest first by commit date
+        """
+        if a._id == b._id:
+            return [a]
+        repo = a._repo
+        table = repo._table
+        both = cls._PARENT1 | cls._PARENT2
+        flags = {a._id: cls._PARENT1, b._id: cls._PARENT2}
+        queue = [(-cls._generation(repo, row), -table.commit_date(row)[0], row) for row in (a._id, b._id)]
+        heapq.heapify(queue)
+        # The rows in the queue, and how many of them are not stale, like `queue_has_nonstale` in git
+        queued = set([a._id, b._id])
+        nonstale = 2
+        candidates = []
+        # Walk down from both commits, highest generation first, until only stale commits remain
+        while nonstale:
+            _, _, row = heapq.heappop(queue)
+            queued.discard(row)
+            flag = flags[row] & (both | cls._STALE)
+            if not flag & cls._STALE:
+                nonstale -= 1
+            if flag == both:
+                if not flags[row] & cls._RESULT:
+                    flags[row] |= cls._RESULT
+                    candidates.append(row)
+                flag |= cls._STALE
+            for parent in cls._parents(repo, row):
+                old = flags.get(parent, 0)
+                if old & flag == flag:
+                    continue
+                flags[parent] = old | flag
+                if parent in queued:
+                    # The flags of a queued row are read when it is popped, so it is not pushed again
+                    if flag & cls._STALE and not old & cls._STALE:
+                        nonstale -= 1
+                else:
+                    queued.add(parent)
+                    heapq.heappush(queue, (-cls._generation(repo, parent), -table.commit_date(parent)[0], parent))
+                    if not flags[parent] & cls._STALE:
+                        nonstale += 1
+
+        # A candidate that became stale afterwards is reachable from another candidate
+        candidates = [row for row in candidates if not flags[row] & cls._STALE]
+        # Remove the candidates that are an ancestor of another candidate
+        bases = []
+        for row in candidates:
+            commit = gitcovery.Commit._from_id(row, repo)
+            if not any(other != row and cls.is_ancestor(commit, gitcovery.Commit._from_id(other, repo))
+                       for other in candidates):
+                bases.append(row)
+        bases.sort(key=lambda row: -table.commit_date(row)[0])
+        return [gitcovery.Commit._from_id(row, repo) for row in bases]
+
+    @classmethod
+    def merge_base(cls, a, b):
+        """
+        Get the best common ancestor of two commits, like `git merge-base`.
+        When there are multiple, the newest one is returned.
+
+        :type a: Commit
+        :param a: The first commit
+        :type b: Commit
+        :param b: The second commit
+        :rtype: Commit | None
+        :return: The merge base, or None when the commits have no common history
+        """
+        bases = cls.merge_bases(a, b)
+        return bases[0] if bases else None
@@ -0,0 +1,537 @@
+import binascii
+import difflib
+import hashlib
+import random
+
+from .backend import Backend, GitBackend
+from .git import Git
+
+
+class MemoryBackend(Backend):
+    """
+    A backend that keeps a repository in memory, without calling git.
+    Blobs, trees and commits are stored as real git objects with their real SHA-1 hashes,
+    so everything that reads objects works the same as on a git repository.
+    Diffs are computed from the file contents when requested.
+
+    This is mostly useful for tests and for benchmarking the rest of the module on repositories of any size,
+    see `MemoryBackend.generate()`. Use it by calling `Git.set_backend(backend)`.
+    """
+
+    _MODE_FILE = '100644'
+    _MODE_TREE = '40000'
+
+    def __init__(self):
+        """
+        Constructor for an empty MemoryBackend, with HEAD pointing to 'refs/heads/master'.
+        """
+        self._objects = {}  # :type: Dict[str, (str, bytes)]
+        self._rows = {}     # :type: Dict[str, tuple]
+        self._trees = {}    # :type: Dict[str, str]
+        self._refs = {}     # :type: Dict[str, str]
+        self._head = 'refs/heads/master'  # :type: str
+
+    def _add_object(self, typ, data):
+        """
+        Store an object, using its git hash as key.
+
+        :type typ: str
+        :param typ: The type of the object
+        :type data: bytes
+        :param data: The contents of the object
+        :rtype: str
+        :return: The SHA hash of the object
+        """
+        sha = hashlib.sha1(('%s %d\0' % (typ, len(data))).encode('ascii') + data).hexdigest()
+        self._objects[sha] = (typ, data)
+        return sha
+
+    def add_blob(self, data):
+        """
+        Add the contents of a file.
+
+        :type data: bytes
+        :param data: The contents of the file
+        :rtype: str
+        :return: The SHA hash of the blob
+        """
+        return self._add_object('blob', data)
+
+    def _add_tree(self, files):
+        """
+        Add the trees for a snapshot of the files.
+
+        :type files: Dict[str, str]
+        :param files: The hash of the blob per path
+        :rtype: str
+        :return: The SHA hash of the root tree
+        """
+        blobs = {}
+        folders = {}
+        for path, sha in files.items():
+            if '/' in path:
+                folder, rest = path.split('/', 1)
+                folders.setdefault(folder, {})[rest] = sha
+            else:
+                blobs[path] = sha
+
+        entries = [(name, self._MODE_FILE, sha) for name, sha in blobs.items()]
+        entries += [(name, self._MODE_TREE, self._add_tree(contents)) for name, contents in folders.items()]
+        # Git sorts the entries of a tree as if the names of folders end with a slash
+        entries.sort(key=lambda entry: entry[0] + '/' if entry[1] == self._MODE_TREE else entry[0])
+        data = b''.join(('%s %s\0' % (mode, name)).encode('utf-8') + binascii.unhexlify(sha)
+                        for name, mode, sha in entries)
+        return self._add_object('tree', data)
+
+    def _files(self, tree, prefix=''):
+        """
+        Get the snapshot of the files in a tree.
+
+        :type tree: str
+        :param tree: The SHA hash of the tree
+        :type prefix: str
+        :param prefix: The path of the tree, prepended to the paths of the files
+        :rtype: Dict[str, str]
+        :return: The hash of the blob per path
+        """
+        files = {}
+        for mode, sha, name in self.list_tree(tree):
+            path = prefix + name.decode('utf-8')
+            if mode == self._MODE_TREE:
+                files.update(self._files(sha, path + '/'))
+            else:
+                files[path] = sha
+        return files
+
+    def files_at(self, commit):
+        """
+        Get the snapshot of the files at a commit.
+
+        :type commit: str
+        :param commit: The SHA hash of the commit
+        :rtype: Dict[str, str]
+        :return: The hash of the blob per path
+        """
+        return self._files(self._trees[commit]) if commit else {}
+
+    @staticmethod
+    def _ident(name, email, timestamp, offset):
+        """
+        :rtype: bytes
+        :return: An identity line of a commit object
+        """
+        sign = '-' if offset < 0 else '+'
+        return ('%s <%s> %d %s%02d%02d' % (name, email, timestamp, sign, abs(offset) // 60, abs(offset) % 60)
+                ).encode('utf-8')
+
+    def add_commit(self, changes, parents=(), author=('Author', 'author@example.com'), committer=None,
+                   timestamp=0, offset=0, message='Commit'):
+        """
+        Add a commit that changes the given files of its first parent.
+
+        :type changes: Dict[str, bytes | None]
+        :param changes: The new contents per changed path, None to remove a file
+        :type parents: List[str]
+        :param parents: The SHA hashes of the parents
+        :type author: (str, str)
+        :param author: The name and email address of the author
+        :type committer: (str, str)
+        :param committer: The name and email address of the committer, the author by default
+        :type timestamp: int
+        :param timestamp: The author and commit date as unix timestamp
+        :type offset: int
+        :param offset: The timezone offset in minutes
+        :type message: str
+        :param message: The commit message, where the first line is the title
+        :rtype: str
+        :return: The SHA hash of the commit
+        """
+        files = self.files_at(parents[0]) if parents else {}
+        for path, data in changes.items():
+            if data is None:
+                files.pop(path, None)
+            else:
+                files[path] = self.add_blob(data)
+        tree = self._add_tree(files)
+
+        committer = committer or author
+        lines = [b'tree ' + tree.encode('ascii')]
+        lines += [b'parent ' + parent.encode('ascii') for parent in parents]
+        lines.append(b'author ' + self._ident(author[0], author[1], timestamp, offset))
+        lines.append(b'committer ' + self._ident(committer[0], committer[1], timestamp, offset))
+        data = b'\n'.join(lines) + b'\n\n' + message.encode('utf-8') + b'\n'
+        sha = self._add_object('commit', data)
+        self._rows[sha] = GitBackend._object_to_row(sha, data)
+        self._trees[sha] = tree
+        return sha
+
+    def set_ref(self, name, sha):
+        """
+        Let a ref point to an object.
+
+        :type name: str
+        :param name: The full name of the ref, for example 'refs/heads/master'
+        :type sha: str
+        :param sha: The SHA hash of the object
+        """
+        self._refs[name] = sha
+
+    @classmethod
+    def generate(cls, num_commits, num_files=100, num_authors=10, changes=3, branch_rate=0.05, merge_rate=0.05,
+                 tag_every=100, seed=0):
+        """
+        Generate a repository with a random history.
+        Commits are made on the master branch and on side branches, which are eventually merged into master.
+        Every commit changes a few lines in a few files and all random choices are made using the given seed,
+        so the same arguments always give the same repository.
+
+        :type num_commits: int
+        :param num_commits: The number of commits
+        :type num_files: int
+        :param num_files: The number of files, spread over a number of folders
+        :type num_authors: int
+        :param num_authors: The number of authors
+        :type changes: int
+        :param changes: The number of files changed in every commit
+        :type branch_rate: float
+        :param branch_rate: The chance that a commit starts a new branch
+        :type merge_rate: float
+        :param merge_rate: The chance that a commit merges a branch into master
+        :type tag_every: int
+        :param tag_every: The number of commits between tags on master, 0 for no tags
+        :type seed: int
+        :param seed: The seed of the random choices
+        :rtype: MemoryBackend
+        :return: The generated repository
+        """
+        rnd = random.Random(seed)
+        backend = cls()
+        paths = ['src/module%d/file%d.py' % (i % 10, i) for i in range(num_files)]
+        authors = [('Author %d' % i, 'author%d@example.com' % i) for i in range(num_authors)]
+        contents = [{}]  # The contents of the files per branch, as lists of lines
+        heads = [None]   # The head of each branch, where the first branch is master
+        timestamp = 1500000000
+
+        for i in range(num_commits):
+            timestamp += rnd.randint(60, 7200)
+            author = authors[rnd.randrange(num_authors)]
+            chance = rnd.random()
+            if len(heads) > 1 and chance < merge_rate:
+                branch = rnd.randrange(1, len(heads))
+                merged = contents.pop(branch)
+                parents = [heads[0], heads.pop(branch)]
+                changed = dict((path, lines) for path, lines in merged.items() if contents[0].get(path) != lines)
+                contents[0].update(changed)
+                sha = backend.add_commit(dict((path, cls._join(lines)) for path, lines in changed.items()), parents,
+                                         author, timestamp=timestamp, message='Merge branch %d' % branch)
+                heads[0] = sha
+                continue
+
+            if heads[0] and chance < merge_rate + branch_rate:
+                heads.append(heads[0])
+                contents.append(dict(contents[0]))
+                branch = len(heads) - 1
+            else:
+                branch = rnd.randrange(len(heads))
+
+            changed = {}
+            for path in rnd.sample(paths, min(changes, num_files)):
+                lines = list(contents[branch].get(path, []))
+                for _ in range(rnd.randint(1, 5)):
+                    position = rnd.randint(0, len(lines))
+                    line = 'value_%d = %d' % (rnd.randrange(1000), i)
+                    if lines and position < len(lines) and rnd.random() < 0.5:
+                        lines[position] = line
+                    else:
+                        lines.insert(position, line)
+                contents[branch][path] = lines
+                changed[path] = cls._join(lines)
+            message = 'Change %d\n\nChange %d files on branch %d.' % (i, len(changed), branch)
+            heads[branch] = backend.add_commit(changed, [heads[branch]] if heads[branch] else [], author,
+                                               timestamp=timestamp, message=message)
+            if tag_every and branch == 0 and i % tag_every == 0:
+                backend.set_ref('refs/tags/v%d' % (i // tag_every), heads[0])
+
+        for branch, head in enumerate(heads):
+            if head:
+                backend.set_ref('refs/heads/master' if branch == 0 else 'refs/heads/branch%d' % branch, head)
+        return backend
+
+    @staticmethod
+    def _join(lines):
+        """
+        :type lines: List[str]
+        :param lines: The lines of a file
+        :rtype: bytes
+        :return: The contents of the file
+        """
+        return ''.join(line + '\n' for line in lines).encode('utf-8')
+
+    def _commit(self, name):
+        """
+        :type name: str
+        :param name: The revision
+        :rtype: str
+        :return: The SHA hash of the commit
+        :raise IOError: When the revision is not a commit
+        """
+        sha = self.rev_parse(name)
+        if sha not in self._rows:
+            raise IOError('%s is not a commit' % name)
+        return sha
+
+    def _walk(self, revisions, path=None, first_parent=False):
+        """
+        Get the commits in the given revisions, newest first.
+        When a path is given, the history is simplified the same way git does by default:
+        only the commits that change the path are listed,
+        and when a merge has the same contents for the path as one of its parents, only that parent is followed.
+
+        :type revisions: List[str]
+        :param revisions: The revisions, commits prefixed with '^' exclude their ancestors
+        :type path: str
+        :param path: Optional path of a file or folder to simplify the history for
+        :type first_parent: bool
+        :param first_parent: Whether to only follow the first parent of merges
+        :rtype: List[str]
+        :return: The SHA hashes of the commits
+        """
+        def reachable(shas, excluded, path, first_parent=False):
+            seen = set()
+            listed = []
+            stack = list(shas)
+            while stack:
+                sha = stack.pop()
+                if sha in seen or sha in excluded:
+                    continue
+                seen.add(sha)
+                parents = self._rows[sha][1].split()
+                if first_parent:
+                    parents = parents[:1]
+                if path:
+                    files = self.files_at(sha)
+                    same = [parent for parent in parents if not self._changed(self.files_at(parent), files, path)]
+                    if same:
+                        parents = same[:1]
+                    elif parents or self._changed({}, files, path):
+                        listed.append(sha)
+                else:
+                    listed.append(sha)
+                stack.extend(parents)
+            return listed
+
+        excluded = reachable([self._commit(revision[1:]) for revision in revisions if revision.startswith('^')],
+                             (), None)
+        included = reachable([self._commit(revision) for revision in revisions if not revision.startswith('^')],
+                             set(excluded), path, first_parent)
+        return sorted(included, key=lambda sha: (self._rows[sha][8], sha), reverse=True)
+
+    def _changed(self, old, new, path=None):
+        """
+        Get the files that differ between two snapshots.
+
+        :type old: Dict[str, str]
+        :param old: The old snapshot
+        :type new: Dict[str, str]
+        :param new: The new snapshot
+        :type path: str
+        :param path: Optional path of a file or folder to limit the changes to
+        :rtype: List[str]
+        :return: The sorted paths of the changed files
+        """
+        changed = []
+        for name in set(old) | set(new):
+            if old.get(name) != new.get(name) and (not path or name == path or name.startswith(path + '/')):
+                changed.append(name)
+        return sorted(changed)
+
+    def _lines(self, sha):
+        """
+        :type sha: str | None
+        :param sha: The SHA hash of a blob
+        :rtype: List[str]
+        :return: The decoded lines of the blob, which are empty when there is no blob
+        """
+        return Git._decode(self._objects[sha][1]).splitlines() if sha else []
+
+    def _diff(self, old, new, path=None):
+        """
+        Create a diff between two snapshots in the format of `git diff`.
+
+        :type old: Dict[str, str]
+        :param old: The old snapshot
+        :type new: Dict[str, str]
+        :param new: The new snapshot
+        :type path: str
+        :param path: Optional path of a file or folder to limit the diff to
+        :rtype: str
+        :return: The diff
+        """
+        out = []
+        for name in self._changed(old, new, path):
+            old_sha, new_sha = old.get(name), new.get(name)
+            out.append('diff --git a/%s b/%s\n' % (name, name))
+            if not old_sha:
+                out.append('new file mode %s\n' % self._MODE_FILE)
+            elif not new_sha:
+                out.append('deleted file mode %s\n' % self._MODE_FILE)
+            out.append('index %s..%s%s\n' % ((old_sha or '0' * 40)[:7], (new_sha or '0' * 40)[:7],
+                                            ' ' + self._MODE_FILE if old_sha and new_sha else ''))
+            out.append('--- %s\n+++ %s\n' % ('a/' + name if old_sha else '/dev/null',
+                                             'b/' + name if new_sha else '/dev/null'))
+            old_lines, new_lines = self._lines(old_sha), self._lines(new_sha)
+            matcher = difflib.SequenceMatcher(None, old_lines, new_lines, autojunk=False)
+            for group in matcher.get_grouped_opcodes(3):
+                old_start, old_end = group[0][1], group[-1][2]
+                new_start, new_end = group[0][3], group[-1][4]
+                out.append('@@ -%s +%s @@%s\n' % (self._range(old_start, old_end), self._range(new_start, new_end),
+                                                  self._function(old_lines, old_start)))
+                for tag, i1, i2, j1, j2 in group:
+                    if tag == 'equal':
+                        out.extend(' %s\n' % line for line in old_lines[i1:i2])
+                    else:
+                        out.extend('-%s\n' % line for line in old_lines[i1:i2])
+                        out.extend('+%s\n' % line for line in new_lines[j1:j2])
+        return ''.join(out)
+
+    @staticmethod
+    def _range(start, end):
+        """
+        :type start: int
+        :param start: The index of the first line of a hunk
+        :type end: int
+        :param end: The index after the last line of a hunk
+        :rtype: str
+        :return: The range of the hunk in its header, where git omits a length of 1
+                 and uses the line before the hunk as start when the hunk is empty
+        """
+        if end - start == 1:
+            return str(end)
+        return '%d,%d' % (start + (end > start), end - start)
+
+    @staticmethod
+    def _function(lines, start):
+        """
+        :type lines: List[str]
+        :param lines: The old lines of the file
+        :type start: int
+        :param start: The index of the first line of a hunk
+        :rtype: str
+        :return: The context git shows after the header of the hunk,
+                 which is the last line before the hunk that starts with a letter, '_' or '$'
+        """
+        for line in reversed(lines[:start]):
+            if line and (line[0].isalpha() or line[0] in '_$'):
+                return ' ' + line.rstrip()[:80]
+        return ''
+
+    def resolve_refs(self):
+        refs = dict(self._refs)
+        if self._head in self._refs:
+            refs['HEAD'] = self._refs[self._head]
+        return refs
+
+    def rev_parse(self, name):
+        if name.endswith('^{commit}'):
+            name = name[:-len('^{commit}')]
+        if name in self._objects:
+            return name
+        refs = self.resolve_refs()
+        for ref in (name, 'refs/' + name, 'refs/tags/' + name, 'refs/heads/' + name):
+            if ref in refs:
+                return refs[ref]
+        matches = [sha for sha in self._objects if sha.startswith(name)] if len(name) >= 4 else []
+        if len(matches) != 1:
+            raise IOError('Unknown revision %s' % name)
+        return matches[0]
+
+    def rev_list(self, revisions, path=None, limit=None, since=None, until=None, first_parent=False):
+        listed = 0
+        for sha in self._walk(revisions, path, first_parent):
+            if limit is not None and listed >= limit:
+                return
+            time = self._rows[sha][8]
+            if (since is None or time >= since) and (until is None or time <= until):
+                listed += 1
+                yield sha
+
+    def log_records(self, revisions, walk=True, load_diff=False, workers=1):
+        for sha in self._walk(revisions) if walk else [self._commit(sha) for sha in revisions]:
+            yield self._rows[sha], self.commit_diff(sha) if load_diff else None
+
+    def log_paths(self, revisions):
+        for sha in self._walk(revisions):
+            files = self.files_at(sha)
+            parents = self._rows[sha][1].split() or [None]
+            yield sha, [self._changed(self.files_at(parent), files) for parent in parents]
+
+    def log_renames(self, revisions):
+        # Only exact renames are detected, a file is renamed when its contents are added under another path
+        for sha in self._walk(revisions):
+            parents = self._rows[sha][1].split()
+            if len(parents) != 1:
+                continue
+            old, new = self.files_at(parents[0]), self.files_at(sha)
+            removed = dict((blob, path) for path, blob in sorted(old.items()) if path not in new)
+            renames = [(removed[blob], path) for path, blob in sorted(new.items())
+                       if path not in old and blob in removed]
+            if renames:
+                yield sha, renames
+
+    def graph_records(self, revisions):
+        for sha in self._walk(revisions):
+            yield sha, self._rows[sha][8], self._rows[sha][1].split()
+
+    def commit_graph(self, sha):
+        row = self._rows.get(sha)
+        return (row[1].split(), row[8], 0) if row else None
+
+    def read_object(self, obj, check_only=False):
+        try:
+            if ':' in obj:
+                commit, path = obj.split(':', 1)
+                sha = self._trees[self._commit(commit)]
+                for name in path.split('/') if path else []:
+                    if self._objects[sha][0] != 'tree':
+                        return None
+                    entries = dict((entry[2].decode('utf-8'), entry[1]) for entry in self.list_tree(sha))
+                    if name not in entries:
+                        return None
+                    sha = entries[name]
+            elif obj.endswith('^{tree}'):
+                sha = self._trees[self._commit(obj[:-len('^{tree}')])]
+            else:
+                sha = self.rev_parse(obj)
+        except IOError:
+            return None
+        typ, data = self._objects[sha]
+        return sha, typ, len(data), data
+
+    def commit_diff(self, sha):
+        parents = self._rows[sha][1].split()
+        if len(parents) > 1:
+            # Git shows a combined diff for merges, which does not contain any changes in the format of `Diff`
+            return ''
+        return self._diff(self.files_at(parents[0]) if parents else {}, self.files_at(sha))
+
+    def diff(self, from_commit, to_commit, path=None):
+        return self._diff(self.files_at(self._commit(from_commit)), self.files_at(self._commit(to_commit)), path)
+
+    def diff_stats(self, commit, base=None):
+        commit = self._commit(commit)
+        if base is None:
+            parents = self._rows[commit][1].split()
+            base = parents[0] if parents else None
+        old = self.files_at(self._commit(base)) if base else {}
+        new = self.files_at(commit)
+        stats = []
+        for path in self._changed(old, new):
+            matcher = difflib.SequenceMatcher(None, self._lines(old.get(path)), self._lines(new.get(path)),
+                                              autojunk=False)
+            added = removed = 0
+            for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+                if tag != 'equal':
+                    removed += i2 - i1
+                    added += j2 - j1
+            stats.append((added, removed, path))
+        return stats
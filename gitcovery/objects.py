@@ -0,0 +1,687 @@
+import binascii
+import glob
+import mmap
+import os
+import re
+import struct
+import threading
+import zlib
+from collections import OrderedDict
+
+from .stats import Stats
+
+
+class _PackFile(object):
+    """
+    A memory-mapped packfile and its index.
+    Objects are located with the fanout table and a binary search in the index,
+    and inflated directly from the mapped packfile.
+    """
+
+    # The object types as stored in the packfile
+    _TYPES = {1: 'commit', 2: 'tree', 3: 'blob', 4: 'tag'}
+    OFS_DELTA = 6
+    REF_DELTA = 7
+    _IDX_SIGNATURE = b'\xfftOc'
+
+    def __init__(self, idx_path, hash_size=20):
+        """
+        Constructor for a _PackFile.
+
+        :type idx_path: str
+        :param idx_path: The path of the `.idx` file, the `.pack` file is expected next to it
+        :type hash_size: int
+        :param hash_size: The number of bytes in an object hash
+        :raise IOError: When the files cannot be read or are not valid
+        """
+        self.hash_size = hash_size
+        self._idx = self._map(idx_path)
+        try:
+            self._pack = self._map(idx_path[:-len('.idx')] + '.pack')
+        except IOError:
+            self._idx.close()
+            raise
+
+        if self._idx[:4] == self._IDX_SIGNATURE:
+            if struct.unpack_from('>I', self._idx, 4)[0] != 2:
+                self.close()
+                raise IOError('Unsupported pack index %s' % idx_path)
+            self._version = 2
+            self._fanout = 8
+        else:
+            self._version = 1
+            self._fanout = 0
+        self.count = struct.unpack_from('>I', self._idx, self._fanout + 4 * 255)[0]
+
+        if self._version == 2:
+            self._shas = self._fanout + 1024
+            self._offsets = self._shas + self.count * (hash_size + 4)
+            self._large_offsets = self._offsets + self.count * 4
+        else:
+            # Version 1 stores entries of a 4-byte offset followed by the hash
+            self._shas = self._fanout + 1024 + 4
+            self._offsets = self._fanout + 1024
+
+    @staticmethod
+    def _map(path):
+        """
+        Memory-map a file for reading.
+
+        :type path: str
+        :param path: The path of the file
+        :rtype: mmap.mmap
+        :return: The mapped file
+        :raise IOError: When the file cannot be mapped
+        """
+        with open(path, 'rb') as f:
+            try:
+                return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except (ValueError, mmap.error):
+                raise IOError('Cannot map %s' % path)
+
+    def find(self, key):
+        """
+        Find an object in this packfile.
+
+        :type key: bytes
+        :param key: The binary hash of the object
+        :rtype: int
+        :return: The offset of the object in the packfile, or -1 when it is not in this packfile
+        """
+        stride = self.hash_size + (0 if self._version == 2 else 4)
+        first = ord(key[0:1])
+        low = struct.unpack_from('>I', self._idx, self._fanout + 4 * (first - 1))[0] if first else 0
+        high = struct.unpack_from('>I', self._idx, self._fanout + 4 * first)[0]
+        while low < high:
+            middle = (low + high) // 2
+            start = self._shas + middle * stride
+            sha = self._idx[start:start + self.hash_size]
+            if sha < key:
+                low = middle + 1
+            elif sha > key:
+                high = middle
+            else:
+                return self._offset(middle)
+        return -1
+
+    def _offset(self, index):
+        """
+        :type index: int
+        :param index: The index of the object in the packfile index
+        :rtype: int
+        :return: The offset of the object in the packfile
+        """
+        if self._version == 1:
+            return struct.unpack_from('>I', self._idx, self._offsets + index * (self.hash_size + 4))[0]
+        offset = struct.unpack_from('>I', self._idx, self._offsets + 4 * index)[0]
+        if offset & 0x80000000:
+            # Offsets that do not fit in 31 bits are stored in a separate table
+            offset = struct.unpack_from('>Q', self._idx, self._large_offsets + 8 * (offset & 0x7fffffff))[0]
+        return offset
+
+    def header(self, offset):
+        """
+        Read the header of the object at the given offset.
+
+        :type offset: int
+        :param offset: The offset of the object
+        :rtype: (str | int, int, int, int | bytes | None)
+        :return: The type (OFS_DELTA or REF_DELTA for deltas), the size of the inflated data,
+                 the offset of the compressed data and the base (offset or hash) of a delta
+        """
+        data = bytearray(self._pack[offset:offset + 32])
+        byte = data[0]
+        typ = (byte >> 4) & 7
+        size = byte & 15
+        shift = 4
+        pos = 1
+        while byte & 0x80:
+            byte = data[pos]
+            pos += 1
+            size |= (byte & 0x7f) << shift
+            shift += 7
+
+        base = None
+        if typ == self.OFS_DELTA:
+            byte = data[pos]
+            pos += 1
+            distance = byte & 0x7f
+            while byte & 0x80:
+                byte = data[pos]
+                pos += 1
+                distance = ((distance + 1) << 7) | (byte & 0x7f)
+            base = offset - distance
+        elif typ == self.REF_DELTA:
+            base = self._pack[offset + pos:offset + pos + self.hash_size]
+            pos += self.hash_size
+        elif typ in self._TYPES:
+            typ = self._TYPES[typ]
+        else:
+            raise IOError('Invalid object type %d at offset %d' % (typ, offset))
+        return typ, size, offset + pos, base
+
+    def inflate(self, start, size):
+        """
+        Inflate the compressed data that starts at the given offset.
+
+        :type start: int
+        :param start: The offset of the compressed data
+        :type size: int
+        :param size: The size of the inflated data
+        :rtype: bytes
+        :return: The inflated data
+        """
+        decompressor = zlib.decompressobj()
+        # Compressed data is rarely larger than the inflated data plus the zlib overhead
+        chunk_size = size + (size >> 10) + 64
+        parts = []
+        pos = start
+        while not decompressor.unused_data and pos < len(self._pack):
+            parts.append(decompressor.decompress(self._pack[pos:pos + chunk_size]))
+            pos += chunk_size
+        parts.append(decompressor.flush())
+        data = b''.join(parts)
+        if len(data) != size:
+            raise IOError('Corrupt object data at offset %d' % start)
+        return data
+
+    def delta_size(self, start):
+        """
+        Get the size of the result of a delta, only inflating the start of the delta.
+
+        :type start: int
+        :param start: The offset of the compressed delta
+        :rtype: int
+        :return: The size of the object that results from applying the delta
+        """
+        # The delta starts with the sizes of the base and the result, of at most 10 bytes each
+        length = 256
+        while True:
+            decompressor = zlib.decompressobj()
+            data = decompressor.decompress(self._pack[start:start + length], 20)
+            if len(data) >= 20 or decompressor.unused_data or start + length >= len(self._pack):
+                break
+            length *= 4
+        return self._delta_sizes(bytearray(data))[0][1]
+
+    @staticmethod
+    def _delta_sizes(delta):
+        """
+        Read the sizes at the start of a delta.
+
+        :type delta: bytearray
+        :param delta: The delta instructions, or at least their start
+        :rtype: (List[int], int)
+        :return: The size of the base and the size of the result, and the position of the first instruction
+        """
+        pos = 0
+        sizes = []
+        for _ in range(2):
+            size = 0
+            shift = 0
+            while True:
+                byte = delta[pos]
+                pos += 1
+                size |= (byte & 0x7f) << shift
+                shift += 7
+                if not byte & 0x80:
+                    break
+            sizes.append(size)
+        return sizes, pos
+
+    @staticmethod
+    def apply_delta(base, delta):
+        """
+        Apply a git delta to its base object.
+
+        :type base: bytes
+        :param base: The contents of the base object
+        :type delta: bytes
+        :param delta: The delta instructions
+        :rtype: bytes
+        :return: The contents of the resulting object
+        :raise IOError: When the delta is invalid
+        """
+        delta = bytearray(delta)
+        sizes, pos = _PackFile._delta_sizes(delta)
+        if sizes[0] != len(base):
+            raise IOError('Delta base has the wrong size')
+
+        parts = []
+        while pos < len(delta):
+            op = delta[pos]
+            pos += 1
+            if op & 0x80:
+                # Copy a range of the base, the flags tell which offset and size bytes are present
+                offset = 0
+                size = 0
+                for i in range(4):
+                    if op & (1 << i):
+                        offset |= delta[pos] << (8 * i)
+                        pos += 1
+                for i in range(3):
+                    if op & (0x10 << i):
+                        size |= delta[pos] << (8 * i)
+                        pos += 1
+                parts.append(base[offset:offset + (size or 0x10000)])
+            elif op:
+                # Insert the following op bytes
+                parts.append(bytes(delta[pos:pos + op]))
+                pos += op
+            else:
+                raise IOError('Invalid delta instruction')
+
+        result = b''.join(parts)
+        if len(result) != sizes[1]:
+            raise IOError('Delta result has the wrong size')
+        return result
+
+    def close(self):
+        """
+        Unmap the files.
+        """
+        self._idx.close()
+        self._pack.close()
+
+
+class _ObjectDatabase(object):
+    """
+    An in-process reader of the object database of a repository, as alternative to `git cat-file`.
+    Loose objects are inflated directly, packed objects are read from the memory-mapped packfiles
+    and deltas are resolved in-process. Objects that were used as delta base are kept in a cache,
+    as the objects in a delta chain usually share their bases.
+
+    Only object names of the form `<hash>`, `<hash>^{tree}` and `<hash>:<path>` are resolved,
+    anything else (like branch names) raises a ValueError so the caller can fall back to git.
+    Objects can be read from multiple threads at once, the list of packfiles and the cache are locked.
+    """
+
+    # The maximum number of bytes of delta bases kept in memory
+    _DELTA_CACHE_SIZE = 32 * 1024 * 1024
+
+    def __init__(self, objects_dir, hash_size=20):
+        """
+        Constructor for an _ObjectDatabase.
+
+        :type objects_dir: str
+        :param objects_dir: The objects folder of the repository
+        :type hash_size: int
+        :param hash_size: The number of bytes in an object hash, 20 for SHA-1 and 32 for SHA-256
+        """
+        self.hash_size = hash_size
+        # Whether commits can be parsed from their objects like `git log` shows them, None when not yet checked
+        self.log_compatible = None  # :type: bool | None
+        self._dirs = [objects_dir]
+        self._packs = OrderedDict()  # Path -> _PackFile
+        self._cache = OrderedDict()  # (path, offset) -> (type, data)
+        self._cache_size = 0
+        self._lock = threading.Lock()  # Guards the packfiles and the cache
+        self._name_regex = re.compile('^([0-9a-f]{%d})(\\^\\{tree\\}|:(.*))?$' % (2 * hash_size), re.DOTALL)
+        self._read_alternates(objects_dir)
+        self._scan_packs()
+
+    def _read_alternates(self, objects_dir):
+        """
+        Add the object folders listed in `info/alternates`, recursively.
+
+        :type objects_dir: str
+        :param objects_dir: The objects folder to read the alternates of
+        """
+        path = os.path.join(objects_dir, 'info', 'alternates')
+        if not os.path.isfile(path):
+            return
+        with open(path) as f:
+            for line in f:
+                line = line.strip()
+                if not line or line.startswith('#'):
+                    continue
+                alternate = os.path.normpath(os.path.join(objects_dir, line))
+                if alternate not in self._dirs:
+                    self._dirs.append(alternate)
+                    self._read_alternates(alternate)
+
+    def _scan_packs(self):
+        """
+        Open the packfiles that were not opened yet, for example because they were created after the last scan.
+
+        :rtype: bool
+        :return: True when new packfiles were found, False otherwise
+        """
+        found = False
+        with self._lock:
+            packs = OrderedDict(self._packs)
+            for objects_dir in self._dirs:
+                for idx_path in sorted(glob.glob(os.path.join(objects_dir, 'pack', '*.idx'))):
+                    if idx_path not in packs:
+                        try:
+                            packs[idx_path] = _PackFile(idx_path, self.hash_size)
+                            found = True
+                        except (IOError, OSError):
+                            # The packfile might still be written, try again on the next scan
+                            pass
+            # Replace the packfiles at once, as other threads might be searching them
+            self._packs = packs
+        return found
+
+    def _read_loose(self, sha):
+        """
+        Read a loose object.
+
+        :type sha: str
+        :param sha: The hash of the object
+        :rtype: (str, bytes) | None
+        :return: The type and contents of the object, or None when there is no loose object
+        """
+        for objects_dir in self._dirs:
+            path = os.path.join(objects_dir, sha[:2], sha[2:])
+            try:
+                with open(path, 'rb') as f:
+                    raw = zlib.decompress(f.read())
+            except (IOError, OSError):
+                continue
+            header, _, data = raw.partition(b'\0')
+            typ, _, size = header.partition(b' ')
+            if int(size) != len(data):
+                raise IOError('Corrupt loose object %s' % sha)
+            return typ.decode('ascii'), data
+        return None
+
+    def _loose_info(self, sha):
+        """
+        Read the type and size of a loose object, only inflating its header.
+
+        :type sha: str
+        :param sha: The hash of the object
+        :rtype: (str, int) | None
+        :return: The type and size of the object, or None when there is no loose object
+        """
+        for objects_dir in self._dirs:
+            path = os.path.join(objects_dir, sha[:2], sha[2:])
+            try:
+                with open(path, 'rb') as f:
+                    # The header is '<type> <size>' followed by a NUL character
+                    raw = zlib.decompressobj().decompress(f.read(), 32)
+            except (IOError, OSError):
+                continue
+            header = raw.partition(b'\0')[0]
+            typ, _, size = header.partition(b' ')
+            return typ.decode('ascii'), int(size)
+        return None
+
+    def _find_packed(self, key):
+        """
+        :type key: bytes
+        :param key: The binary hash of the object
+        :rtype: (_PackFile, int) | None
+        :return: The packfile containing the object and the offset in it, or None when the object is not packed
+        """
+        for pack in self._packs.values():
+            offset = pack.find(key)
+            if offset >= 0:
+                return pack, offset
+        return None
+
+    def _cache_get(self, pack, offset):
+        """
+        :type pack: _PackFile
+        :param pack: The packfile
+        :type offset: int
+        :param offset: The offset of the object in the packfile
+        :rtype: (str, bytes) | None
+        :return: The cached type and contents of the object
+        """
+        key = (id(pack), offset)
+        with self._lock:
+            entry = self._cache.pop(key, None)
+            if entry is not None:
+                # Move the entry to the end, so the least recently used entries are removed first
+                self._cache[key] = entry
+        Stats._count('delta bases', hits=entry is not None, misses=entry is None)
+        return entry
+
+    def _cache_put(self, pack, offset, entry):
+        """
+        Add an object that is used as a delta base to the cache.
+
+        :type pack: _PackFile
+        :param pack: The packfile
+        :type offset: int
+        :param offset: The offset of the object in the packfile
+        :type entry: (str, bytes)
+        :param entry: The type and contents of the object
+        """
+        size = len(entry[1])
+        if size > self._DELTA_CACHE_SIZE // 4:
+            return
+        key = (id(pack), offset)
+        with self._lock:
+            if key in self._cache:
+                return
+            self._cache[key] = entry
+            self._cache_size += size
+            while self._cache_size > self._DELTA_CACHE_SIZE:
+                _, old = self._cache.popitem(last=False)
+                self._cache_size -= len(old[1])
+
+    def _read_packed(self, pack, offset):
+        """
+        Read a packed object, resolving its delta chain without recursion.
+
+        :type pack: _PackFile
+        :param pack: The packfile
+        :type offset: int
+        :param offset: The offset of the object in the packfile
+        :rtype: (str, bytes)
+        :return: The type and contents of the object
+        """
+        chain = []
+        while True:
+            entry = self._cache_get(pack, offset)
+            if entry is not None:
+                break
+            typ, size, start, base = pack.header(offset)
+            if typ == _PackFile.OFS_DELTA:
+                chain.append((pack, offset, start, size))
+                offset = base
+            elif typ == _PackFile.REF_DELTA:
+                chain.append((pack, offset, start, size))
+                location = self._find_packed(base)
+                if location is None:
+                    entry = self.read(binascii.hexlify(base).decode('ascii'))
+                    if entry is None:
+                        raise IOError('Missing delta base %s' % binascii.hexlify(base).decode('ascii'))
+                    break
+                pack, offset = location
+            else:
+                entry = (typ, pack.inflate(start, size))
+                if chain:
+                    self._cache_put(pack, offset, entry)
+                break
+
+        typ, data = entry
+        for i in range(len(chain) - 1, -1, -1):
+            delta_pack, delta_offset, start, size = chain[i]
+            data = _PackFile.apply_delta(data, delta_pack.inflate(start, size))
+            if i:
+                self._cache_put(delta_pack, delta_offset, (typ, data))
+        return typ, data
+
+    def read(self, sha):
+        """
+        Read an object by its hash.
+
+        :type sha: str
+        :param sha: The hash of the object
+        :rtype: (str, bytes) | None
+        :return: The type and contents of the object, or None when it does not exist
+        """
+        key = binascii.unhexlify(sha)
+        location = self._find_packed(key)
+        if location is None:
+            loose = self._read_loose(sha)
+            if loose is not None:
+                return loose
+            # The object might have been packed since the packfiles were scanned
+            if not self._scan_packs():
+                return None
+            location = self._find_packed(key)
+            if location is None:
+                return None
+        return self._read_packed(*location)
+
+    def _packed_info(self, pack, offset):
+        """
+        Read the type and size of a packed object from the headers of its delta chain, without inflating it.
+
+        :type pack: _PackFile
+        :param pack: The packfile
+        :type offset: int
+        :param offset: The offset of the object in the packfile
+        :rtype: (str, int)
+        :return: The type and size of the object
+        """
+        typ, size, start, base = pack.header(offset)
+        if typ in (_PackFile.OFS_DELTA, _PackFile.REF_DELTA):
+            size = pack.delta_size(start)
+        # A delta has the type of the object at the end of its chain
+        while typ in (_PackFile.OFS_DELTA, _PackFile.REF_DELTA):
+            if typ == _PackFile.OFS_DELTA:
+                offset = base
+            else:
+                location = self._find_packed(base)
+                if location is None:
+                    info = self.info(binascii.hexlify(base).decode('ascii'))
+                    if info is None:
+                        raise IOError('Missing delta base %s' % binascii.hexlify(base).decode('ascii'))
+                    return info[0], size
+                pack, offset = location
+            typ, _, _, base = pack.header(offset)
+        return typ, size
+
+    def info(self, sha):
+        """
+        Read the type and size of an object by its hash, like `git cat-file --batch-check`.
+        Only the headers of the object are read, its contents are not inflated.
+
+        :type sha: str
+        :param sha: The hash of the object
+        :rtype: (str, int) | None
+        :return: The type and size of the object, or None when it does not exist
+        """
+        key = binascii.unhexlify(sha)
+        location = self._find_packed(key)
+        if location is None:
+            loose = self._loose_info(sha)
+            if loose is not None:
+                return loose
+            # The object might have been packed since the packfiles were scanned
+            if not self._scan_packs():
+                return None
+            location = self._find_packed(key)
+            if location is None:
+                return None
+        return self._packed_info(*location)
+
+    def _peel_tree(self, sha):
+        """
+        Get the tree of a commit or tag.
+
+        :type sha: str
+        :param sha: The hash of a commit, tag or tree
+        :rtype: (str, bytes) | None
+        :return: The hash and contents of the tree, or None when the object does not exist or has no tree
+        """
+        while True:
+            entry = self.read(sha)
+            if entry is None:
+                return None
+            typ, data = entry
+            if typ == 'tree':
+                return sha, data
+            if typ == 'commit' and data.startswith(b'tree '):
+                sha = data[5:5 + 2 * self.hash_size].decode('ascii')
+            elif typ == 'tag' and data.startswith(b'object '):
+                sha = data[7:7 + 2 * self.hash_size].decode('ascii')
+            else:
+                return None
+
+    def read_tree(self, data):
+        """
+        Parse the contents of a tree object.
+
+        :type data: bytes
+        :param data: The contents of the tree
+        :rtype: List[(bytes, bytes, str)]
+        :return: The mode, name and hash of each entry
+        """
+        entries = []
+        pos = 0
+        while pos < len(data):
+            space = data.index(b' ', pos)
+            nul = data.index(b'\0', space)
+            sha = binascii.hexlify(data[nul + 1:nul + 1 + self.hash_size]).decode('ascii')
+            entries.append((data[pos:space], data[space + 1:nul], sha))
+            pos = nul + 1 + self.hash_size
+        return entries
+
+    def lookup(self, obj, check_only=False):
+        """
+        Resolve and read an object, giving the same result as `git cat-file --batch`.
+
+        :type obj: str
+        :param obj: The object to read, of the form `<hash>`, `<hash>^{tree}` or `<hash>:<path>`
+        :type check_only: bool
+        :param check_only: Whether to only read the type and size, like `git cat-file --batch-check`
+        :rtype: (str, str, int, bytes | None) | None
+        :return: The hash, type, size and contents of the object (None when only checked),
+                 or None when it does not exist
+        :raise ValueError: When the object name cannot be resolved in-process
+        """
+        match = self._name_regex.match(obj)
+        if not match:
+            raise ValueError('Cannot resolve %s' % obj)
+        sha, suffix, path = match.group(1), match.group(2), match.group(3)
+
+        if suffix is None:
+            if check_only:
+                info = self.info(sha)
+                return (sha, info[0], info[1], None) if info else None
+            entry = self.read(sha)
+            return (sha, entry[0], len(entry[1]), entry[1]) if entry else None
+
+        tree = self._peel_tree(sha)
+        if tree is None:
+            return None
+        sha, data = tree
+        typ = 'tree'
+        names = path.strip('/').split('/') if path else []
+        for i, name in enumerate(names):
+            if typ != 'tree':
+                return None
+            name = name.encode('utf-8')
+            for _, entry_name, entry_sha in self.read_tree(data):
+                if entry_name == name:
+                    break
+            else:
+                return None
+            if check_only and i == len(names) - 1:
+                # The folders on the path are read, but the object itself is not
+                info = self.info(entry_sha)
+                return (entry_sha, info[0], info[1], None) if info else None
+            entry = self.read(entry_sha)
+            if entry is None:
+                # For example a submodule, of which the commit is not in this repository
+                return None
+            sha, (typ, data) = entry_sha, entry
+        return sha, typ, len(data), None if check_only else data
+
+    def close(self):
+        """
+        Unmap all packfiles and clear the cache.
+        """
+        with self._lock:
+            for pack in self._packs.values():
+                pack.close()
+            self._packs = OrderedDict()
+            self._cache = OrderedDict()
+            self._cache_size = 0
@@ -0,0 +1,175 @@
+import threading
+from array import array
+
+import gitcovery
+from .git import Git
+
+
+class _HeadIndex(object):
+    """
+    An index of the history of HEAD, built from a single pass over the history.
+    When HEAD moves to a descendant, only the new commits are indexed, otherwise the index is built again.
+    """
+
+    def __init__(self, repository):
+        """
+        Constructor for a _HeadIndex. The index itself is only built on the first lookup.
+
+        :type repository: Repository
+        :param repository: The repository to index
+        """
+        self._repo = repository
+        # The hash of the commit that HEAD pointed to when the index was last updated
+        self._head = None  # :type: str | None
+        self._lock = threading.Lock()
+
+    def _clear(self):
+        """
+        Remove all the indexed commits.
+        """
+        raise NotImplementedError()
+
+    def _index(self, revisions):
+        """
+        Index the commits in the given revisions, in front of the commits that are already indexed.
+
+        :type revisions: List[str]
+        :param revisions: The revisions to index the commits of
+        """
+        raise NotImplementedError()
+
+    def _update(self):
+        """
+        Make sure the index is up to date with HEAD, the lock must be held.
+        """
+        head = self._repo.get_head()
+        if head.sha == self._head:
+            return
+        if self._head is not None and \
+                gitcovery.CommitGraph.is_ancestor(gitcovery.Commit(self._head, repository=self._repo), head):
+            revisions = Git._revisions_since([head.sha], [self._head])
+        else:
+            self._clear()
+            revisions = [head.sha]
+        self._index(revisions)
+        self._head = head.sha
+
+
+class _PathIndex(_HeadIndex):
+    """
+    An index of the commits that changed every path in the history of HEAD, built from a single `git log`.
+    Every file is mapped to the commits that changed it, and every folder to the commits that changed a file in it.
+    A commit changed a path when its contents differ from those in all the parents of the commit,
+    like the commits that `git log <path>` lists. Unlike `git log <path>`, commits on a side branch
+    whose changes to the path were discarded by a merge are not hidden.
+    """
+
+    def __init__(self, repository):
+        """
+        Constructor for a _PathIndex. The index itself is only built on the first lookup.
+
+        :type repository: Repository
+        :param repository: The repository to index
+        """
+        super(_PathIndex, self).__init__(repository)
+        # The rows of the commits that changed every path, newest first
+        self._paths = {}  # :type: Dict[str, array]
+
+    @staticmethod
+    def _keys(paths):
+        """
+        :type paths: List[str]
+        :param paths: The changed files
+        :rtype: Set[str]
+        :return: The files and all the folders that contain them, relative to the root
+        """
+        keys = set()
+        for path in paths:
+            while path and path not in keys:
+                keys.add(path)
+                path = path.rpartition('/')[0]
+        return keys
+
+    def _clear(self):
+        self._paths = {}
+
+    def _index(self, revisions):
+        table = self._repo._table
+        added = {}
+        for sha, changes in self._repo.get_backend().log_paths(revisions):
+            keys = self._keys(changes[0])
+            for paths in changes[1:]:
+                keys &= self._keys(paths)
+            if not keys:
+                continue
+            row = table.intern(sha)
+            for key in keys:
+                rows = added.get(key)
+                if rows is None:
+                    rows = added[key] = array('i')
+                rows.append(row)
+
+        for key, rows in added.items():
+            old = self._paths.get(key)
+            if old is not None:
+                rows.extend(old)
+            self._paths[key] = rows
+
+    def history(self, path):
+        """
+        Get the commits that changed a path.
+
+        :type path: str
+        :param path: The path of a file or folder, relative to the root of the repository
+        :rtype: List[Commit]
+        :return: The commits, new -> old
+        """
+        with self._lock:
+            self._update()
+            rows = self._paths.get(path.strip('/'), ())
+        return [gitcovery.Commit._from_id(row, self._repo) for row in rows]
+
+
+class _RenameMap(_HeadIndex):
+    """
+    A map of the renames in the history of HEAD, built from a single `git log -M`.
+    Every path is mapped to the commits that renamed another file to it.
+    """
+
+    def __init__(self, repository):
+        """
+        Constructor for a _RenameMap. The map itself is only built on the first lookup.
+
+        :type repository: Repository
+        :param repository: The repository to index
+        """
+        super(_RenameMap, self).__init__(repository)
+        # The rows of the commits that renamed a file to every path and the old path, newest first
+        self._renames = {}  # :type: Dict[str, List[(int, str)]]
+
+    def _clear(self):
+        self._renames = {}
+
+    def _index(self, revisions):
+        table = self._repo._table
+        added = {}
+        for sha, renames in self._repo.get_backend().log_renames(revisions):
+            row = table.intern(sha)
+            for old, new in renames:
+                added.setdefault(new, []).append((row, old))
+
+        for path, renames in added.items():
+            self._renames[path] = renames + self._renames.get(path, [])
+
+    def sources(self, path):
+        """
+        Get the files that were renamed to a path.
+
+        :type path: str
+        :param path: The path of a file, relative to the root of the repository
+        :rtype: Dict[int, str]
+        :return: The old path by the id of the commit that renamed it to the path
+        """
+        with self._lock:
+            self._update()
+            return dict(self._renames.get(path, ()))
@@ -0,0 +1,822 @@
+import atexit
+import calendar
+import contextlib
+import datetime
+import os
+import re
+import threading
+import time
+import weakref
+
+import gitcovery
+from .blobs import _BlobCache
+from .git import Git
+from .pathindex import _PathIndex, _RenameMap
+from .store import _CommitStore
+from .table import CommitTable
+from .treecache import _TreeCache
+from .worktree import _WorktreePool
+
+
+class _KeyLocks(object):
+    """
+    Locks per key, so a value is loaded by a single thread while other threads that need it wait for the result.
+    A lock only exists while a thread is holding or waiting for it.
+    """
+
+    def __init__(self):
+        """
+        Constructor for _KeyLocks.
+        """
+        self._lock = threading.Lock()
+        self._locks = {}  # Key -> [lock, number of threads holding or waiting for it]
+
+    @contextlib.contextmanager
+    def hold(self, key):
+        """
+        Hold the lock of a key for the duration of a with statement.
+
+        :type key: object
+        :param key: The key to lock
+        """
+        with self._lock:
+            entry = self._locks.get(key)
+            if entry is None:
+                entry = self._locks[key] = [threading.RLock(), 0]
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self._lock:
+                entry[1] -= 1
+                if not entry[1]:
+                    del self._locks[key]
+
+
+class Repository(object):
+    """
+    A repository that is being analysed.
+    A repository owns the backend used to access it and the caches of everything that was loaded from it,
+    like the commit table, the authors, the tags and HEAD.
+    This makes it possible to analyse multiple repositories at once, for example from different threads.
+
+    The classmethods of `Git`, `Commit` and `Author` use the current repository of the calling thread.
+    This is the default repository, unless another repository is activated using a `with` statement:
+    `with Repository.open(<path>) as repo: Author.list()`.
+    Commits, authors and files remember the repository they belong to,
+    so they can also be used after leaving the `with` statement.
+
+    The caches of a repository can be used from multiple threads at once.
+    Values that are loaded lazily, like the metadata of a commit or the tags, are only loaded by a single thread,
+    while the other threads that need the same value wait for it.
+    """
+    # The repository used when no other repository is active
+    _default = None  # :type: Repository
+    # The stacks of active repositories, per thread
+    _local = threading.local()
+    # All the repositories, so they can be closed when exiting the interpreter
+    _instances = weakref.WeakSet()
+
+    def __init__(self, backend=None):
+        """
+        Constructor for a Repository.
+        Without a backend, the root must be set (see `Repository.set_root()`) before the repository can be used.
+
+        :type backend: Backend
+        :param backend: Optional backend to access the repository with, like a `MemoryBackend`
+        """
+        # The root of the repository, `None` when the root is not set.
+        self.root = None  # :type: GitFolder
+        self._backend = None  # :type: Backend | None
+        self._object_reader_enabled = False  # :type: bool
+
+        self._tags = None  # :type: Dict[str, Commit] | None
+        self._head = None  # :type: Commit | None
+        self._initial_commits = []  # :type: List[Commit]
+
+        self._table = CommitTable()  # :type: CommitTable
+        self._authors = {}  # :type: Dict[str, Author]
+        # The tips that were loaded by `Commit.load_all()`, without and with diffs
+        self._commit_tips = {False: [], True: []}  # :type: Dict[bool, List[str]]
+        # The tips of which the authors are loaded
+        self._author_tips = []  # :type: List[str]
+
+        self._store_enabled = False  # :type: bool
+        self._store_path = None  # :type: str | None
+        self._store = None  # :type: _CommitStore | None
+
+        self._path_index_enabled = False  # :type: bool
+        self._path_index = None  # :type: _PathIndex | None
+        self._rename_map = None  # :type: _RenameMap | None
+        self._blobs = _BlobCache()  # :type: _BlobCache
+        self._trees = _TreeCache()  # :type: _TreeCache
+        self._worktree_limit = None  # :type: int | None
+        self._worktrees = None  # :type: _WorktreePool | None
+
+        # Guards the refs and the on-disk cache
+        self._lock = threading.RLock()
+        # Guards the authors, which are all loaded at once
+        self._authors_lock = threading.RLock()
+        # Locks per commit id, so every commit is only loaded by a single thread
+        self._commit_locks = _KeyLocks()
+
+        self._instances.add(self)
+        if backend:
+            self.set_backend(backend)
+
+    @classmethod
+    def open(cls, root):
+        """
+        Create a repository for the git repository at the given location.
+
+        :type root: str
+        :param root: The path to the root of the repository
+        :rtype: Repository
+        :return: The repository
+        """
+        repository = cls()
+        repository.set_root(root)
+        return repository
+
+    @classmethod
+    def current(cls):
+        """
+        Get the repository that is active in the calling thread.
+
+        :rtype: Repository
+        :return: The innermost repository activated with a `with` statement, or the default repository
+        """
+        stack = getattr(cls._local, 'stack', None)
+        return stack[-1] if stack else cls._default
+
+    def __enter__(self):
+        """
+        Make this repository the current repository of the calling thread.
+
+        :rtype: Repository
+        :return: This repository
+        """
+        if not hasattr(self._local, 'stack'):
+            self._local.stack = []
+        self._local.stack.append(self)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """
+        Make the previously active repository the current repository of the calling thread again.
+
+        :type exc_type: type
+        :param exc_type: The type of the exception that is raised in the with statement, if any
+        :type exc_value: Exception
+        :param exc_value: The exception that is raised in the with statement, if any
+        :type traceback: traceback
+        :param traceback: The traceback of the exception, if any
+        """
+        self._local.stack.pop()
+
+    def _verify_root(self):
+        """
+        Verify that the root is set, otherwise throws an exception.
+        This does not validate the root, as this is already done while setting the root.
+
+        :raise: Exception, when the root is not set
+        """
+        if not self.root:
+            raise Exception('Please set the git root first')
+
+    def clone(self, loc, address, update=False):
+        """
+        Clone a git repository to the specified location and set the root of this repository to it,
+        see `Git.clone()`.
+
+        :type update: bool
+        :param update: whether to update the repository when already cloned
+        :type loc: str
+        :param loc: The location to clone to
+        :type address: str
+        :param address: The location of the repository to clone
+        :rtype: GitFolder
+        :return: A reference to the root
+        """
+        name = re.search('/(?P<name>[^/]+)\.git$', address).group('name')
+        loc = loc[0:-1] if loc.endswith('/') else loc
+        if not os.path.exists(loc):
+            os.mkdir(loc)
+        path = loc + os.sep + name
+        if not os.path.isdir(path):
+            Git.call(['clone', address], root=loc)
+        elif update:
+            self.set_root(path)
+            self.update()
+        return self.set_root(path)
+
+    def checkout(self, name):
+        """
+        Checkout a specific branch in the repository, see `Git.checkout()`.
+
+        :type name: str
+        :param name: The name of the branch to checkout
+        :rtype: GitFolder
+        :return: A reference to the root
+        """
+        self._verify_root()
+        Git.call(['checkout', name], root=self.root.path)
+        return self.set_root(self.root.path)
+
+    def update(self):
+        """
+        Update the repository tho the latest version on the current branch, see `Git.update()`.
+
+        :rtype: GitFolder
+        :return: The root of the repository
+        """
+        self._verify_root()
+
+        Git.call(['fetch', '--all'], root=self.root.path)
+        Git.call(['pull'], root=self.root.path)
+
+        # Update the root as its contents might have changed
+        return self.set_root(self.root.path)
+
+    def set_root(self, root):
+        """
+        Set the root of the repository to the specified location, see `Git.set_root()`.
+
+        :type root: str
+        :param root: The path to the root of the repository.
+        :rtype: GitFolder
+        :return: A reference to the root
+        """
+        if root == '':
+            # Converting this to a . is easy, but it might not be what the user wants.
+            # Therefore the error is thrown containing a possible solution.
+            raise Exception('Using the current directory is only supported by setting the root to \'.\'')
+        folder = gitcovery.GitFolder(root)
+        folder._repo = self
+        if isinstance(self._backend, gitcovery.GitBackend) and self._backend.root == folder.path:
+            # The same repository, so the loaded commits and authors remain valid
+            self.close()
+            self._clear_refs()
+        else:
+            self.set_backend(gitcovery.GitBackend(folder.path, object_reader=self._object_reader_enabled))
+        self.root = folder
+
+        # Check if the root is a git repository
+        try:
+            folder.status()
+        except IOError:
+            raise Exception('%s is not a Git repository' % root)
+
+        return folder
+
+    def set_backend(self, backend):
+        """
+        Set the backend that is used to access the repository, see `Git.set_backend()`.
+
+        :type backend: Backend
+        :param backend: The backend to use
+        """
+        self.close()
+        self._backend = backend
+        self.root = None
+        self._clear_refs()
+        self._commit_tips = {False: [], True: []}
+        self._author_tips = []
+        self._path_index = None
+        self._rename_map = None
+        self._blobs.clear()
+        self._trees.clear()
+
+    def _clear_refs(self):
+        """
+        Clear the cached tags, HEAD and initial commits, as the refs might have changed.
+        """
+        with self._lock:
+            self._tags = None
+            self._head = None
+            self._initial_commits = []
+
+    def get_backend(self):
+        """
+        Get the backend that is used to access the repository.
+
+        :rtype: Backend
+        :return: The current backend
+        :raise: Exception, when no backend is set
+        """
+        if not self._backend:
+            raise Exception('Please set the git root first')
+        return self._backend
+
+    def enable_object_reader(self):
+        """
+        Read git objects in-process instead of through `git cat-file`, see `Git.enable_object_reader()`.
+        """
+        self._object_reader_enabled = True
+        if isinstance(self._backend, gitcovery.GitBackend):
+            self._backend.set_object_reader(True)
+
+    def disable_object_reader(self):
+        """
+        Read git objects through `git cat-file` again.
+        """
+        self._object_reader_enabled = False
+        if isinstance(self._backend, gitcovery.GitBackend):
+            self._backend.set_object_reader(False)
+
+    def read_object(self, obj):
+        """
+        Read the raw contents of a git object.
+
+        :type obj: str
+        :param obj: The object to read, for example a SHA hash or `<commit>:<path>`
+        :rtype: (str, bytes)
+        :return: The type of the object and its raw contents
+        :raise IOError: When the object does not exist
+        """
+        result = self.get_backend().read_object(obj)
+        if not result:
+            raise IOError('Object %s does not exist' % obj)
+        return result[1], result[3]
+
+    def cat_file(self, obj):
+        """
+        Get the decoded contents of a git object.
+
+        :type obj: str
+        :param obj: The object to read, for example a SHA hash or `<commit>:<path>`
+        :rtype: str
+        :return: The contents of the object
+        :raise IOError: When the object does not exist
+        """
+        return Git._decode(self.read_object(obj)[1])
+
+    def object_info(self, obj):
+        """
+        Get the SHA hash, type and size of a git object without reading its contents.
+
+        :type obj: str
+        :param obj: The object to query, for example a SHA hash or `<commit>:<path>`
+        :rtype: (str, str, int)
+        :return: The SHA hash, type and size of the object
+        :raise IOError: When the object does not exist
+        """
+        result = self.get_backend().read_object(obj, check_only=True)
+        if not result:
+            raise IOError('Object %s does not exist' % obj)
+        return result[0], result[1], result[2]
+
+    def read_tree(self, obj):
+        """
+        Get the entries of a tree object.
+
+        :type obj: str
+        :param obj: The tree to read, for example a tree hash or `<commit>:<path>`
+        :rtype: List[(str, str, str)]
+        :return: The mode, SHA hash and name of each entry
+        :raise IOError: When the object does not exist or is not a tree
+        """
+        return [(mode, sha, Git._decode(name)) for mode, sha, name in self.get_backend().list_tree(obj)]
+
+    def tree_at(self, commit):
+        """
+        Get a read-only snapshot of the files in the repository at a commit, see `Git.tree_at()`.
+
+        :type commit: Commit | str
+        :param commit: The commit, or any revision that resolves to a commit, like a tag name
+        :rtype: TreeFolder
+        :return: The root folder of the snapshot
+        :raise IOError: When the revision does not resolve to a commit
+        """
+        # Any other value is a revision, also unicode revisions on Python 2
+        if not isinstance(commit, gitcovery.Commit):
+            commit = self.get_commit(self.get_backend().rev_parse(commit + '^{commit}'))
+        sha = self.object_info(commit.sha + '^{tree}')[0]
+        return gitcovery.TreeFolder(self, commit, '', sha)
+
+    def compare(self, from_commit, to_commit, numstat=False):
+        """
+        Compare the snapshots of the repository at two commits, see `Git.compare()`.
+
+        :type from_commit: Commit | str
+        :param from_commit: The old commit, or any revision that resolves to a commit
+        :type to_commit: Commit | str
+        :param to_commit: The new commit, or any revision that resolves to a commit
+        :type numstat: bool
+        :param numstat: Whether to also count the added and removed lines of every changed file
+        :rtype: TreeDiff
+        :return: The changes between the commits
+        :raise IOError: When a revision does not resolve to a commit
+        """
+        return self.tree_at(from_commit).compare(self.tree_at(to_commit), numstat=numstat)
+
+    def set_blob_cache_size(self, size):
+        """
+        Set the maximum size of the cache of file contents, see `Git.set_blob_cache_size()`.
+
+        :type size: int
+        :param size: The maximum number of bytes, 0 disables the cache
+        """
+        self._blobs.set_max_size(size)
+
+    def _read_blob(self, sha):
+        """
+        Read the contents of a blob, from the cache of file contents when possible.
+
+        :type sha: str
+        :param sha: The SHA hash of the blob
+        :rtype: bytes
+        :return: The contents of the blob
+        :raise IOError: When the blob does not exist
+        """
+        data = self._blobs.get(sha)
+        if data is None:
+            data = self.read_object(sha)[1]
+            self._blobs.put(sha, data)
+        return data
+
+    def enable_store(self, path=None):
+        """
+        Enable the on-disk cache of commit metadata, see `Git.enable_store()`.
+
+        :type path: str
+        :param path: Optional path of the cache file
+        """
+        self._store_enabled = True
+        self._store_path = path
+
+    def disable_store(self):
+        """
+        Disable the on-disk cache of commit metadata. The cache file itself is not removed.
+        """
+        self._store_enabled = False
+        self._store_path = None
+        with self._lock:
+            if self._store:
+                self._store.close()
+                self._store = None
+
+    def _get_store(self):
+        """
+        Get the on-disk cache of commit metadata, opening it when needed.
+
+        :rtype: _CommitStore | None
+        :return: The cache, or None when it is not enabled
+        """
+        if not self._store_enabled:
+            return None
+        with self._lock:
+            if not self._store:
+                path = self._store_path
+                if not path:
+                    git_dir = Git.call(['rev-parse', '--git-common-dir'], root=self.root.path).strip()
+                    path = os.path.join(self.root.path, git_dir, 'gitcovery', 'commits.sqlite')
+                self._store = _CommitStore(path)
+            return self._store
+
+    def enable_path_index(self):
+        """
+        Enable the index of the commits that changed every path, see `Git.enable_path_index()`.
+        """
+        self._path_index_enabled = True
+
+    def disable_path_index(self):
+        """
+        Disable the index of the commits that changed every path and free its memory.
+        """
+        self._path_index_enabled = False
+        with self._lock:
+            self._path_index = None
+
+    def _get_path_index(self):
+        """
+        Get the index of the commits that changed every path, creating it when needed.
+
+        :rtype: _PathIndex | None
+        :return: The index, or None when it is not enabled
+        """
+        if not self._path_index_enabled:
+            return None
+        with self._lock:
+            if not self._path_index:
+                self._path_index = _PathIndex(self)
+            return self._path_index
+
+    def _get_rename_map(self):
+        """
+        Get the map of the renames in the history of HEAD, creating it when needed.
+
+        :rtype: _RenameMap
+        :return: The map
+        """
+        with self._lock:
+            if not self._rename_map:
+                self._rename_map = _RenameMap(self)
+            return self._rename_map
+
+    def write_commit_graph(self, force=False):
+        """
+        Let git write a commit-graph file for all reachable commits, see `Git.write_commit_graph()`.
+
+        :type force: bool
+        :param force: Whether to rewrite an existing commit-graph, for example to include new commits
+        :rtype: bool
+        :return: True when the commit-graph was written, False otherwise
+        :raise IOError: When git fails to write the commit-graph
+        """
+        backend = self.get_backend()
+        if not isinstance(backend, gitcovery.GitBackend):
+            raise Exception('A commit-graph can only be written for a git repository')
+        return backend.write_commit_graph(force=force)
+
+    def lease_worktree(self, commit):
+        """
+        Lease a worktree with a commit checked out, see `Git.lease_worktree()`.
+
+        :type commit: Commit | str
+        :param commit: The commit, or any revision that resolves to a commit, like a tag name
+        :rtype: ContextManager[GitFolder]
+        :return: A context manager that gives the root of the worktree
+        :raise IOError: When the revision does not resolve to a commit
+        """
+        self._verify_root()
+        sha = commit.sha if isinstance(commit, gitcovery.Commit) else self.get_backend().rev_parse(commit + '^{commit}')
+        with self._lock:
+            if not self._worktrees:
+                self._worktrees = _WorktreePool(self, limit=self._worktree_limit)
+            return self._worktrees.lease(sha)
+
+    def set_worktree_limit(self, limit):
+        """
+        Set the maximum number of worktrees, see `Git.set_worktree_limit()`.
+
+        :type limit: int
+        :param limit: The maximum number of worktrees
+        """
+        with self._lock:
+            self._worktree_limit = limit
+            if self._worktrees:
+                self._worktrees.set_limit(limit)
+
+    def remove_worktrees(self):
+        """
+        Remove the worktrees that are not leased, see `Git.remove_worktrees()`.
+        """
+        with self._lock:
+            worktrees = self._worktrees
+        if worktrees:
+            worktrees.close()
+
+    def close(self):
+        """
+        Stop the background processes and close all the opened files of this repository.
+        These are reopened automatically when needed.
+        """
+        if self._backend:
+            self._backend.close()
+        with self._lock:
+            if self._store:
+                self._store.close()
+                self._store = None
+
+    @classmethod
+    def _close_all(cls):
+        """
+        Close all the repositories, which is done when exiting the interpreter.
+        """
+        for repository in list(cls._instances):
+            repository.remove_worktrees()
+            repository.close()
+
+    def get_commit(self, sha):
+        """
+        Get the commit with the given hash in this repository.
+
+        :type sha: str
+        :param sha: The SHA hash of the commit, or any other revision that resolves to a commit
+        :rtype: Commit
+        :return: The commit
+        """
+        return gitcovery.Commit(sha, repository=self)
+
+    def get_tags(self):
+        """
+        Get a list of all the tags of this repository.
+
+        :rtype: List[str]
+        :return: A list of all tags, without ordering.
+        """
+        with self._lock:
+            if self._tags is None:
+                tags = {}
+                for ref, sha in self.get_backend().resolve_refs().items():
+                    if ref.startswith('refs/tags/'):
+                        tags[ref[len('refs/tags/'):]] = self.get_commit(sha)
+                self._tags = tags
+            return list(self._tags.keys())
+
+    def get_tags_by_commit(self):
+        """
+        Get a list of all the tags and their commit in the following format: [(Commit, tag), ...]
+
+        :rtype: (List[(Commit, str)])
+        :return: A list of all tags and commits.
+        """
+        self.get_tags()
+        tags = self._tags
+        return list(map(lambda tag: (tags[tag], tag), tags.keys()))
+
+    def get_tag(self, tag):
+        """
+        Get the Commit associated with the given tag.
+
+        :type tag: str
+        :param tag: The tag to get the Commit from
+        :rtype: Commit
+        :return: The commit associated with the tag
+        """
+        self.get_tags()
+        return self._tags[tag]
+
+    def get_initial_commits(self):
+        """
+        Get the initial commits of this repository.
+
+        :rtype: List[Commit]
+        :return: A list of initial commits
+        """
+        with self._lock:
+            if not self._initial_commits:
+                self._initial_commits = [self.get_commit(sha) for sha, _, parents
+                                         in self.get_backend().graph_records(['HEAD']) if not parents]
+            return self._initial_commits
+
+    def _get_tips(self):
+        """
+        Get the commits that HEAD and all the refs in the repository point to.
+
+        :rtype: List[str]
+        :return: The sorted hashes of the tips, without duplicates
+        """
+        return sorted(set(self.get_backend().resolve_refs().values()))
+
+    def get_head(self):
+        """
+        Get the commit associated with HEAD.
+
+        :rtype: Commit
+        :return: The commit at HEAD
+        """
+        with self._lock:
+            if not self._head:
+                self._head = self.get_commit(self.get_backend().rev_parse('HEAD'))
+            return self._head
+
+    def history(self, path=None, follow=False, revision='HEAD'):
+        """
+        Get the commits that changed a path, like `git log <path>`.
+        When the path index is enabled (see `Git.enable_path_index()`), the commits are looked up in the index.
+        The commits are returned together, so they are loaded in batches (see `Commit.load()`).
+
+        :type path: str
+        :param path: The path relative to the root of the repository, by default the whole history is returned
+        :type follow: bool
+        :param follow: Whether to continue the history of a file before it was renamed, see `GitFile.history()`
+        :type revision: str
+        :param revision: The revision to list the history of, by default HEAD
+        :rtype: List[Commit]
+        :return: The commits, new -> old
+        """
+        relative = path and path != '.' and not os.path.isabs(path)
+        if follow and relative:
+            commits = [commit for commit, _ in self._follow(path, revision=revision)]
+            gitcovery.Commit._group(commits)
+            return commits
+
+        index = self._get_path_index() if relative and revision == 'HEAD' else None
+        if index:
+            commits = index.history(path)
+        else:
+            commits = [self.get_commit(sha) for sha in self.get_backend().rev_list([revision], path=path)]
+        gitcovery.Commit._group(commits)
+        return commits
+
+    def _follow(self, path, revision='HEAD'):
+        """
+        Get the commits that changed a file, continuing with the history of the old path at every rename.
+        The renames are looked up in the rename map of the repository, so the history of every path is only
+        walked until the commit that renamed a file to that path.
+        Only the renames in the history of HEAD are in the rename map.
+
+        :type path: str
+        :param path: The path of the file relative to the root of the repository
+        :type revision: str
+        :param revision: The revision to start the history at, by default HEAD
+        :rtype: List[(Commit, str)]
+        :return: The commits, new -> old, and the path of the file in each commit
+        """
+        renames = self._get_rename_map()
+        result = []
+        seen = set()
+        while (revision, path) not in seen:
+            seen.add((revision, path))
+            if revision == 'HEAD':
+                commits = self.history(path)
+            else:
+                commits = [self.get_commit(sha) for sha in self.get_backend().rev_list([revision], path=path)]
+
+            sources = renames.sources(path)
+            renamed = None
+            for commit in commits:
+                result.append((commit, path))
+                if commit._id in sources:
+                    renamed = commit
+                    break
+            if not renamed:
+                break
+
+            parents = gitcovery.CommitGraph._parents(self, renamed._id)
+            if not parents:
+                break
+            revision = self._table.sha(parents[0])
+            path = sources[renamed._id]
+        return result
+
+    @staticmethod
+    def _to_timestamp(value):
+        """
+        :type value: datetime.datetime | int | None
+        :param value: A datetime, naive datetimes are in local time, or a unix timestamp
+        :rtype: int | None
+        :return: The unix timestamp
+        """
+        if value is None:
+            return None
+        if isinstance(value, datetime.datetime):
+            if value.tzinfo is None:
+                return int(time.mktime(value.timetuple()))
+            return calendar.timegm(value.utctimetuple())
+        return int(value)
+
+    def iter_history(self, path=None, limit=None, since=None, until=None, first_parent=False, revision='HEAD'):
+        """
+        Iterate over the commits that changed a path, see `_AbsGitFile.iter_history()`.
+
+        :type path: str
+        :param path: The path relative to the root of the repository, by default the whole history is listed
+        :type limit: int
+        :param limit: Optional maximum number of commits
+        :type since: datetime.datetime | int
+        :param since: Optional datetime or unix timestamp, only the commits that were committed at or after it
+        :type until: datetime.datetime | int
+        :param until: Optional datetime or unix timestamp, only the commits that were committed at or before it
+        :type first_parent: bool
+        :param first_parent: Whether to only follow the first parent of merges
+        :type revision: str
+        :param revision: The revision to list the history of, by default HEAD
+        :rtype: Iterator[Commit]
+        :return: The commits, new -> old
+        """
+        shas = self.get_backend().rev_list([revision], path=path, limit=limit, since=self._to_timestamp(since),
+                                           until=self._to_timestamp(until), first_parent=first_parent)
+        # The pages double in size, so the first commits are produced right away
+        # while the later commits are still loaded in large batches
+        page = []
+        size = 1
+        try:
+            for sha in shas:
+                page.append(self.get_commit(sha))
+                if len(page) < size:
+                    continue
+                gitcovery.Commit._group(page)
+                for commit in page:
+                    yield commit
+                page = []
+                size = min(size * 2, max(gitcovery.Commit._batch_window, 1))
+            gitcovery.Commit._group(page)
+            for commit in page:
+                yield commit
+        finally:
+            # Stop the walk when the iteration is stopped early
+            if hasattr(shas, 'close'):
+                shas.close()
+
+    def history_async(self, path=None, revision='HEAD'):
+        """
+        Get the commits that changed a path from asyncio, see `Git.call_async()`.
+        This requires Python 3.5 or newer.
+
+        :type path: str
+        :param path: The path relative to the root of the repository, by default the whole history is returned
+        :type revision: str
+        :param revision: The revision to list the history of, by default HEAD
+        :rtype: Awaitable[List[Commit]]
+        :return: The commits, new -> old
+        """
+        from . import aio
+        return aio.history(self, path=path, revision=revision)
+
+
+Repository._default = Repository()
+atexit.register(Repository._close_all)
@@ -0,0 +1,162 @@
+import json
+import os
+import threading
+import timeit
+
+
+class Stats(object):
+    """
+    Instrumentation of the calls to git, the parsing of their output and the caches.
+    For every git subcommand and parser the number of calls, the total wall time,
+    a histogram of the wall time per call and the number of bytes read are counted,
+    and for every cache the number of hits and misses.
+    The instrumentation is disabled by default, enable it using `Stats.enable()`
+    and get the results using `Git.stats()`.
+    The wall time of a streamed git call includes the time spent processing its records.
+    """
+    # The upper bounds in seconds of the buckets of the wall time histograms, the last bucket is unbounded
+    _BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 10)
+    # The maximum number of spans that are kept when tracing, later spans are dropped
+    _MAX_SPANS = 1000000
+
+    _enabled = False    # :type: bool
+    _tracing = False    # :type: bool
+    _lock = threading.Lock()
+    _timer = staticmethod(timeit.default_timer)
+    _origin = timeit.default_timer()
+    _calls = {}         # :type: Dict[(str, str), list]
+    _caches = {}        # :type: Dict[str, list]
+    _spans = []         # :type: List[dict]
+
+    @classmethod
+    def enable(cls, trace=False):
+        """
+        Start counting the calls to git, the parsing of their output and the cache hits and misses.
+
+        :type trace: bool
+        :param trace: Whether to also record every call as a span, see `Stats.write_trace()`
+        """
+        cls._enabled = True
+        cls._tracing = trace
+
+    @classmethod
+    def disable(cls):
+        """
+        Stop counting, the results so far are kept.
+        """
+        cls._enabled = False
+        cls._tracing = False
+
+    @classmethod
+    def reset(cls):
+        """
+        Clear all the counters and recorded spans.
+        """
+        with cls._lock:
+            cls._calls = {}
+            cls._caches = {}
+            cls._spans = []
+            cls._origin = cls._timer()
+
+    @classmethod
+    def snapshot(cls):
+        """
+        Get the current results, see `Git.stats()`.
+
+        :rtype: Dict[str, Dict[str, dict]]
+        :return: The results by category and name
+        """
+        result = {'git': {}, 'parse': {}, 'cache': {}}
+        with cls._lock:
+            for (category, name), (calls, total, size, histogram) in cls._calls.items():
+                bounds = list(cls._BUCKETS) + [None]
+                result.setdefault(category, {})[name] = {
+                    'calls': calls,
+                    'time': total,
+                    'bytes': size,
+                    'histogram': [(bound, count) for bound, count in zip(bounds, histogram) if count],
+                }
+            for name, (hits, misses) in cls._caches.items():
+                result['cache'][name] = {'hits': hits, 'misses': misses}
+        return result
+
+    @classmethod
+    def write_trace(cls, path):
+        """
+        Write the recorded spans to a file in the Chrome trace format,
+        which can be opened in chrome://tracing or Perfetto to view them as a flame graph.
+        Spans are only recorded when enabled using `Stats.enable(trace=True)`.
+
+        :type path: str
+        :param path: The file to write to
+        """
+        with cls._lock:
+            spans = list(cls._spans)
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': spans, 'displayTimeUnit': 'ms'}, f)
+
+    @classmethod
+    def _start(cls):
+        """
+        :rtype: float | None
+        :return: The start time of a call, or None when disabled
+        """
+        return cls._timer() if cls._enabled else None
+
+    @classmethod
+    def _record(cls, category, name, start, size=0):
+        """
+        Record a call that started at the given time and ends now.
+
+        :type category: str
+        :param category: The category of the call, 'git' or 'parse'
+        :type name: str
+        :param name: The name of the call, for example the git subcommand
+        :type start: float | None
+        :param start: The start time as returned by `Stats._start()`, nothing is recorded when None
+        :type size: int
+        :param size: The number of bytes read
+        """
+        if start is None:
+            return
+        duration = cls._timer() - start
+        bucket = 0
+        while bucket < len(cls._BUCKETS) and duration > cls._BUCKETS[bucket]:
+            bucket += 1
+
+        with cls._lock:
+            entry = cls._calls.get((category, name))
+            if entry is None:
+                entry = cls._calls[(category, name)] = [0, 0.0, 0, [0] * (len(cls._BUCKETS) + 1)]
+            entry[0] += 1
+            entry[1] += duration
+            entry[2] += size
+            entry[3][bucket] += 1
+            if cls._tracing and len(cls._spans) < cls._MAX_SPANS:
+                cls._spans.append({
+                    'name': name, 'cat': category, 'ph': 'X',
+                    'ts': (start - cls._origin) * 1e6, 'dur': duration * 1e6,
+                    'pid': os.getpid(), 'tid': threading.current_thread().ident,
+                    'args': {'bytes': size},
+                })
+
+    @classmethod
+    def _count(cls, cache, hits=0, misses=0):
+        """
+        Count the hits and misses of a cache.
+
+        :type cache: str
+        :param cache: The name of the cache
+        :type hits: int
+        :param hits: The number of hits
+        :type misses: int
+        :param misses: The number of misses
+        """
+        if not cls._enabled:
+            return
+        with cls._lock:
+            entry = cls._caches.get(cache)
+            if entry is None:
+                entry = cls._caches[cache] = [0, 0]
+            entry[0] += hits
+            entry[1] += misses
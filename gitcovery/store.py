@@ -0,0 +1,148 @@
+import os
+import sqlite3
+import threading
+
+from .stats import Stats
+
+
+class _CommitStore(object):
+    """
+    An on-disk cache of commit metadata, stored in an SQLite database.
+    As commits are immutable, their metadata can be reused by every process that analyses the same repository.
+    Each row is a tuple of the form `(sha, parents, author, author_email, author_time, author_tz,
+    committer, committer_email, commit_time, commit_tz, title, message)`.
+
+    The database uses write-ahead logging, so multiple processes can read it while another one is writing.
+    When the schema version of an existing database does not match, its contents are discarded.
+    """
+
+    # The version of the schema, increment this when the tables change
+    _VERSION = 1
+    # The maximum number of parameters used in a single query
+    _QUERY_SIZE = 500
+
+    def __init__(self, path):
+        """
+        Constructor for a _CommitStore, creating the database when it does not exist.
+
+        :type path: str
+        :param path: The path of the database file
+        """
+        self.path = path
+        folder = os.path.dirname(path)
+        if folder and not os.path.isdir(folder):
+            os.makedirs(folder)
+
+        self._lock = threading.Lock()
+        self._author_ids = {}
+        self._connection = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._setup()
+
+    def _setup(self):
+        """
+        Create the tables, or recreate them when the schema version does not match.
+        """
+        if self._connection.execute('PRAGMA user_version').fetchone()[0] == self._VERSION:
+            return
+
+        self._connection.execute('BEGIN IMMEDIATE')
+        try:
+            # Check again, as another process might have created the tables in the meantime
+            if self._connection.execute('PRAGMA user_version').fetchone()[0] != self._VERSION:
+                self._connection.execute('DROP TABLE IF EXISTS commits')
+                self._connection.execute('DROP TABLE IF EXISTS authors')
+                self._connection.execute('CREATE TABLE authors (id INTEGER PRIMARY KEY, name TEXT NOT NULL, '
+                                         'email TEXT NOT NULL, UNIQUE (name, email))')
+                self._connection.execute('CREATE TABLE commits (sha TEXT PRIMARY KEY, parents TEXT NOT NULL, '
+                                         'author INTEGER NOT NULL, author_time INTEGER NOT NULL, '
+                                         'author_tz INTEGER NOT NULL, committer INTEGER NOT NULL, '
+                                         'commit_time INTEGER NOT NULL, commit_tz INTEGER NOT NULL, '
+                                         'title TEXT NOT NULL, message TEXT NOT NULL)')
+                self._connection.execute('PRAGMA user_version = %d' % self._VERSION)
+            self._connection.execute('COMMIT')
+        except Exception:
+            self._connection.execute('ROLLBACK')
+            raise
+
+    def _author_id(self, name, email):
+        """
+        Get the id of an author, adding the author when it is not yet known.
+        Must be called within a transaction.
+
+        :type name: str
+        :param name: The name of the author
+        :type email: str
+        :param email: The email of the author
+        :rtype: int
+        :return: The id of the author
+        """
+        key = (name, email)
+        if key not in self._author_ids:
+            self._connection.execute('INSERT OR IGNORE INTO authors (name, email) VALUES (?, ?)', key)
+            self._author_ids[key] = self._connection.execute(
+                'SELECT id FROM authors WHERE name = ? AND email = ?', key).fetchone()[0]
+        return self._author_ids[key]
+
+    def get(self, shas):
+        """
+        Get the rows of the given commits.
+
+        :type shas: List[str]
+        :param shas: The hashes of the commits to get
+        :rtype: Dict[str, tuple]
+        :return: The rows of the commits that are stored, by hash
+        """
+        result = {}
+        with self._lock:
+            for i in range(0, len(shas), self._QUERY_SIZE):
+                chunk = shas[i:i + self._QUERY_SIZE]
+                query = ('SELECT c.sha, c.parents, a.name, a.email, c.author_time, c.author_tz, '
+                         'm.name, m.email, c.commit_time, c.commit_tz, c.title, c.message '
+                         'FROM commits c JOIN authors a ON a.id = c.author JOIN authors m ON m.id = c.committer '
+                         'WHERE c.sha IN (%s)' % ', '.join('?' * len(chunk)))
+                for row in self._connection.execute(query, chunk):
+                    result[row[0]] = row
+        Stats._count('store', hits=len(result), misses=len(shas) - len(result))
+        return result
+
+    def add(self, rows):
+        """
+        Store the given rows, rows of commits that are already stored are ignored.
+
+        :type rows: List[tuple]
+        :param rows: The rows to store
+        """
+        if not rows:
+            return
+        with self._lock:
+            self._connection.execute('BEGIN IMMEDIATE')
+            try:
+                for (sha, parents, author, author_email, author_time, author_tz,
+                     committer, committer_email, commit_time, commit_tz, title, message) in rows:
+                    self._connection.execute(
+                        'INSERT OR IGNORE INTO commits VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                        (sha, parents, self._author_id(author, author_email), author_time, author_tz,
+                         self._author_id(committer, committer_email), commit_time, commit_tz, title, message))
+                self._connection.execute('COMMIT')
+            except Exception:
+                self._connection.execute('ROLLBACK')
+                self._author_ids = {}
+                raise
+
+    def count(self):
+        """
+        Get the number of stored commits.
+
+        :rtype: int
+        :return: The number of stored commits
+        """
+        with self._lock:
+            return self._connection.execute('SELECT COUNT(*) FROM commits').fetchone()[0]
+
+    def close(self):
+        """
+        Close the connection to the database.
+        """
+        with self._lock:
+            self._connection.close()
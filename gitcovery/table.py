@@ -0,0 +1,373 @@
+import binascii
+import threading
+from array import array
+
+
+class CommitTable(object):
+    """
+    Compact columnar storage for the data of all commits in a repository.
+    Every commit gets an integer id, its row in the table.
+    The SHA hashes are stored in binary form in a single contiguous buffer,
+    the parents are stored as offset and count columns into a single array of parent ids,
+    the dates and authors are stored as integer columns and the titles and messages are stored encoded in one buffer.
+    `Commit` objects are thin views on a row of this table, so loading the full history only costs a few
+    bytes per commit instead of a Python object with strings, datetimes and lists for each of them.
+
+    Rows can be added and set from multiple threads at once, as every write that spans multiple columns is locked.
+    A row is only marked as loaded after all its columns are written, so reading a row does not need the lock.
+    """
+
+    def __init__(self):
+        """
+        Constructor for an empty CommitTable.
+        """
+        self._ids = {}               # Binary SHA hash -> id
+        self._sha_size = 0           # Number of bytes in a binary SHA hash
+        self._shas = bytearray()     # The binary SHA hashes of all rows
+        self._loaded = bytearray()   # 1 when the metadata of the row is loaded, 0 otherwise
+        self._graph = bytearray()    # 1 when the parents and commit date of the row are known, 0 otherwise
+
+        self._parent_start = array('i')  # Offset of the first parent in self._parent_ids
+        self._parent_count = array('i')  # Number of parents
+        self._parent_ids = array('i')
+        self._generation = array('i')    # Generation number, 0 when not yet computed
+
+        self._author_ids = array('i')     # Index in self._people, -1 when not loaded
+        self._committer_ids = array('i')  # Index in self._people, -1 when not loaded
+        self._author_time = array('l')
+        self._author_tz = array('h')      # Timezone offset in minutes
+        self._commit_time = array('l')
+        self._commit_tz = array('h')      # Timezone offset in minutes
+        self._people = []                 # The authors referenced by the author and committer columns
+        self._people_ids = {}             # Author name -> index in self._people
+
+        self._text = bytearray()         # The UTF-8 encoded titles and messages
+        self._text_start = array('l')    # Offset of the title in self._text, the message directly follows
+        self._title_size = array('i')
+        self._message_size = array('i')
+
+        self._diffs = {}                 # Id -> Diff, only for rows of which the diff is loaded
+        self._batches = {}               # Id -> _CommitBatch, only for rows that were returned in a group
+        self._lock = threading.RLock()   # Guards the writes to the columns
+
+    def __len__(self):
+        """
+        :rtype: int
+        :return: The number of rows in this table
+        """
+        return len(self._loaded)
+
+    def intern(self, sha):
+        """
+        Get the id of the commit with the given hash, adding a new row when the commit is not yet known.
+
+        :type sha: str
+        :param sha: The full SHA hash of the commit
+        :rtype: int
+        :return: The id of the commit
+        """
+        key = binascii.unhexlify(sha)
+        row = self._ids.get(key)
+        if row is not None:
+            return row
+        with self._lock:
+            if key in self._ids:
+                return self._ids[key]
+            if not self._sha_size:
+                self._sha_size = len(key)
+            elif len(key) != self._sha_size:
+                raise Exception('Invalid sha \'%s\'' % sha)
+
+            row = len(self._loaded)
+            self._shas.extend(key)
+            self._loaded.append(0)
+            self._graph.append(0)
+            for column in (self._parent_start, self._parent_count, self._generation, self._author_time,
+                           self._author_tz, self._commit_time, self._commit_tz, self._text_start, self._title_size,
+                           self._message_size):
+                column.append(0)
+            self._author_ids.append(-1)
+            self._committer_ids.append(-1)
+            # Only publish the id once the row exists in all columns
+            self._ids[key] = row
+            return row
+
+    def find(self, sha):
+        """
+        Get the id of the commit with the given hash, without adding it.
+
+        :type sha: str
+        :param sha: The full SHA hash of the commit
+        :rtype: int
+        :return: The id of the commit, or -1 when it is not in the table
+        """
+        return self._ids.get(binascii.unhexlify(sha), -1)
+
+    def sha(self, row):
+        """
+        :type row: int
+        :param row: The id of the commit
+        :rtype: str
+        :return: The SHA hash of the commit
+        """
+        start = row * self._sha_size
+        return binascii.hexlify(bytes(self._shas[start:start + self._sha_size])).decode('ascii')
+
+    def is_loaded(self, row):
+        """
+        :type row: int
+        :param row: The id of the commit
+        :rtype: bool
+        :return: Whether the metadata of the commit is loaded
+        """
+        return self._loaded[row] == 1
+
+    def has_parents(self, row):
+        """
+        :type row: int
+        :param row: The id of the commit
+        :rtype: bool
+        :return: Whether the parents and commit date of the commit are known, which is the case for loaded commits
+        """
+        return self._graph[row] == 1
+
+    def _set_parents(self, row, parents):
+        """
+        Set the parents of a commit, only appending them to the parent ids when they changed.
+
+        :type row: int
+        :param row: The id of the commit
+        :type parents: List[int]
+        :param parents: The ids of the parents
+        """
+        if self._parent_count[row] != len(parents) or \
+                list(self._parent_ids[self._parent_start[row]:self._parent_start[row] + len(parents)]) != parents:
+            self._parent_start[row] = len(self._parent_ids)
+            self._parent_count[row] = len(parents)
+            self._parent_ids.extend(parents)
+        self._graph[row] = 1
+
+    def set_graph(self, row, parents, commit_time):
+        """
+        Set only the parents and commit date of a commit, without loading the rest of its metadata.
+        This is all that is needed to traverse the commit graph.
+
+        :type row: int
+        :param row: The id of the commit
+        :type parents: List[int]
+        :param parents: The ids of the parents
+        :type commit_time: int
+        :param commit_time: The commit date as unix timestamp
+        """
+        with self._lock:
+            self._set_parents(row, parents)
+            self._commit_time[row] = commit_time
+
+    def generation(self, row):
+        """
+        :type row: int
+        :param row: The id of the commit
+        :rtype: int
+        :return: The generation number of the commit, or 0 when it is not yet computed
+        """
+        return self._generation[row]
+
+    def set_generation(self, row, generation):
+        """
+        Set the generation number of a commit.
+        This is one more than the maximum generation number of its parents, so commits without parents have 1.
+
+        :type row: int
+        :param row: The id of the commit
+        :type generation: int
+        :param generation: The generation number
+        """
+        self._generation[row] = generation
+
+    def _person_id(self, author):
+        """
+        Get the index of an author in the author column, adding the author when needed.
+
+        :type author: Author
+        :param author: The author
+        :rtype: int
+        :return: The index of the author
+        """
+        if author.name not in self._people_ids:
+            self._people_ids[author.name] = len(self._people)
+            self._people.append(author)
+        return self._people_ids[author.name]
+
+    def set_row(self, row, parents, author, author_time, author_tz, committer, commit_time, commit_tz, title, message):
+        """
+        Set the metadata of a commit.
+
+        :type row: int
+        :param row: The id of the commit
+        :type parents: List[int]
+        :param parents: The ids of the parents
+        :type author: Author
+        :param author: The author
+        :type author_time: int
+        :param author_time: The author date as unix timestamp
+        :type author_tz: int
+        :param author_tz: The timezone offset of the author date in minutes
+        :type committer: Author
+        :param committer: The committer
+        :type commit_time: int
+        :param commit_time: The commit date as unix timestamp
+        :type commit_tz: int
+        :param commit_tz: The timezone offset of the commit date in minutes
+        :type title: str
+        :param title: The title of the commit
+        :type message: str
+        :param message: The message of the commit
+        """
+        encoded_title = title.encode('utf-8')
+        encoded_message = message.encode('utf-8')
+        with self._lock:
+            self._set_parents(row, parents)
+            self._author_ids[row] = self._person_id(author)
+            self._committer_ids[row] = self._person_id(committer)
+            self._author_time[row] = author_time
+            self._author_tz[row] = author_tz
+            self._commit_time[row] = commit_time
+            self._commit_tz[row] = commit_tz
+
+            # Reloading a commit gives the same text, so the text that is already stored for the row is reused
+            start = self._text_start[row]
+            end = start + len(encoded_title) + len(encoded_message)
+            if (self._title_size[row] != len(encoded_title) or self._message_size[row] != len(encoded_message) or
+                    self._text[start:end] != encoded_title + encoded_message):
+                self._text_start[row] = len(self._text)
+                self._title_size[row] = len(encoded_title)
+                self._message_size[row] = len(encoded_message)
+                self._text.extend(encoded_title)
+                self._text.extend(encoded_message)
+
+            self._loaded[row] = 1
+
+    def unload(self, row):
+        """
+        Mark the metadata of a commit as not loaded and drop its diff.
+        The parents and commit date are kept, as these never change.
+
+        :type row: int
+        :param row: The id of the commit
+        """
+        with self._lock:
+            self._loaded[row] = 0
+            self._author_ids[row] = -1
+            self._committer_ids[row] = -1
+            self._diffs.pop(row, None)
+
+    def parents(self, row):
+        """
+        :type row: int
+        :param row: The id of the commit
+        :rtype: List[int]
+        :return: The ids of the parents of the commit, only valid when `has_parents()` is True
+        """
+        start = self._parent_start[row]
+        return list(self._parent_ids[start:start + self._parent_count[row]])
+
+    def author(self, row):
+        """
+        :type row: int
+        :param row: The id of the commit
+        :rtype: Author | None
+        :return: The author of the commit, or None when not loaded
+        """
+        index = self._author_ids[row]
+        return self._people[index] if index >= 0 else None
+
+    def committer(self, row):
+        """
+        :type row: int
+        :param row: The id of the commit
+        :rtype: Author | None
+        :return: The committer of the commit, or None when not loaded
+        """
+        index = self._committer_ids[row]
+        return self._people[index] if index >= 0 else None
+
+    def author_date(self, row):
+        """
+        :type row: int
+        :param row: The id of the commit
+        :rtype: (int, int)
+        :return: The author date as unix timestamp and the timezone offset in minutes
+        """
+        return self._author_time[row], self._author_tz[row]
+
+    def commit_date(self, row):
+        """
+        :type row: int
+        :param row: The id of the commit
+        :rtype: (int, int)
+        :return: The commit date as unix timestamp and the timezone offset in minutes
+        """
+        return self._commit_time[row], self._commit_tz[row]
+
+    def title(self, row):
+        """
+        :type row: int
+        :param row: The id of the commit
+        :rtype: str
+        :return: The title of the commit
+        """
+        start = self._text_start[row]
+        return self._text[start:start + self._title_size[row]].decode('utf-8')
+
+    def message(self, row):
+        """
+        :type row: int
+        :param row: The id of the commit
+        :rtype: str
+        :return: The message of the commit
+        """
+        start = self._text_start[row] + self._title_size[row]
+        return self._text[start:start + self._message_size[row]].decode('utf-8')
+
+    def get_diff(self, row):
+        """
+        :type row: int
+        :param row: The id of the commit
+        :rtype: Diff | None
+        :return: The diff of the commit, or None when not loaded
+        """
+        return self._diffs.get(row)
+
+    def set_diff(self, row, diff):
+        """
+        Set the diff of a commit, None removes the diff.
+
+        :type row: int
+        :param row: The id of the commit
+        :type diff: Diff | None
+        :param diff: The diff of the commit
+        """
+        if diff is None:
+            self._diffs.pop(row, None)
+        else:
+            self._diffs[row] = diff
+
+    def get_batch(self, row):
+        """
+        :type row: int
+        :param row: The id of the commit
+        :rtype: _CommitBatch | None
+        :return: The group of commits this commit was returned in
+        """
+        return self._batches.get(row)
+
+    def set_batch(self, row, batch):
+        """
+        Set the group of commits a commit was returned in.
+
+        :type row: int
+        :param row: The id of the commit
+        :type batch: _CommitBatch
+        :param batch: The group of commits
+        """
+        self._batches[row] = batch
@@ -2,3 +2,24 @@ from .gitTest import GitTest
 from .gitfsTest import AbsGitFileTest
 from .commitTest import CommitTest
 from .diffTest import DiffTest
+from .catfileTest import CatFileTest
+from .storeTest import StoreTest
+from .tableTest import CommitTableTest
+from .graphTest import CommitGraphTest
+from .commitgraphTest import CommitGraphFileTest
+from .objectsTest import ObjectDatabaseTest
+from .backendTest import MemoryBackendTest
+from .repositoryTest import RepositoryTest
+from .concurrencyTest import ConcurrencyTest
+from .statsTest import StatsTest
+from .pathindexTest import PathIndexTest
+from .historyTest import HistoryTest
+from .followTest import FollowTest
+from .blobsTest import BlobsTest
+from .treeTest import TreeTest
+from .worktreeTest import WorktreeTest
+from .logTest import LogTest
+
+import sys
+if sys.version_info >= (3, 5):
+    from .aioTest import AsyncTest
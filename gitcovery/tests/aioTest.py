@@ -0,0 +1,89 @@
+import asyncio
+from unittest import TestCase
+
+from gitcovery import Commit, Git, GitFolder, MemoryBackend, Repository
+
+
+class AsyncTest(TestCase):
+    """
+    Test class for the asynchronous queries.
+    """
+
+    def setUp(self):
+        """
+        Create an event loop to run the queries on.
+        """
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+
+    def tearDown(self):
+        """
+        Close the event loop.
+        """
+        asyncio.set_event_loop(None)
+        self.loop.close()
+
+    def run_async(self, awaitable):
+        """
+        :type awaitable: Awaitable
+        :param awaitable: The awaitable to run on the event loop
+        :return: The result of the awaitable
+        """
+        return self.loop.run_until_complete(awaitable)
+
+    def test_load_memory(self):
+        """
+        Test that loading many commits at once from an in-memory repository
+        gives the same result as loading them one by one.
+        """
+        backend = MemoryBackend.generate(100, num_authors=4, seed=5)
+        repository = Repository(backend)
+        commits = self.run_async(repository.history_async())
+        self.assertEqual(list(backend.rev_list(['HEAD'])), [commit.sha for commit in commits])
+
+        results = self.run_async(asyncio.gather(*[commit.load_async() for commit in commits + commits]))
+        self.assertEqual(len(commits), results.count(True))
+        for row, _ in backend.log_records(['HEAD']):
+            commit = repository.get_commit(row[0])
+            self.assertTrue(commit.is_loaded())
+            self.assertEqual(row[2], commit.author.name)
+            self.assertEqual(row[10], commit.title)
+            self.assertEqual(1, sum(1 for other in commit.author.commits if other == commit))
+
+    def test_git(self):
+        """
+        Test the queries on this repository against their synchronous counterparts.
+        """
+        repository = Repository.open('.')
+        try:
+            with repository:
+                root = GitFolder('.')
+                setup = root.get_file('setup.py')
+                history = setup.history()
+                expected = [(commit.sha, commit.title, commit.author.name) for commit in history]
+                contents = [setup.at(commit) for commit in history]
+
+            other = Repository.open('.')
+            try:
+                with other:
+                    setup = GitFolder('.').get_file('setup.py')
+                commits = self.run_async(setup.history_async())
+                self.assertTrue(all(commit._repo is other for commit in commits))
+                self.run_async(asyncio.gather(*[commit.load_async() for commit in commits]))
+                self.assertEqual(expected, [(commit.sha, commit.title, commit.author.name) for commit in commits])
+                contents_async = self.run_async(asyncio.gather(*[setup.at_async(commit) for commit in commits]))
+                self.assertEqual(contents, contents_async)
+            finally:
+                other.close()
+
+            with repository:
+                Git.set_async_limit(2)
+                try:
+                    head = self.run_async(Git.call_async(['rev-parse', 'HEAD']))
+                    self.assertEqual(Git.call(['rev-parse', 'HEAD']), head)
+                    with self.assertRaises(IOError):
+                        self.run_async(Git.call_async(['rev-parse', '--verify', 'non-existent-ref']))
+                finally:
+                    Git.set_async_limit(8)
+        finally:
+            repository.close()
@@ -0,0 +1,117 @@
+from unittest import TestCase
+
+from gitcovery import Author, Commit, CommitGraph, Git, MemoryBackend
+
+
+class MemoryBackendTest(TestCase):
+    """
+    Test class for using the module with an in-memory repository instead of git.
+    """
+
+    def setUp(self):
+        """
+        Create a repository with a branch that is merged into master.
+        """
+        self.backend = MemoryBackend()
+        alice = ('Alice', 'alice@example.com')
+        bob = ('Bob', 'bob@example.com')
+        self.root = self.backend.add_commit({'a.txt': b'one\ntwo\n', 'docs/b.txt': b'b\n'}, author=alice,
+                                            timestamp=1000, message='Initial commit')
+        self.side = self.backend.add_commit({'docs/b.txt': b'b\nc\n'}, [self.root], bob, timestamp=2000,
+                                            offset=60, message='Extend b\n\nAdd a line to b.')
+        self.main = self.backend.add_commit({'a.txt': b'one\nthree\n'}, [self.root], alice, timestamp=3000,
+                                            message='Change a')
+        self.merge = self.backend.add_commit({'docs/b.txt': b'b\nc\n'}, [self.main, self.side], alice,
+                                             timestamp=4000, message='Merge side')
+        self.backend.set_ref('refs/heads/master', self.merge)
+        self.backend.set_ref('refs/heads/side', self.side)
+        self.backend.set_ref('refs/tags/v1', self.main)
+        Git.set_backend(self.backend)
+
+    def tearDown(self):
+        """
+        Use this repository as the root again.
+        """
+        Git.set_root('.')
+
+    def test_objects(self):
+        """
+        Test that objects are stored with the same hashes and contents as git would.
+        """
+        self.assertEqual('ce013625030ba8dba906f756967f9e9ca394464a', self.backend.add_blob(b'hello\n'))
+        self.assertEqual('one\nthree\n', Git.cat_file(self.merge + ':a.txt'))
+        self.assertEqual([('100644', 'a.txt'), ('40000', 'docs')],
+                         [(mode, name) for mode, _, name in Git.read_tree(self.merge)])
+        self.assertEqual(('blob', 4), Git.object_info(self.merge + ':docs/b.txt')[1:])
+        self.assertIsNone(self.backend.read_blob(self.merge, 'missing.txt'))
+        self.assertRaises(IOError, Git.cat_file, self.merge + ':missing.txt')
+
+    def test_commit(self):
+        """
+        Test that commits are loaded from the backend.
+        """
+        commit = Commit(self.side)
+        self.assertEqual('Extend b', commit.title)
+        self.assertEqual('Add a line to b.', commit.message)
+        self.assertEqual('Bob', commit.author.name)
+        self.assertEqual(2000, commit.author_timestamp)
+        self.assertEqual(3600, commit.author_date.utcoffset().total_seconds())
+        self.assertEqual([self.root], [parent.sha for parent in commit.parents])
+        self.assertEqual(self.merge, Commit('master').sha)
+        self.assertEqual(self.side, Commit(self.side[:10]).sha)
+
+    def test_refs(self):
+        """
+        Test the refs of the repository.
+        """
+        self.assertEqual(self.merge, Git.get_head().sha)
+        self.assertEqual(['v1'], Git.get_tags())
+        self.assertEqual(self.main, Git.get_tag('v1').sha)
+        self.assertEqual([self.root], [commit.sha for commit in Git.get_initial_commits()])
+
+    def test_changes(self):
+        """
+        Test that the diffs of commits are created like git does.
+        """
+        changes = Commit(self.main).changes()
+        self.assertEqual(['a.txt'], list(changes.data.keys()))
+        self.assertEqual(1, changes.num_added())
+        self.assertEqual(1, changes.num_removed())
+        self.assertEqual([(1, 1, 'a.txt')], self.backend.diff_stats(self.main))
+        self.assertEqual([(1, 0, 'docs/b.txt')], self.backend.diff_stats(self.merge, self.main))
+        self.assertEqual('', self.backend.commit_diff(self.merge))
+        self.assertIn('@@ -1,2 +1,2 @@\n one\n-two\n+three\n', self.backend.diff(self.root, self.main, 'a.txt'))
+
+    def test_history(self):
+        """
+        Test that histories are listed newest first and simplified for paths.
+        """
+        self.assertEqual([self.merge, self.main, self.side, self.root], list(self.backend.rev_list(['HEAD'])))
+        self.assertEqual([self.merge, self.main], list(self.backend.rev_list(['HEAD', '^side'])))
+        # The merge has the same b.txt as the side branch, so only the side branch is followed
+        self.assertEqual([self.side, self.root], list(self.backend.rev_list(['HEAD'], path='docs')))
+        self.assertEqual([self.main, self.root], list(self.backend.rev_list(['HEAD'], path='a.txt')))
+
+    def test_load_all(self):
+        """
+        Test that all commits and authors are loaded from the backend.
+        """
+        Commit.load_all()
+        self.assertTrue(all(Commit(sha).is_loaded() for sha in (self.root, self.side, self.main, self.merge)))
+        authors = dict((author.name, author) for author in Author.list())
+        self.assertEqual(sorted([self.root, self.main, self.merge]),
+                         sorted(commit.sha for commit in authors['Alice'].commits
+                                if commit.sha in (self.root, self.side, self.main, self.merge)))
+
+    def test_generate(self):
+        """
+        Test that generated repositories are reproducible and contain the requested number of commits.
+        """
+        backend = MemoryBackend.generate(200, seed=1)
+        self.assertEqual(backend.resolve_refs(), MemoryBackend.generate(200, seed=1).resolve_refs())
+        Git.set_backend(backend)
+        head = Git.get_head()
+        commits = list(CommitGraph.walk(head))
+        self.assertLessEqual(len(commits), 200)
+        self.assertTrue(any(len(commit.parents) > 1 for commit in commits))
+        self.assertEqual(len(commits), len(list(backend.rev_list(['HEAD']))))
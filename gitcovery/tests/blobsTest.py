@@ -0,0 +1,90 @@
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+from gitcovery import Git, MemoryBackend, Repository, Stats
+from gitcovery.blobs import _BlobCache
+
+
+class BlobsTest(TestCase):
+    """
+    Test class for reading the contents of a file at many commits.
+    """
+
+    def test_cache(self):
+        """
+        Test that the least recently used blobs are removed first when the cache is full.
+        """
+        cache = _BlobCache(max_size=100)
+        for name in 'abcd':
+            cache.put(name, name.encode('ascii') * 25)
+        self.assertEqual(b'a' * 25, cache.get('a'))
+
+        cache.put('e', b'e' * 20)
+        self.assertEqual((4, 95), (len(cache), cache.size()))
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(b'c' * 25, cache.get('c'))
+
+        # Blobs larger than a quarter of the cache are not cached
+        cache.put('f', b'f' * 26)
+        self.assertIsNone(cache.get('f'))
+
+        cache.set_max_size(50)
+        self.assertEqual(['e', 'c'], list(cache._blobs))
+        cache.set_max_size(0)
+        self.assertEqual((0, 0), (len(cache), cache.size()))
+
+    def test_memory(self):
+        """
+        Test that the blobs of a file are found at every commit.
+        """
+        backend = MemoryBackend.generate(50, num_files=5, seed=4)
+        shas = list(backend.rev_list(['HEAD']))
+        for path in set(path for sha in shas for path in backend.files_at(sha)):
+            self.assertEqual([backend.files_at(sha).get(path) for sha in shas], backend.blob_ids(shas, path))
+
+    def test_at_many(self):
+        """
+        Test that the contents of a file are read once for every distinct blob, in a single lookup of the blobs.
+        """
+        folder = tempfile.mkdtemp()
+        try:
+            for cmd in (['init', '-q'], ['config', 'user.name', 'Test'], ['config', 'user.email', 'test@example.com']):
+                Git.call(cmd, root=folder)
+            versions = ['one\n', None, 'one\n', 'one\ntwo\n', 'one\ntwo\n', 'three\n', 'one\n']
+            for i, contents in enumerate(versions):
+                path = os.path.join(folder, 'my file.txt')
+                if contents is None:
+                    os.remove(path)
+                else:
+                    with open(path, 'w') as f:
+                        f.write(contents)
+                with open(os.path.join(folder, 'other.txt'), 'w') as f:
+                    f.write('%d\n' % i)
+                Git.call(['add', '-A', '.'], root=folder)
+                Git.call(['commit', '-q', '-m', 'Commit %d' % i], root=folder)
+            shas = Git.call(['rev-list', '--reverse', 'HEAD'], root=folder).split()
+
+            repository = Repository.open(folder)
+            try:
+                with repository:
+                    gitfile = repository.root.get_file('my file.txt')
+                    Stats.enable()
+                    Stats.reset()
+                    result = list(gitfile.at_many(shas))
+                    stats = Git.stats()['git']
+                    Stats.disable()
+
+                    self.assertEqual([(sha, contents or '') for sha, contents in zip(shas, versions)], result)
+                    self.assertEqual(1, stats['cat-file']['calls'])
+                    self.assertEqual(3, stats['cat-file --batch']['calls'])
+                    self.assertEqual('one\ntwo\n', gitfile.at(repository.get_commit(shas[3])))
+                    self.assertEqual('', gitfile.at(shas[1]))
+                    self.assertEqual('three\n', gitfile.at(shas[5]))
+                    self.assertEqual(3, len(repository._blobs))
+            finally:
+                repository.close()
+        finally:
+            Stats.reset()
+            shutil.rmtree(folder)
@@ -0,0 +1,84 @@
+from unittest import TestCase
+
+from gitcovery import Git
+
+
+class CatFileTest(TestCase):
+    """
+    Test class for reading objects via the persistent cat-file processes.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        """
+        Use this repository as the root for the tests.
+        """
+        cls.root = Git.set_root('.')
+
+    @classmethod
+    def tearDownClass(cls):
+        """
+        Stop the background processes.
+        """
+        Git.close()
+
+    def test_cat_file(self):
+        """
+        Test that reading a blob gives the same result as `git show`.
+        """
+        self.assertEqual(Git.call(['show', 'HEAD:setup.py']), Git.cat_file('HEAD:setup.py'))
+
+    def test_cat_file_missing(self):
+        """
+        Test that reading a non-existent object raises an IOError.
+        """
+        with self.assertRaises(IOError):
+            Git.cat_file('HEAD:non/existent/file')
+
+    def test_object_info(self):
+        """
+        Test the object info of a commit.
+        """
+        sha, typ, size = Git.object_info('HEAD')
+        self.assertEqual(Git.call(['rev-parse', 'HEAD']).strip(), sha)
+        self.assertEqual('commit', typ)
+        self.assertTrue(size > 0)
+
+    def test_read_tree(self):
+        """
+        Test that the tree of a commit contains the files in the root.
+        """
+        entries = Git.read_tree('HEAD')
+        names = list(map(lambda entry: entry[2], entries))
+        self.assertIn('setup.py', names)
+        for mode, sha, name in entries:
+            if name == 'gitcovery':
+                self.assertEqual('40000', mode)
+                self.assertEqual('tree', Git.object_info(sha)[1])
+
+    def test_restart_after_crash(self):
+        """
+        Test that a crashed process is restarted transparently.
+        """
+        Git.cat_file('HEAD:setup.py')
+        Git.get_backend()._cat_file._process.kill()
+        Git.get_backend()._cat_file._process.wait()
+        self.assertEqual(Git.call(['show', 'HEAD:setup.py']), Git.cat_file('HEAD:setup.py'))
+
+    def test_at(self):
+        """
+        Test that reading a file at a commit uses the object contents.
+        """
+        setup_file = self.root.get_file('setup.py')
+        self.assertEqual(Git.call(['show', 'HEAD:setup.py']), setup_file.at('HEAD'))
+        self.assertEqual('', setup_file.at('0' * 40))
+
+    def test_close_on_set_root(self):
+        """
+        Test that changing the root stops the running processes.
+        """
+        Git.cat_file('HEAD:setup.py')
+        process = Git.get_backend()._cat_file._process
+        Git.set_root('.')
+        self.assertIsNone(Git.get_backend()._cat_file)
+        self.assertIsNotNone(process.poll())
@@ -4,7 +4,7 @@ import unittest
 from dateutil import parser as dp
 from parameterized import parameterized
 
-from gitcovery import Commit, Git
+from gitcovery import Commit, Git, GitBackend, Repository
 
 
 def load_params():
@@ -118,4 +118,72 @@ class CommitTest(unittest.TestCase):
         """
         Test that you are not equal when the hashes differ.
         """
-        self.assertFalse(self.instance == Commit('f3ccd0b70fe758b539c28319735d9a6489c0fb10'))
\ No newline at end of file
+        self.assertFalse(self.instance == Commit('f3ccd0b70fe758b539c28319735d9a6489c0fb10'))
+    def test_parse_date(self):
+        """
+        Test the parsing of raw git dates with positive and negative timezone offsets.
+        """
+        self.assertEqual((1520887436, 60), GitBackend._parse_date('1520887436 +0100'))
+        self.assertEqual((1520887436, -330), GitBackend._parse_date('1520887436 -0530'))
+
+    def test_to_datetime(self):
+        """
+        Test that the converted datetime keeps the timezone of the commit.
+        """
+        date = Commit._to_datetime(1520887436, 60)
+        self.assertEqual(dp.parse('2018-03-12 21:43:56 +0100'), date)
+        self.assertEqual('2018-03-12T21:43:56+01:00', date.isoformat())
+
+    def test_timestamps(self):
+        """
+        Test that the timestamps match the dates of the commit.
+        """
+        self.assertEqual(1520887436, self.instance.author_timestamp)
+        self.assertEqual(1520887436, self.instance.commit_timestamp)
+
+    def test_prefetch(self):
+        """
+        Test that prefetching loads all the given commits.
+        """
+        commits = list(map(lambda param: Commit(param[0]), load_params()))
+        for commit in commits:
+            commit.unload()
+        self.assertEqual(len(commits), Commit.prefetch(commits, workers=2))
+        for commit, (sha, data) in zip(commits, load_params()):
+            self.assertIsNotNone(commit._author)
+            self.assertEqual(data['title'], commit.title)
+            self.assertEqual(data['parents'], list(map(lambda x: x.sha, commit.parents)))
+
+        # Everything is loaded already
+        self.assertEqual(0, Commit.prefetch(commits))
+
+    def test_batch_loading(self):
+        """
+        Test that loading grouped commits one by one loads the remaining commits in a batch.
+        """
+        shas = ['ede9c381daf318a87a58ed9607549132e150f145', 'f3ccd0b70fe758b539c28319735d9a6489c0fb10',
+                '9b423f8c38516ed33acfa907ae56ad3868741803', '4868bd573768c7d6141a21d94b7e99f49f2b053a']
+        commits = list(map(Commit, shas))
+        for commit in commits:
+            commit.unload()
+        Commit._group(commits)
+        before = Commit.batch_stats()
+
+        commits[0].load()
+        self.assertIsNone(commits[1]._author)
+        commits[1].load()
+        for commit in commits:
+            self.assertIsNotNone(commit._author)
+
+        after = Commit.batch_stats()
+        self.assertEqual(before['batches'] + 1, after['batches'])
+        self.assertEqual(before['calls_avoided'] + 2, after['calls_avoided'])
+
+    def test_load_all_incremental(self):
+        """
+        Test that loading all commits remembers the loaded tips, so a second call has nothing to load.
+        """
+        Commit.load_all()
+        loaded_tips = Repository.current()._commit_tips[False]
+        self.assertEqual(Git._get_tips(), loaded_tips)
+        self.assertIsNone(Git._revisions_since(Git._get_tips(), loaded_tips))
@@ -0,0 +1,77 @@
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+from gitcovery import Commit, CommitGraph, Git
+from gitcovery.commitgraph import _CommitGraph
+
+
+class CommitGraphFileTest(TestCase):
+    """
+    Test class for reading the commit-graph file of a repository.
+    """
+
+    def setUp(self):
+        """
+        Clone this repository into a temporary folder, so a commit-graph can be written without touching it.
+        """
+        self.folder = tempfile.mkdtemp()
+        Git.call(['clone', '-q', '--no-local', os.path.abspath('.'), self.folder], root='.')
+        Git.set_root(self.folder)
+        self.info_dir = os.path.join(self.folder, '.git', 'objects', 'info')
+
+    def tearDown(self):
+        """
+        Close the commit-graph and remove the temporary folder.
+        """
+        Git.set_root('.')
+        shutil.rmtree(self.folder)
+
+    def test_missing(self):
+        """
+        Test that a repository without commit-graph has no reader.
+        """
+        self.assertIsNone(_CommitGraph.open(self.info_dir))
+        self.assertIsNone(Git.get_backend()._get_commit_graph())
+
+    def test_write(self):
+        """
+        Test that a commit-graph is only written when missing, unless forced.
+        """
+        self.assertTrue(Git.write_commit_graph())
+        self.assertIsNotNone(Git.get_backend()._get_commit_graph())
+        self.assertFalse(Git.write_commit_graph())
+        self.assertTrue(Git.write_commit_graph(force=True))
+
+    def test_read(self):
+        """
+        Test that the parents and commit dates in the commit-graph match the output of git.
+        """
+        Git.write_commit_graph()
+        commit_graph = _CommitGraph.open(self.info_dir)
+        out = Git.call(['rev-list', '--all', '--parents', '--timestamp'])
+        lines = [line.split(' ') for line in out.split('\n') if line]
+        self.assertEqual(len(lines), len(commit_graph))
+
+        for fields in lines:
+            position = commit_graph.find(fields[1])
+            self.assertEqual(fields[1], commit_graph.sha(position))
+            parents, commit_time, generation = commit_graph.commit(position)
+            self.assertEqual(fields[2:], [commit_graph.sha(parent) for parent in parents])
+            self.assertEqual(int(fields[0]), commit_time)
+            self.assertGreater(generation, 0)
+        self.assertEqual(-1, commit_graph.find('0' * 40))
+        commit_graph.close()
+
+    def test_traversal(self):
+        """
+        Test that the commit graph is traversed using the commit-graph file, without loading any commit.
+        """
+        Git.write_commit_graph()
+        head = Commit(Git.call(['rev-parse', 'HEAD']).strip())
+        head.unload()
+        expected = [sha for sha in Git.call(['rev-list', 'HEAD']).split('\n') if sha]
+        self.assertEqual(sorted(expected), sorted(commit.sha for commit in CommitGraph.walk(head)))
+        self.assertEqual(len(expected), CommitGraph.generation(head))
+        self.assertFalse(head.is_loaded())
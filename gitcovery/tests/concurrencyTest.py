@@ -0,0 +1,140 @@
+import os
+import random
+import shutil
+import tempfile
+import threading
+import time
+from unittest import TestCase
+
+from gitcovery import Author, Commit, Git, GitFolder, MemoryBackend, Repository
+
+
+class _SlowBackend(MemoryBackend):
+    """
+    An in-memory repository that counts the commits it loads one by one,
+    and takes a moment for every load so loads from different threads overlap.
+    """
+
+    def __init__(self):
+        """
+        Constructor for a _SlowBackend.
+        """
+        super(_SlowBackend, self).__init__()
+        self.loads = {}
+        self._loads_lock = threading.Lock()
+
+    def log_records(self, revisions, walk=True, load_diff=False, workers=1):
+        if not walk:
+            with self._loads_lock:
+                for revision in revisions:
+                    self.loads[revision] = self.loads.get(revision, 0) + 1
+            time.sleep(0.001)
+        return super(_SlowBackend, self).log_records(revisions, walk=walk, load_diff=load_diff, workers=workers)
+
+
+class ConcurrencyTest(TestCase):
+    """
+    Test class for using the caches of a repository from many threads at once.
+    """
+    _NUM_THREADS = 16
+
+    def setUp(self):
+        """
+        Create a repository with a generated history.
+        """
+        self.backend = _SlowBackend.generate(300, num_authors=8, tag_every=20, seed=3)
+        self.repository = Repository(self.backend)
+        self.shas = list(self.backend.rev_list(['HEAD']))
+        self.names = sorted(set(row[2] for row, _ in self.backend.log_records(['HEAD'])))
+
+    def hammer(self, func):
+        """
+        Run a function from many threads, which all start at the same moment.
+
+        :type func: int -> object
+        :param func: The function to run, which gets the number of the thread
+        :rtype: List[object]
+        :return: The results of every thread
+        """
+        start = threading.Event()
+        results = [None] * self._NUM_THREADS
+        errors = []
+
+        def run(i):
+            start.wait()
+            try:
+                with self.repository:
+                    results[i] = func(i)
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=run, args=(i,)) for i in range(self._NUM_THREADS)]
+        for thread in threads:
+            thread.start()
+        start.set()
+        for thread in threads:
+            thread.join()
+        self.assertEqual([], errors)
+        return results
+
+    def test_load_once(self):
+        """
+        Test that every commit is only loaded once and only registered once with its author,
+        when all threads load the same commits in a different order.
+        """
+        def load(i):
+            shas = list(self.shas)
+            random.Random(i).shuffle(shas)
+            for sha in shas:
+                Commit.get_commit(sha).load()
+
+        self.hammer(load)
+        self.assertEqual(set(self.shas), set(self.backend.loads.keys()))
+        self.assertEqual([1], list(set(self.backend.loads.values())))
+
+        with self.repository:
+            for row, _ in self.backend.log_records(self.shas, walk=False):
+                commit = Commit.get_commit(row[0])
+                self.assertEqual(row[2], commit.author.name)
+                self.assertEqual(row[10], commit.title)
+            for author in Author.list():
+                shas = [commit.sha for commit in author.commits]
+                self.assertEqual(len(set(shas)), len(shas))
+
+    def test_shared_caches(self):
+        """
+        Test that all threads get the same commits, authors, tags and HEAD.
+        """
+        def lookup(i):
+            commits = [Commit.get_commit(sha)._id for sha in self.shas[i::2]]
+            authors = [Author.get_author(name) for name in self.names]
+            return Git.get_head(), Git.get_tags_by_commit(), commits, authors
+
+        results = self.hammer(lookup)
+        head, tags, _, authors = results[0]
+        for i, (other_head, other_tags, commits, other_authors) in enumerate(results):
+            self.assertEqual(head, other_head)
+            self.assertEqual(sorted(tags, key=lambda tag: tag[1]), sorted(other_tags, key=lambda tag: tag[1]))
+            self.assertEqual([self.repository._table.find(sha) for sha in self.shas[i::2]], commits)
+            self.assertTrue(all(a is b for a, b in zip(authors, other_authors)))
+        self.assertEqual(len(self.shas), len(self.repository._table))
+
+    def test_children(self):
+        """
+        Test that the children of a folder are listed once, and that no thread sees a partial listing.
+        """
+        folder = tempfile.mkdtemp()
+        try:
+            for i in range(50):
+                os.mkdir(os.path.join(folder, 'folder%d' % i))
+                with open(os.path.join(folder, 'file%d.txt' % i), 'w') as f:
+                    f.write('%d\n' % i)
+            root = GitFolder(folder)
+
+            results = self.hammer(lambda i: (root.children(), len(root.files()), len(root.folders())))
+            for children, num_files, num_folders in results:
+                self.assertIs(results[0][0], children)
+                self.assertEqual((50, 50), (num_files, num_folders))
+            self.assertEqual(100, len(root.children()))
+        finally:
+            shutil.rmtree(folder)
@@ -0,0 +1,78 @@
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+from gitcovery import Git, MemoryBackend, Repository
+
+
+class FollowTest(TestCase):
+    """
+    Test class for following the history of files through renames.
+    """
+
+    def test_memory(self):
+        """
+        Test that the history continues with the history of the old path at every rename.
+        """
+        backend = MemoryBackend()
+        first = backend.add_commit({'a.txt': b'old\n'}, timestamp=1)
+        removed = backend.add_commit({'a.txt': None, 'b.txt': b'b\n'}, [first], timestamp=2)
+        created = backend.add_commit({'a.txt': b'a\n'}, [removed], timestamp=3)
+        changed = backend.add_commit({'a.txt': b'a\nb\n'}, [created], timestamp=4)
+        renamed = backend.add_commit({'a.txt': None, 'src/c.txt': b'a\nb\n'}, [changed], timestamp=5)
+        other = backend.add_commit({'b.txt': b'c\n'}, [renamed], timestamp=6)
+        moved = backend.add_commit({'src/c.txt': None, 'd.txt': b'a\nb\n'}, [other], timestamp=7)
+        last = backend.add_commit({'d.txt': b'a\nb\nc\n'}, [moved], timestamp=8)
+        backend.set_ref('refs/heads/master', last)
+
+        repository = Repository(backend)
+        self.assertEqual([last, moved], [commit.sha for commit in repository.history('d.txt')])
+        self.assertEqual([last, moved, renamed, changed, created, removed, first],
+                         [commit.sha for commit in repository.history('d.txt', follow=True)])
+        self.assertEqual([(moved, 'd.txt'), (renamed, 'src/c.txt')],
+                         [(commit.sha, path) for commit, path in repository._follow('d.txt')][1:3])
+        self.assertEqual([other, removed], [commit.sha for commit in repository.history('b.txt', follow=True)])
+
+    def test_git(self):
+        """
+        Test that following renames gives the same history as `git log --follow`.
+        """
+        folder = tempfile.mkdtemp()
+        try:
+            for cmd in (['init', '-q'], ['config', 'user.name', 'Test'], ['config', 'user.email', 'test@example.com']):
+                Git.call(cmd, root=folder)
+
+            def commit(changes, message):
+                for path, contents in changes.items():
+                    if contents is None:
+                        Git.call(['rm', '-q', path], root=folder)
+                        continue
+                    if not os.path.isdir(os.path.join(folder, os.path.dirname(path))):
+                        os.makedirs(os.path.join(folder, os.path.dirname(path)))
+                    with open(os.path.join(folder, path), 'w') as f:
+                        f.write(contents)
+                    Git.call(['add', path], root=folder)
+                Git.call(['commit', '-q', '-m', message], root=folder)
+
+            lines = ''.join('line %d\n' % i for i in range(20))
+            commit({'src/one.py': lines}, 'Add one')
+            commit({'src/one.py': lines + 'more\n'}, 'Change one')
+            commit({'src/one.py': None, 'src/two.py': lines + 'more\n'}, 'Rename one to two')
+            commit({'src/two.py': lines + 'more\nagain\n', 'other.py': 'other\n'}, 'Change two')
+            commit({'src/two.py': None, 'lib/three.py': lines + 'more\nagain\nmoved\n'}, 'Move two to three')
+            commit({'lib/three.py': lines + 'last\n'}, 'Change three')
+
+            repository = Repository.open(folder)
+            try:
+                with repository:
+                    three = repository.root.get_file('lib/three.py')
+                    expected = Git.call(['log', '--follow', '--format=%H', '--', 'lib/three.py'], root=folder).split()
+                    self.assertEqual(expected, [commit.sha for commit in three.history(follow=True)])
+                    self.assertEqual(expected[:2], [commit.sha for commit in three.history()])
+                    self.assertEqual(['lib/three.py', None, 'src/two.py', None, 'src/one.py', 'src/one.py'],
+                                     [diff.name if diff else None for diff in three.changes(follow=True)])
+            finally:
+                repository.close()
+        finally:
+            shutil.rmtree(folder)
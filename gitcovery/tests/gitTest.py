@@ -1,6 +1,6 @@
 from unittest import TestCase
 
-from gitcovery import Git, GitFolder
+from gitcovery import Git, GitFolder, Repository
 
 
 class GitTest(TestCase):
@@ -16,14 +16,10 @@ class GitTest(TestCase):
 
     def setUp(self):
         """
-        Reset all the fields of Git.
+        Start every test with a new default repository.
         """
-        Git._commits = {}
-        Git._authors = {}
-        Git._tags = None
-        Git._initialCommits = []
-        Git._head = None
-        Git.root = None
+        Git.close()
+        Repository._default = Repository()
 
     def test_verify_root(self):
         """
@@ -31,7 +27,7 @@ class GitTest(TestCase):
         """
         with self.assertRaises(Exception):
             Git._verify_root()
-        Git.root = 'path/to/root'
+        Repository.current().root = 'path/to/root'
         Git._verify_root()
 
     def test_set_root_not_exists(self):
@@ -95,4 +91,43 @@ class GitTest(TestCase):
 
         # Reset
         encoding, error_policy = Git.set_decode_settings(char_encoding='utf-8')
-        self.assertEqual('utf-8', encoding)
\ No newline at end of file
+        self.assertEqual('utf-8', encoding)
+    def test_call_stream(self):
+        """
+        Test that streaming a call gives the same lines as a normal call.
+        """
+        Git.set_root('.')
+        expected = Git.call(['ls-files']).split('\n')[:-1]
+        self.assertEqual(expected, list(Git.call_stream(['ls-files'])))
+
+    def test_call_stream_separator(self):
+        """
+        Test that the output is split on the given separator.
+        """
+        Git.set_root('.')
+        expected = Git.call(['ls-files', '-z']).split('\0')[:-1]
+        self.assertEqual(expected, list(Git.call_stream(['ls-files', '-z'], separator='\0')))
+
+    def test_call_stream_error(self):
+        """
+        Test that a failing streamed call raises an IOError when not killing on errors.
+        """
+        Git.set_root('.')
+        with self.assertRaises(IOError):
+            list(Git.call_stream(['show', 'non-existent-revision'], kill_on_error=False))
+
+    def test_revisions_since(self):
+        """
+        Test the selection of revisions that are new since the old tips.
+        """
+        self.assertEqual(['a', 'b', '^b', '^c'], Git._revisions_since(['a', 'b'], ['c', 'b']))
+        self.assertEqual(['a'], Git._revisions_since(['a'], []))
+        self.assertIsNone(Git._revisions_since(['a'], ['a', 'b']))
+        self.assertIsNone(Git._revisions_since([], []))
+
+    def test_get_tips(self):
+        """
+        Test that the tips contain HEAD.
+        """
+        Git.set_root('.')
+        self.assertIn(Git.call(['rev-parse', 'HEAD']).strip(), Git._get_tips())
@@ -0,0 +1,93 @@
+from unittest import TestCase
+
+from gitcovery import Commit, CommitGraph, Git, MemoryBackend, Repository
+from gitcovery.graph import _Bitset
+
+
+class CommitGraphTest(TestCase):
+    """
+    Test class for the traversal of the commit graph.
+    """
+
+    def setUp(self):
+        """
+        Use this repository as the root.
+        """
+        Git.set_root('.')
+        self.shas = [sha for sha in Git.call(['rev-list', 'HEAD']).split('\n') if sha]
+        self.head = Commit(self.shas[0])
+
+    def test_bitset(self):
+        """
+        Test that the bitset grows and only adds ids once.
+        """
+        bitset = _Bitset(4)
+        self.assertTrue(bitset.add(3))
+        self.assertFalse(bitset.add(3))
+        self.assertTrue(bitset.add(100))
+        self.assertIn(100, bitset)
+        self.assertNotIn(99, bitset)
+        self.assertNotIn(1000, bitset)
+
+    def test_walk(self):
+        """
+        Test that walking from HEAD returns the same commits as git.
+        """
+        self.assertEqual(sorted(self.shas), sorted(commit.sha for commit in CommitGraph.walk(self.head)))
+
+    def test_walk_topo(self):
+        """
+        Test that a topological walk returns every commit before its parents.
+        """
+        order = [commit.sha for commit in CommitGraph.walk(self.head, order='topo')]
+        self.assertEqual(sorted(self.shas), sorted(order))
+        for i, sha in enumerate(order):
+            for parent in Commit(sha).parents:
+                self.assertGreater(order.index(parent.sha), i)
+
+    def test_walk_unknown_order(self):
+        """
+        Test that an unknown order is rejected.
+        """
+        self.assertRaises(Exception, list, CommitGraph.walk(self.head, order='random'))
+
+    def test_first_parents(self):
+        """
+        Test that the first-parent chain matches git.
+        """
+        expected = [sha for sha in Git.call(['rev-list', '--first-parent', 'HEAD']).split('\n') if sha]
+        self.assertEqual(expected, [commit.sha for commit in CommitGraph.first_parents(self.head)])
+
+    def test_ancestry(self):
+        """
+        Test the ancestry queries between the first and the last commit.
+        """
+        root = Commit(self.shas[-1])
+        self.assertEqual(len(self.shas) - 1, len(CommitGraph.ancestors(self.head)))
+        self.assertTrue(CommitGraph.is_ancestor(root, self.head))
+        self.assertTrue(CommitGraph.is_ancestor(self.head, self.head))
+        self.assertEqual(len(self.shas) > 1, not CommitGraph.is_ancestor(self.head, root))
+        self.assertEqual(root, CommitGraph.merge_base(root, self.head))
+        self.assertEqual(len(self.shas), CommitGraph.generation(self.head))
+
+    def test_for_each_parent(self):
+        """
+        Test that a function is applied to a commit and all its ancestors.
+        """
+        visited = []
+        self.head.for_each_parent(visited.append)
+        self.assertEqual(sorted(self.shas), sorted(commit.sha for commit in visited))
+
+    def test_merge_bases(self):
+        """
+        Test that the merge bases are the common ancestors that are not an ancestor of another common ancestor.
+        """
+        repository = Repository(MemoryBackend.generate(80, branch_rate=0.3, merge_rate=0.3, seed=4))
+        with repository:
+            commits = list(CommitGraph.walk(Git.get_head()))
+            reachable = dict((commit, set(CommitGraph.ancestors(commit)) | set([commit])) for commit in commits)
+            for a in commits[::7]:
+                for b in commits[3::11]:
+                    common = reachable[a] & reachable[b]
+                    best = [c for c in common if not any(c != o and c in reachable[o] for o in common)]
+                    self.assertEqual(sorted(c.sha for c in best), sorted(c.sha for c in CommitGraph.merge_bases(a, b)))
@@ -0,0 +1,106 @@
+import datetime
+from itertools import islice
+from unittest import TestCase
+
+from dateutil import tz
+
+from gitcovery import GitFolder, MemoryBackend, Repository
+
+
+class _CountingBackend(MemoryBackend):
+    """
+    An in-memory repository that counts the requests for the metadata of commits.
+    """
+
+    def __init__(self):
+        """
+        Constructor for a _CountingBackend.
+        """
+        super(_CountingBackend, self).__init__()
+        self.requests = 0
+
+    def log_records(self, revisions, walk=True, load_diff=False, workers=1):
+        if not walk:
+            self.requests += 1
+        return super(_CountingBackend, self).log_records(revisions, walk=walk, load_diff=load_diff, workers=workers)
+
+
+class HistoryTest(TestCase):
+    """
+    Test class for iterating over a history.
+    """
+
+    def setUp(self):
+        """
+        Create a repository with a generated history.
+        """
+        self.backend = _CountingBackend.generate(200, num_files=20, seed=8)
+        self.repository = Repository(self.backend)
+        self.shas = list(self.backend.rev_list(['HEAD']))
+
+    def history(self, **kwargs):
+        """
+        :rtype: List[str]
+        :return: The hashes of the commits in the history of the repository, with the given options
+        """
+        return [commit.sha for commit in self.repository.iter_history(**kwargs)]
+
+    def test_limit(self):
+        """
+        Test that the latest commits are listed.
+        """
+        self.assertEqual(self.shas, self.history())
+        self.assertEqual(self.shas[:10], self.history(limit=10))
+        self.assertEqual([], self.history(limit=0))
+
+        path = 'src/module3'
+        self.assertEqual(list(self.backend.rev_list(['HEAD'], path=path))[:5], self.history(path=path, limit=5))
+
+    def test_dates(self):
+        """
+        Test that only the commits between the given dates are listed, for both timestamps and datetimes.
+        """
+        times = dict((row[0], row[8]) for row, _ in self.backend.log_records(['HEAD']))
+        since, until = times[self.shas[150]], times[self.shas[50]]
+        expected = [sha for sha in self.shas if since <= times[sha] <= until]
+        self.assertEqual(expected, self.history(since=since, until=until))
+
+        utc = datetime.datetime.fromtimestamp(since, tz.tzutc())
+        self.assertEqual(expected, self.history(since=utc, until=until))
+        self.assertEqual(expected[:3], self.history(since=since, until=until, limit=3))
+
+    def test_first_parent(self):
+        """
+        Test that only the first parents of merges are followed.
+        """
+        expected = []
+        commit = self.repository.get_head()
+        while commit:
+            expected.append(commit.sha)
+            commit = commit.parents[0] if commit.parents else None
+        self.assertEqual(expected, self.history(first_parent=True))
+        self.assertLess(len(expected), len(self.shas))
+
+    def test_batches(self):
+        """
+        Test that loading the iterated commits one by one loads them in batches.
+        """
+        for commit in self.repository.iter_history():
+            commit.load()
+        self.assertLess(self.backend.requests, len(self.shas) // 4)
+
+    def test_git(self):
+        """
+        Test that iterating over the history of a file in this repository gives its latest commits.
+        """
+        repository = Repository.open('.')
+        try:
+            with repository:
+                setup = GitFolder('.').get_file('setup.py')
+                history = setup.history()
+                self.assertEqual(history[:2], list(setup.iter_history(limit=2)))
+                self.assertEqual(history[:3], list(islice(setup.iter_history(), 3)))
+                self.assertEqual(history, list(setup.iter_history(first_parent=True)))
+                self.assertEqual(history[-1:], list(setup.iter_history(until=history[-1].commit_date)))
+        finally:
+            repository.close()
@@ -0,0 +1,82 @@
+import os
+import shutil
+import sys
+import tempfile
+from unittest import TestCase
+
+from gitcovery import Commit, Git, GitBackend, Repository
+
+
+class LogTest(TestCase):
+    """
+    Test class for parsing the output of `git log`, which uses record separators between the commits.
+    """
+
+    def setUp(self):
+        """
+        Create a repository with record separators in a commit message, in the contents of a file and in a path.
+        """
+        self.folder = tempfile.mkdtemp()
+        for cmd in (['init', '-q'], ['config', 'user.name', 'Test'], ['config', 'user.email', 'test@example.com']):
+            Git.call(cmd, root=self.folder)
+        with open(os.path.join(self.folder, 'a\x1eb.txt'), 'w') as f:
+            f.write('one\x1etwo\n')
+        Git.call(['add', '-A', '.'], root=self.folder)
+        Git.call(['commit', '-q', '-m', 'Ti\x1etle\n\nMes\x1esage'], root=self.folder)
+        Git.call(['mv', 'a\x1eb.txt', 'c.txt'], root=self.folder)
+        Git.call(['commit', '-q', '-m', 'Rename'], root=self.folder)
+        self.shas = Git.call(['rev-list', '--reverse', 'HEAD'], root=self.folder).split()
+        self.backend = GitBackend(self.folder)
+
+    def tearDown(self):
+        """
+        Close the backend and remove the repository.
+        """
+        self.backend.close()
+        shutil.rmtree(self.folder)
+
+    def check(self, results):
+        """
+        :type results: List[(tuple, str | None)]
+        :param results: The rows and diffs of the commits, newest first
+        """
+        self.assertEqual(list(reversed(self.shas)), [row[0] for row, _ in results])
+        (row, diff), = results[1:]
+        self.assertEqual(('Ti\x1etle', 'Mes\x1esage'), row[10:])
+        if diff is not None:
+            self.assertIn('+one\x1etwo', diff)
+
+    def test_log_records(self):
+        """
+        Test that record separators inside a commit do not split it, both when requesting commits and streaming them.
+        """
+        for load_diff in (False, True):
+            self.check(list(self.backend.log_records(list(reversed(self.shas)), walk=False, load_diff=load_diff)))
+            self.check(list(self.backend.log_records(['HEAD'], load_diff=load_diff)))
+
+        repository = Repository.open(self.folder)
+        try:
+            with repository:
+                commit = Commit(self.shas[0])
+                self.assertEqual('Ti\x1etle', commit.title)
+                Commit.load_all(load_diff=True)
+                self.assertEqual('Rename', Commit(self.shas[1]).title)
+        finally:
+            repository.close()
+
+        if sys.version_info >= (3, 5):
+            import asyncio
+            from gitcovery import aio
+            loop = asyncio.new_event_loop()
+            try:
+                self.check(loop.run_until_complete(aio.log_records(self.backend, list(reversed(self.shas)))))
+            finally:
+                loop.close()
+
+    def test_log_paths(self):
+        """
+        Test that record separators in paths do not split the changes of a commit.
+        """
+        self.assertEqual([(self.shas[1], [['a\x1eb.txt', 'c.txt']]), (self.shas[0], [['a\x1eb.txt']])],
+                         list(self.backend.log_paths(['HEAD'])))
+        self.assertEqual([(self.shas[1], [('a\x1eb.txt', 'c.txt')])], list(self.backend.log_renames(['HEAD'])))
@@ -0,0 +1,133 @@
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+from gitcovery import Git
+from gitcovery.catfile import _CatFile
+from gitcovery.objects import _ObjectDatabase, _PackFile
+
+
+class ObjectDatabaseTest(TestCase):
+    """
+    Test class for the in-process object reader.
+    """
+
+    def setUp(self):
+        """
+        Clone this repository into a temporary folder, so its objects can be repacked without touching this one.
+        """
+        self.folder = tempfile.mkdtemp()
+        Git.call(['clone', '-q', '--no-local', os.path.abspath('.'), self.folder], root='.')
+        Git.set_root(self.folder)
+        self.objects_dir = os.path.join(self.folder, '.git', 'objects')
+        self.head = Git.call(['rev-parse', 'HEAD']).strip()
+
+    def tearDown(self):
+        """
+        Disable the object reader and remove the temporary folder.
+        """
+        Git.disable_object_reader()
+        Git.set_root('.')
+        shutil.rmtree(self.folder)
+
+    def assert_same_as_cat_file(self, names):
+        """
+        Assert that the object reader returns the same as `git cat-file` for the given object names.
+
+        :type names: List[str]
+        :param names: The names of the objects to look up
+        """
+        reader = _ObjectDatabase(self.objects_dir)
+        cat_file = _CatFile(self.folder)
+        cat_file_check = _CatFile(self.folder, check_only=True)
+        try:
+            for name in names:
+                self.assertEqual(cat_file.query(name), reader.lookup(name), name)
+                self.assertEqual(cat_file_check.query(name), reader.lookup(name, check_only=True), name)
+        finally:
+            cat_file.close()
+            cat_file_check.close()
+            reader.close()
+
+    def object_names(self):
+        """
+        :rtype: List[str]
+        :return: The hashes of all objects and a number of object names with paths
+        """
+        names = Git.call(['cat-file', '--batch-all-objects', '--batch-check=%(objectname)']).split()
+        for sha in Git.call(['rev-list', '--all']).split():
+            names += [sha + '^{tree}', sha + ':', sha + ':gitcovery', sha + ':gitcovery/git.py',
+                      sha + ':README.md', sha + ':does/not/exist', '0' * 40]
+        return names
+
+    def test_packed(self):
+        """
+        Test that packed objects, including deltas, are read the same as git does.
+        """
+        Git.call(['repack', '-q', '-a', '-d', '--depth=50'])
+        self.assert_same_as_cat_file(self.object_names())
+
+    def test_loose(self):
+        """
+        Test that loose objects are read the same as git does.
+        """
+        blob = Git.call(['hash-object', '-w', '--stdin'], stdin='loose object\n').strip()
+        self.assert_same_as_cat_file([blob])
+
+    def test_check_only(self):
+        """
+        Test that checking objects reads their type and size without inflating them.
+        """
+        Git.call(['repack', '-q', '-a', '-d', '--depth=50'])
+        names = self.object_names()
+        reader = _ObjectDatabase(self.objects_dir)
+        inflate = _PackFile.inflate
+        inflated = []
+
+        def count(pack, start, size):
+            inflated.append(size)
+            return inflate(pack, start, size)
+
+        try:
+            _PackFile.inflate = count
+            for name in names:
+                if ':' not in name and '^' not in name:
+                    reader.lookup(name, check_only=True)
+            self.assertEqual([], inflated)
+        finally:
+            _PackFile.inflate = inflate
+            reader.close()
+
+    def test_unsupported_name(self):
+        """
+        Test that names that need git to resolve them are rejected.
+        """
+        reader = _ObjectDatabase(self.objects_dir)
+        self.assertRaises(ValueError, reader.lookup, 'HEAD')
+        self.assertRaises(ValueError, reader.lookup, 'master:README.md')
+        reader.close()
+
+    def test_apply_delta(self):
+        """
+        Test applying a delta with both copy and insert instructions.
+        """
+        base = b'0123456789'
+        # Base size 10, result size 7, copy 4 bytes from offset 2, insert 'abc'
+        delta = b'\x0a\x07' + b'\x91\x02\x04' + b'\x03abc'
+        self.assertEqual(b'2345abc', _PackFile.apply_delta(base, delta))
+        self.assertRaises(IOError, _PackFile.apply_delta, b'short', delta)
+
+    def test_git_uses_reader(self):
+        """
+        Test that Git reads objects and commits with the object reader when enabled.
+        """
+        expected = Git.cat_file(self.head + ':README.md')
+        Git.enable_object_reader()
+        backend = Git.get_backend()
+        self.assertIsNotNone(backend._get_object_reader())
+        self.assertEqual(expected, Git.cat_file(self.head + ':README.md'))
+        self.assertEqual(Git.read_tree(self.head), Git.read_tree('HEAD'))
+
+        row, _ = next(backend._fetch([self.head]))
+        self.assertEqual(row, backend._read_row(backend._get_object_reader(), self.head))
@@ -0,0 +1,118 @@
+from unittest import TestCase
+
+from gitcovery import Git, GitFolder, MemoryBackend, Repository
+
+
+class _CountingBackend(MemoryBackend):
+    """
+    An in-memory repository that remembers the revisions of which the changed paths are requested.
+    """
+
+    def __init__(self):
+        """
+        Constructor for a _CountingBackend.
+        """
+        super(_CountingBackend, self).__init__()
+        self.requests = []
+
+    def log_paths(self, revisions):
+        self.requests.append(list(revisions))
+        return super(_CountingBackend, self).log_paths(revisions)
+
+
+class PathIndexTest(TestCase):
+    """
+    Test class for looking up the history of paths in the path index.
+    """
+
+    @staticmethod
+    def paths(backend):
+        """
+        :type backend: MemoryBackend
+        :param backend: The repository
+        :rtype: List[str]
+        :return: All the files and folders at HEAD
+        """
+        paths = set()
+        for path in backend.files_at(backend.rev_parse('HEAD')):
+            while path:
+                paths.add(path)
+                path = path.rpartition('/')[0]
+        return sorted(paths)
+
+    def history(self, repository, path):
+        """
+        :type repository: Repository
+        :param repository: The repository
+        :type path: str
+        :param path: The path
+        :rtype: List[str]
+        :return: The hashes of the commits in the history of the path
+        """
+        return [commit.sha for commit in repository.history(path)]
+
+    def test_linear(self):
+        """
+        Test that the index gives the same histories as `git log <path>` for a history without merges.
+        """
+        backend = MemoryBackend.generate(200, num_files=30, branch_rate=0, merge_rate=0, seed=6)
+        repository = Repository(backend)
+        repository.enable_path_index()
+        for path in self.paths(backend):
+            self.assertEqual(list(backend.rev_list(['HEAD'], path=path)), self.history(repository, path))
+
+    def test_merges(self):
+        """
+        Test that the index contains the commits of `git log <path>` in the same order for a history with merges.
+        """
+        backend = MemoryBackend.generate(300, num_files=30, branch_rate=0.1, merge_rate=0.1, seed=7)
+        repository = Repository(backend)
+        repository.enable_path_index()
+        for path in self.paths(backend):
+            expected = list(backend.rev_list(['HEAD'], path=path))
+            indexed = self.history(repository, path)
+            self.assertEqual(expected, [sha for sha in indexed if sha in set(expected)])
+
+    def test_update(self):
+        """
+        Test that only the new commits are indexed when HEAD moves forward,
+        and that the index is built again when HEAD moves to another branch.
+        """
+        backend = _CountingBackend()
+        first = backend.add_commit({'a/x.txt': b'1', 'b.txt': b'1'}, timestamp=1)
+        second = backend.add_commit({'a/x.txt': b'2'}, [first], timestamp=2)
+        backend.set_ref('refs/heads/master', second)
+        repository = Repository(backend)
+        repository.enable_path_index()
+        self.assertEqual([second, first], self.history(repository, 'a'))
+        self.assertEqual([first], self.history(repository, 'b.txt'))
+
+        third = backend.add_commit({'b.txt': b'2', 'a/y.txt': b'1'}, [second], timestamp=3)
+        backend.set_ref('refs/heads/master', third)
+        repository._clear_refs()
+        self.assertEqual([third, second, first], self.history(repository, 'a'))
+        self.assertEqual([third, first], self.history(repository, 'b.txt'))
+        self.assertEqual([third], self.history(repository, 'a/y.txt'))
+        self.assertEqual([[second], [third, '^' + second]], backend.requests)
+
+        backend.set_ref('refs/heads/master', first)
+        repository._clear_refs()
+        self.assertEqual([], self.history(repository, 'a/y.txt'))
+        self.assertEqual([first], self.history(repository, 'a/x.txt'))
+        self.assertEqual([first], backend.requests[-1])
+
+    def test_git(self):
+        """
+        Test that the index gives the same histories as `git log <path>` for this repository.
+        """
+        repository = Repository.open('.')
+        try:
+            with repository:
+                root = GitFolder('.')
+                files = [root.get_file('setup.py'), root.get_folder('gitcovery'), root.get_file('gitcovery/git.py')]
+                expected = [[commit.sha for commit in file.history()] for file in files]
+                Git.enable_path_index()
+                self.assertEqual(expected, [[commit.sha for commit in file.history()] for file in files])
+                self.assertEqual(len(Git.call(['rev-list', 'HEAD']).split()), len(root.history()))
+        finally:
+            repository.close()
@@ -0,0 +1,101 @@
+import threading
+import warnings
+from unittest import TestCase
+
+from gitcovery import Author, Commit, CommitGraph, Git, MemoryBackend, Repository
+
+
+class RepositoryTest(TestCase):
+    """
+    Test class for analysing multiple repositories at once.
+    """
+
+    def setUp(self):
+        """
+        Create two different in-memory repositories.
+        """
+        self.first = Repository(MemoryBackend.generate(50, num_authors=3, seed=1))
+        self.second = Repository(MemoryBackend.generate(80, num_authors=5, seed=2))
+
+    def test_current(self):
+        """
+        Test that a repository is only current within its with statement.
+        """
+        default = Repository.current()
+        with self.first as repository:
+            self.assertIs(self.first, repository)
+            self.assertIs(self.first, Repository.current())
+            with self.second:
+                self.assertIs(self.second, Repository.current())
+            self.assertIs(self.first, Repository.current())
+        self.assertIs(default, Repository.current())
+
+    def test_root(self):
+        """
+        Test that the deprecated Git.root forwards to the root of the current repository.
+        """
+        repository = Repository.open('.')
+        try:
+            with warnings.catch_warnings(record=True) as caught:
+                warnings.simplefilter('always')
+                with repository:
+                    self.assertIs(Git.get_root(), Git.root)
+                with self.first:
+                    self.assertIsNone(Git.root)
+            self.assertEqual([DeprecationWarning] * 2, [warning.category for warning in caught])
+        finally:
+            repository.close()
+
+    def test_separate_caches(self):
+        """
+        Test that every repository has its own commits and authors,
+        which keep belonging to their repository outside of the with statement.
+        """
+        with self.first:
+            head = Git.get_head()
+            authors = list(Author.list())
+        with self.second:
+            self.assertNotEqual(head.sha, Git.get_head().sha)
+            self.assertEqual(5, len(list(Author.list())))
+
+        self.assertEqual(3, len(authors))
+        self.assertIs(self.first, head._repo)
+        self.assertEqual(head.sha, self.first.get_backend().rev_parse('HEAD'))
+        self.assertTrue(all(commit._repo is self.first for commit in CommitGraph.walk(head)))
+        self.assertTrue(all(commit._repo is self.first for author in authors for commit in author.commits))
+        self.assertEqual(-1, self.second._table.find(head.sha))
+
+    def test_equality(self):
+        """
+        Test that commits are only equal to the commits of their own repository, even at the same row of its table.
+        """
+        with self.first:
+            first = Git.get_head()
+        with self.second:
+            second = Git.get_head()
+        self.assertEqual(first._id, second._id)
+        self.assertNotEqual(first, second)
+        self.assertEqual(first, Commit(first.sha, repository=self.first))
+        self.assertEqual(hash(first), hash(Commit(first.sha, repository=self.first)))
+        self.assertEqual(2, len(set([first, second, Commit(second.sha, repository=self.second)])))
+
+    def test_threads(self):
+        """
+        Test that repositories can be analysed concurrently from different threads.
+        """
+        results = {}
+
+        def analyse(repository):
+            with repository:
+                Commit.load_all()
+                results[repository] = (Git.get_head().sha, sum(1 for _ in CommitGraph.walk(Git.get_head())))
+
+        threads = [threading.Thread(target=analyse, args=(repository,)) for repository in (self.first, self.second)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        for repository in (self.first, self.second):
+            backend = repository.get_backend()
+            self.assertEqual((backend.rev_parse('HEAD'), len(list(backend.rev_list(['HEAD'])))), results[repository])
@@ -0,0 +1,78 @@
+import json
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+from gitcovery import Commit, Git, MemoryBackend, Repository, Stats
+
+
+class StatsTest(TestCase):
+    """
+    Test class for the instrumentation of the calls to git, the parsing and the caches.
+    """
+
+    def setUp(self):
+        """
+        Start with empty counters.
+        """
+        Stats.reset()
+        Stats.enable(trace=True)
+
+    def tearDown(self):
+        """
+        Disable the instrumentation again.
+        """
+        Stats.disable()
+        Stats.reset()
+
+    def test_caches(self):
+        """
+        Test that loading commits counts the parsed commits and the cache hits and misses.
+        """
+        backend = MemoryBackend.generate(30, num_authors=3, seed=4)
+        with Repository(backend):
+            shas = list(backend.rev_list(['HEAD']))
+            for sha in shas + shas:
+                Commit.get_commit(sha).load()
+
+        stats = Git.stats()
+        self.assertEqual({'hits': len(shas), 'misses': len(shas)}, stats['cache']['commits'])
+        self.assertEqual(len(shas), stats['parse']['commit']['calls'])
+        self.assertEqual(len(shas), sum(count for _, count in stats['parse']['commit']['histogram']))
+        self.assertEqual(1, stats['cache']['authors']['misses'])
+
+    def test_git(self):
+        """
+        Test that calls to git are counted by subcommand with the number of bytes read, and exported as a trace.
+        """
+        Git.set_root('.')
+        Stats.reset()
+        try:
+            out = Git.call(['rev-parse', 'HEAD'])
+            records = list(Git.call_stream(['rev-list', '--max-count=3', 'HEAD']))
+            Git.cat_file('HEAD:setup.py')
+            Stats.disable()
+            Git.call(['rev-parse', 'HEAD'])
+        finally:
+            Git.close()
+
+        stats = Git.stats()['git']
+        self.assertEqual(1, stats['rev-parse']['calls'])
+        self.assertEqual(len(out), stats['rev-parse']['bytes'])
+        self.assertEqual(sum(len(record) + 1 for record in records), stats['rev-list']['bytes'])
+        self.assertEqual(1, stats['cat-file --batch']['calls'])
+        bound, count = stats['rev-parse']['histogram'][0]
+        self.assertEqual(1, count)
+        self.assertTrue(bound is None or stats['rev-parse']['time'] <= bound)
+
+        folder = tempfile.mkdtemp()
+        try:
+            path = os.path.join(folder, 'trace.json')
+            Stats.write_trace(path)
+            with open(path) as f:
+                spans = json.load(f)['traceEvents']
+            self.assertEqual(['rev-parse', 'rev-list', 'cat-file --batch'], [span['name'] for span in spans])
+            self.assertTrue(all(span['ph'] == 'X' and span['dur'] >= 0 for span in spans))
+        finally:
+            shutil.rmtree(folder)
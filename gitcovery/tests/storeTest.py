@@ -0,0 +1,97 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+from unittest import TestCase
+
+from gitcovery import Author, Commit, Git, Repository
+
+
+class StoreTest(TestCase):
+    """
+    Test class for the on-disk cache of commit metadata.
+    """
+
+    def setUp(self):
+        """
+        Use this repository as the root and enable the cache in a temporary folder.
+        """
+        Git.set_root('.')
+        self.folder = tempfile.mkdtemp()
+        self.path = os.path.join(self.folder, 'commits.sqlite')
+        Git.enable_store(self.path)
+        self.sha = Git.call(['rev-parse', 'HEAD']).strip()
+
+    def tearDown(self):
+        """
+        Disable the cache and remove the temporary folder.
+        """
+        Git.disable_store()
+        shutil.rmtree(self.folder)
+
+    def test_load_adds_to_store(self):
+        """
+        Test that loading a commit adds it to the cache.
+        """
+        Commit(self.sha).load()
+        self.assertIn(self.sha, Git._get_store().get([self.sha]))
+
+    def test_load_from_store(self):
+        """
+        Test that a commit loaded from the cache equals the commit loaded from git.
+        """
+        expected = Commit(self.sha)
+        expected.unload()
+        expected.load()
+        title, message, author = expected.title, expected.message, expected.author.name
+        author_date, commit_date = expected.author_date, expected.commit_date
+        parents = list(map(lambda x: x.sha, expected.parents))
+
+        commit = Commit(self.sha)
+        commit.unload()
+        commit.load()
+        self.assertIsNone(commit._diff)
+        self.assertEqual(title, commit.title)
+        self.assertEqual(message, commit.message)
+        self.assertEqual(author, commit.author.name)
+        self.assertEqual(author_date, commit.author_date)
+        self.assertEqual(commit_date, commit.commit_date)
+        self.assertEqual(parents, list(map(lambda x: x.sha, commit.parents)))
+
+    def test_prefetch_adds_to_store(self):
+        """
+        Test that prefetching commits adds them to the cache.
+        """
+        shas = [sha for sha in Git.call(['rev-list', 'HEAD']).split('\n') if sha]
+        commits = list(map(Commit, shas))
+        for commit in commits:
+            commit.unload()
+        Commit.prefetch(commits)
+        self.assertEqual(len(shas), Git._get_store().count())
+
+    def test_load_authors_from_store(self):
+        """
+        Test that the authors are loaded from the cache after it is filled.
+        """
+        Repository.current()._authors = {}
+        Author._load_authors(Repository.current())
+        expected = sorted(map(lambda author: author.name, Author.list()))
+
+        self.assertEqual(len(Git.call(['rev-list', '--all']).split('\n')) - 1, Git._get_store().count())
+        Repository.current()._authors = {}
+        self.assertEqual(expected, sorted(map(lambda author: author.name, Author.list())))
+
+    def test_schema_version(self):
+        """
+        Test that a cache with a different schema version is recreated.
+        """
+        Commit(self.sha).load()
+        Git.disable_store()
+
+        connection = sqlite3.connect(self.path)
+        connection.execute('PRAGMA user_version = 0')
+        connection.commit()
+        connection.close()
+
+        Git.enable_store(self.path)
+        self.assertEqual(0, Git._get_store().count())
@@ -0,0 +1,88 @@
+from unittest import TestCase
+
+from gitcovery import Author, CommitTable
+
+
+class CommitTableTest(TestCase):
+    """
+    Test class for the columnar commit table.
+    """
+
+    def setUp(self):
+        """
+        Create an empty table and two authors.
+        """
+        self.table = CommitTable()
+        self.alice = Author('Alice', 'alice@example.com')
+        self.bob = Author('Bob', 'bob@example.com')
+
+    def test_intern(self):
+        """
+        Test that interning assigns consecutive ids and returns the existing id for known hashes.
+        """
+        first = self.table.intern('a' * 40)
+        second = self.table.intern('b' * 40)
+        self.assertEqual(0, first)
+        self.assertEqual(1, second)
+        self.assertEqual(first, self.table.intern('a' * 40))
+        self.assertEqual(2, len(self.table))
+        self.assertEqual('b' * 40, self.table.sha(second))
+
+    def test_find(self):
+        """
+        Test that finding an unknown hash does not add a row.
+        """
+        self.assertEqual(-1, self.table.find('c' * 40))
+        self.assertEqual(0, len(self.table))
+
+    def test_invalid_sha_size(self):
+        """
+        Test that hashes of different lengths cannot be mixed.
+        """
+        self.table.intern('a' * 40)
+        self.assertRaises(Exception, self.table.intern, 'b' * 64)
+
+    def test_set_row(self):
+        """
+        Test that the metadata of a row can be read back.
+        """
+        parent = self.table.intern('a' * 40)
+        row = self.table.intern('b' * 40)
+        self.assertFalse(self.table.is_loaded(row))
+        self.assertIsNone(self.table.author(row))
+
+        self.table.set_row(row, [parent], self.alice, 1520887436, 60, self.bob, 1520887500, -120,
+                           u'Title é', u'Multi\nline message')
+        self.assertTrue(self.table.is_loaded(row))
+        self.assertEqual([parent], self.table.parents(row))
+        self.assertEqual([], self.table.parents(parent))
+        self.assertIs(self.alice, self.table.author(row))
+        self.assertIs(self.bob, self.table.committer(row))
+        self.assertEqual((1520887436, 60), self.table.author_date(row))
+        self.assertEqual((1520887500, -120), self.table.commit_date(row))
+        self.assertEqual(u'Title é', self.table.title(row))
+        self.assertEqual(u'Multi\nline message', self.table.message(row))
+
+    def test_unload(self):
+        """
+        Test that unloading a row clears its author and diff.
+        """
+        row = self.table.intern('a' * 40)
+        self.table.set_row(row, [], self.alice, 0, 0, self.alice, 0, 0, 'title', '')
+        self.table.set_diff(row, 'diff')
+        self.table.unload(row)
+        self.assertFalse(self.table.is_loaded(row))
+        self.assertIsNone(self.table.author(row))
+        self.assertIsNone(self.table.get_diff(row))
+
+    def test_reload(self):
+        """
+        Test that setting a row again with the same text reuses the stored text instead of appending it.
+        """
+        row = self.table.intern('a' * 40)
+        for _ in range(3):
+            self.table.set_row(row, [], self.alice, 0, 0, self.alice, 0, 0, u'Title é', u'message')
+        self.assertEqual(len(u'Title é'.encode('utf-8') + b'message'), len(self.table._text))
+
+        self.table.set_row(row, [], self.alice, 0, 0, self.alice, 0, 0, u'Other', u'message')
+        self.assertEqual((u'Other', u'message'), (self.table.title(row), self.table.message(row)))
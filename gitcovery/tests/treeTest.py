@@ -0,0 +1,185 @@
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+from gitcovery import Git, MemoryBackend, Repository, TreeFile, TreeFolder
+
+
+class TreeTest(TestCase):
+    """
+    Test class for the snapshots of the files at a commit.
+    """
+
+    @staticmethod
+    def files(folder):
+        """
+        :type folder: TreeFolder
+        :param folder: The folder of a snapshot
+        :rtype: Dict[str, str]
+        :return: The hash of the blob of every file in the folder and its subfolders by path
+        """
+        files = {}
+        folder.for_each_file(lambda f: files.__setitem__(f.relative_path, f.sha))
+        return files
+
+    def test_memory(self):
+        """
+        Test that a snapshot contains all the files at a commit, with their contents at that commit.
+        """
+        backend = MemoryBackend.generate(40, num_files=15, seed=6)
+        repository = Repository(backend)
+        for sha in list(backend.rev_list(['HEAD']))[::7]:
+            root = repository.tree_at(sha)
+            self.assertEqual(backend.files_at(sha), self.files(root))
+
+            for path, blob in sorted(backend.files_at(sha).items())[:3]:
+                gitfile = root.get_file(path)
+                self.assertIsInstance(gitfile, TreeFile)
+                self.assertEqual(Git._decode(backend.read_blob(sha, path)), str(gitfile))
+                self.assertEqual(gitfile.at(sha), str(gitfile))
+                self.assertEqual(path.rpartition('/')[0], gitfile.parent().relative_path)
+
+    def test_sharing(self):
+        """
+        Test that snapshots share the folders and files they have in common, with their metrics.
+        """
+        backend = MemoryBackend()
+        first = backend.add_commit({'a/x.txt': b'1\n', 'a/y.txt': b'1\n2\n', 'b/z.txt': b'1\n2\n3\n'})
+        second = backend.add_commit({'b/z.txt': b'1\n', 'b/w.txt': b'1\n'}, [first])
+        third = backend.add_commit({'c.txt': b'1\n'}, [second])
+        repository = Repository(backend)
+
+        computed = []
+
+        def lines(gitfile):
+            computed.append(gitfile.relative_path)
+            return gitfile.count('\n')
+
+        one, two, three = [repository.tree_at(sha) for sha in (first, second, third)]
+        self.assertEqual(6, one.metric(lines))
+        self.assertEqual(['a/x.txt', 'a/y.txt', 'b/z.txt'], computed)
+
+        del computed[:]
+        self.assertEqual(5, two.metric(lines))
+        self.assertEqual(['b/w.txt', 'b/z.txt'], computed)
+        self.assertIs(one.a._node, two.a._node)
+        self.assertIsNot(one.b._node, two.b._node)
+        self.assertIs(one.a.get_file('x.txt')._node,
+                      two.b.get_file('w.txt').parent().parent().a.get_file('x.txt')._node)
+
+        del computed[:]
+        self.assertEqual(6, three.metric(lines))
+        self.assertEqual(['c.txt'], computed)
+        self.assertIs(two.b._node, three.b._node)
+        self.assertEqual(2, two.metric(lines, max))
+        self.assertIs(one._node, repository.tree_at(first)._node)
+
+        # The contents are only kept by the blob cache
+        self.assertEqual(3, len(repository._blobs))
+        repository.set_blob_cache_size(0)
+        self.assertEqual('1\n2\n', str(two.a.get_file('y.txt')))
+        self.assertEqual(0, len(repository._blobs))
+
+    def test_snapshot(self):
+        """
+        Test that a folder or file reached through two snapshots has the commit and parents of each snapshot.
+        """
+        backend = MemoryBackend()
+        first = backend.add_commit({'a/b/x.txt': b'1\n', 'c.txt': b'1\n'})
+        second = backend.add_commit({'c.txt': b'2\n'}, [first])
+        repository = Repository(backend)
+
+        one, two = repository.tree_at(first), repository.tree_at(second)
+        self.assertIs(one.a._node, two.a._node)
+        for root, sha in ((one, first), (two, second)):
+            gitfile = root.a.b.get_file('x.txt')
+            self.assertEqual(sha, gitfile.commit.sha)
+            self.assertEqual(sha, root.a.b.commit.sha)
+            self.assertIs(root.a.b, gitfile.parent())
+            self.assertIs(root.a, gitfile.parent().parent())
+            self.assertIs(root, gitfile.parent().parent().parent())
+            self.assertEqual(sha, gitfile.parent().parent().parent().history()[0].sha)
+            self.assertEqual([first], [c.sha for c in gitfile.history()])
+
+    def test_compare(self):
+        """
+        Test that comparing two snapshots finds the same changes as comparing all their files.
+        """
+        backend = MemoryBackend.generate(60, num_files=30, seed=2)
+        shas = list(backend.rev_list(['HEAD']))
+        added = backend.add_commit({'moved/file.txt': b'moved\n'}, [shas[0]])
+        moved = backend.add_commit({'moved/file.txt': None, 'other/name.txt': b'moved\n'}, [added])
+        backend.set_ref('refs/heads/master', moved)
+        repository = Repository(backend)
+
+        for old, new in [(shas[-1], shas[0]), (shas[30], shas[10]), (shas[0], moved), (shas[5], shas[5])]:
+            old_files, new_files = backend.files_at(old), backend.files_at(new)
+            diff = repository.compare(old, new, numstat=True)
+            self.assertEqual(sorted(path for path in new_files if path not in old_files),
+                             sorted(diff.added + [path for _, path in diff.renamed]))
+            self.assertEqual(sorted(path for path in old_files if path not in new_files),
+                             sorted(diff.removed + [path for path, _ in diff.renamed]))
+            modified = [path for path in new_files if old_files.get(path, new_files[path]) != new_files[path]]
+            self.assertEqual(sorted(modified), diff.modified)
+            for old_path, path in diff.renamed:
+                self.assertEqual(old_files[old_path], new_files[path])
+
+            stats = dict((path, (added, removed)) for added, removed, path in backend.diff_stats(new, base=old))
+            for old_path, path in diff.renamed:
+                del stats[old_path]
+                stats[path] = (0, 0)
+            self.assertEqual(stats, diff.stats)
+            self.assertEqual(sum(added + removed for added, removed in stats.values()), len(diff))
+
+        diff = repository.compare(repository.get_commit(added), moved)
+        self.assertEqual(([], [], [], [('moved/file.txt', 'other/name.txt')]),
+                         (diff.added, diff.removed, diff.modified, diff.renamed))
+        self.assertRaises(Exception, diff.num_added)
+
+    def test_git(self):
+        """
+        Test that a snapshot is read without touching the working tree, and that its history ends at its commit.
+        """
+        folder = tempfile.mkdtemp()
+        try:
+            for cmd in (['init', '-q'], ['config', 'user.name', 'Test'], ['config', 'user.email', 'test@example.com']):
+                Git.call(cmd, root=folder)
+            os.makedirs(os.path.join(folder, 'src', 'sub'))
+            for i, (path, contents) in enumerate([('src/sub/a.py', 'a\n'), ('README', 'one\n'), ('README', 'two\n')]):
+                with open(os.path.join(folder, path), 'w') as f:
+                    f.write(contents)
+                Git.call(['add', path], root=folder)
+                Git.call(['commit', '-q', '-m', 'Commit %d' % i], root=folder)
+                Git.call(['tag', 'v%d' % i], root=folder)
+            with open(os.path.join(folder, 'untracked.txt'), 'w') as f:
+                f.write('untracked\n')
+
+            repository = Repository.open(folder)
+            try:
+                with repository:
+                    root = Git.tree_at('v1')
+                    self.assertIsInstance(root, TreeFolder)
+                    self.assertEqual(repository.get_tag('v1'), root.commit)
+                    self.assertEqual(['README', 'src'], sorted(root.children()))
+                    self.assertEqual('one\n', str(root.get_file('README')))
+                    self.assertEqual('a\n', str(root.src.sub.get_file('a.py')))
+                    self.assertEqual('-', root.get_file('README').status())
+                    self.assertIsNone(root.parent())
+                    self.assertEqual('src', root.src.sub.parent().relative_path)
+
+                    self.assertEqual([repository.get_tag('v1')], root.get_file('README').history())
+                    self.assertEqual(3, len(repository.root.history()))
+                    self.assertEqual(2, len(root.history()))
+                    self.assertEqual('two\n', str(repository.root.get_file('README')))
+                    self.assertEqual(root.commit, Git.tree_at(u'v1').commit)
+                    self.assertRaises(IOError, Git.tree_at, 'v9')
+
+                    diff = Git.compare('v0', 'v2', numstat=True)
+                    self.assertEqual((['README'], [], []), (diff.added, diff.removed, diff.modified))
+                    self.assertEqual({'README': (1, 0)}, diff.stats)
+                    self.assertEqual(['README'], Git.compare('v1', 'v2').modified)
+            finally:
+                repository.close()
+        finally:
+            shutil.rmtree(folder)
@@ -0,0 +1,91 @@
+import os
+import shutil
+import tempfile
+import threading
+from unittest import TestCase
+
+from gitcovery import Git, Repository
+
+
+class WorktreeTest(TestCase):
+    """
+    Test class for leasing worktrees with a commit checked out.
+    """
+
+    def setUp(self):
+        """
+        Create a repository with a tag for every version of a file.
+        """
+        self.folder = tempfile.mkdtemp()
+        for cmd in (['init', '-q'], ['config', 'user.name', 'Test'], ['config', 'user.email', 'test@example.com']):
+            Git.call(cmd, root=self.folder)
+        for i in range(4):
+            with open(os.path.join(self.folder, 'version.txt'), 'w') as f:
+                f.write('%d\n' % i)
+            Git.call(['add', 'version.txt'], root=self.folder)
+            Git.call(['commit', '-q', '-m', 'Version %d' % i], root=self.folder)
+            Git.call(['tag', 'v%d' % i], root=self.folder)
+        self.repository = Repository.open(self.folder)
+
+    def tearDown(self):
+        """
+        Remove the worktrees and the repository.
+        """
+        self.repository.remove_worktrees()
+        self.repository.close()
+        shutil.rmtree(self.folder)
+
+    def test_reuse(self):
+        """
+        Test that a worktree is reused for the next lease, without the changes made during the previous lease.
+        """
+        with self.repository:
+            with Git.lease_worktree('v1') as root:
+                path = root.path
+                self.assertEqual('1\n', str(root.get_file('version.txt')))
+                self.assertEqual([self.repository.get_tag('v1').sha], [c.sha for c in root.history()][:1])
+                with open(os.path.join(path, 'output.txt'), 'w') as f:
+                    f.write('output\n')
+
+            with Git.lease_worktree(self.repository.get_tag('v2')) as root:
+                self.assertEqual(path, root.path)
+                self.assertEqual('2\n', str(root.get_file('version.txt')))
+                self.assertEqual(['version.txt'], sorted(root.files()))
+
+            self.assertEqual('3\n', str(self.repository.root.get_file('version.txt')))
+            self.assertRaises(IOError, Git.lease_worktree, 'v9')
+
+            Git.remove_worktrees()
+            self.assertFalse(os.path.exists(path))
+            self.assertEqual(1, len(Git.call(['worktree', 'list'], root=self.folder).strip().split('\n')))
+
+    def test_parallel(self):
+        """
+        Test that leases from many threads each get their own checkout, while at most the limit are leased at once.
+        """
+        self.repository.set_worktree_limit(2)
+        leased = []
+        results = {}
+        errors = []
+        lock = threading.Lock()
+
+        def run(i):
+            try:
+                with self.repository.lease_worktree('v%d' % (i % 4)) as root:
+                    with lock:
+                        leased.append(root.path)
+                        self.assertLessEqual(len(leased), 2)
+                    results[i] = str(root.get_file('version.txt'))
+                    with lock:
+                        leased.remove(root.path)
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=run, args=(i,)) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual([], errors)
+        self.assertEqual(dict((i, '%d\n' % (i % 4)) for i in range(8)), results)
+        self.assertEqual(2, len(self.repository._worktrees._worktrees))
@@ -0,0 +1,304 @@
+import threading
+
+from .diff import TreeDiff
+from .git import Git
+from .gitfs import GitFile, GitFolder
+
+
+class TreeFile(GitFile):
+    """
+    A read-only file in a snapshot of the repository at a commit, see `Git.tree_at()`.
+    Its contents are read from the object store instead of the working tree,
+    and its history is the history up to the commit of the snapshot.
+    Snapshots share the metrics of the files they have in common, see `TreeFolder`.
+    The contents are read through the blob cache, see `Git.set_blob_cache_size()`.
+    """
+
+    def __init__(self, repository, commit, path, sha, parent=None, node=None):
+        """
+        Constructor for a TreeFile.
+
+        :type repository: Repository
+        :param repository: The repository of the file
+        :type commit: Commit
+        :param commit: The commit of the snapshot
+        :type path: str
+        :param path: The path of the file, relative to the root of the repository
+        :type sha: str
+        :param sha: The SHA hash of the blob of the file
+        :type parent: TreeFolder
+        :param parent: The parent folder of the file in the same snapshot
+        :type node: _TreeNode
+        :param node: The shared node of the file, looked up in the cache of the repository when not given
+        """
+        # Unlike a GitFile, a TreeFile does not need to exist in the working tree
+        self._repo = repository
+        self._path, _, self.name = path.rpartition('/')
+        self._parent = parent
+        # The metrics, shared with the snapshots that contain the same blob at the same path
+        self._node = node or repository._trees.get(path, sha)
+        # The commit of the snapshot
+        self.commit = commit  # :type: Commit
+        # The SHA hash of the blob of this file
+        self.sha = sha  # :type: str
+        self._revision = commit.sha
+
+    @property
+    def relative_path(self):
+        """
+        :rtype: str
+        :return: The path relative to the repository root
+        """
+        return self.path
+
+    def parent(self):
+        """
+        :rtype: TreeFolder
+        :return: The parent folder of this file, in the same snapshot
+        """
+        return self._parent
+
+    def status(self):
+        """
+        A snapshot is never modified, so the status is always unchanged.
+
+        :rtype: str
+        :return: '-'
+        """
+        return '-'
+
+    def __str__(self):
+        """
+        :rtype: str
+        :return: The contents of this file at the commit of the snapshot
+        """
+        # Read through the blob cache, so the contents count towards its size
+        return Git._decode(self._repo._read_blob(self.sha))
+
+    def metric(self, func, combine=sum):
+        """
+        Compute a metric of this file, like its number of lines.
+        The result is remembered, so it is computed once for all the snapshots that contain this file.
+
+        :type func: TreeFile -> object
+        :param func: The function that computes the metric of a file, use the same function for every call
+        :type combine: List[object] -> object
+        :param combine: The function that combines the metrics of the children of a folder, see `TreeFolder.metric()`
+        :rtype: object
+        :return: The result of the function for this file
+        """
+        metrics = self._node.metrics
+        if func not in metrics:
+            metrics[func] = func(self)
+        return metrics[func]
+
+
+class TreeFolder(GitFolder):
+    """
+    A read-only folder in a snapshot of the repository at a commit, see `Git.tree_at()`.
+    Its children are read from the tree object of the folder when they are first needed,
+    so a snapshot does not touch the working tree and only reads the folders that are used.
+    Submodules are not listed.
+
+    Snapshots share what they read and compute for the folders and files they have in common: a folder or
+    file with the same path and hash in two snapshots reuses the same children and metrics
+    (see `TreeFolder.metric()`), while its commit and parent are those of its own snapshot.
+    The contents of files are shared through the blob cache, see `Git.set_blob_cache_size()`.
+    This makes reading a snapshot after another one cost only as much as what changed between them.
+    """
+
+    # The mode of the tree entries of folders and submodules
+    _MODE_TREE = '40000'
+    _MODE_SUBMODULE = '160000'
+
+    def __init__(self, repository, commit, path, sha, parent=None, node=None):
+        """
+        Constructor for a TreeFolder.
+
+        :type repository: Repository
+        :param repository: The repository of the folder
+        :type commit: Commit
+        :param commit: The commit of the snapshot
+        :type path: str
+        :param path: The path of the folder, relative to the root of the repository, '' for the root
+        :type sha: str
+        :param sha: The SHA hash of the tree of the folder
+        :type parent: TreeFolder
+        :param parent: The parent folder of the folder in the same snapshot, None for the root
+        :type node: _TreeNode
+        :param node: The shared node of the folder, looked up in the cache of the repository when not given
+        """
+        # Set before anything else, as GitFolder looks up unknown attributes
+        self._repo = repository
+        self._lock = threading.Lock()
+        self._children = {}
+        self._files = {}
+        self._folders = {}
+        self._gitignore = []
+        self._path, _, self.name = path.rpartition('/')
+        self._parent = parent
+        # The listed children and metrics, shared with the snapshots that contain the same tree at the same path
+        self._node = node or repository._trees.get(path, sha, keep=True)
+        # The commit of the snapshot
+        self.commit = commit  # :type: Commit
+        # The SHA hash of the tree of this folder
+        self.sha = sha  # :type: str
+        self._revision = commit.sha
+
+    @property
+    def relative_path(self):
+        """
+        :rtype: str
+        :return: The path relative to the repository root
+        """
+        return self.path
+
+    def parent(self):
+        """
+        :rtype: TreeFolder | None
+        :return: The parent folder of this folder in the same snapshot, or None for the root
+        """
+        return self._parent
+
+    def status(self):
+        """
+        A snapshot is never modified, so the status is always unchanged.
+
+        :rtype: str
+        :return: '-'
+        """
+        return '-'
+
+    def children(self):
+        """
+        Get a dictionary of all the children in this folder.
+        Unlike a GitFolder, this lists all the files in the snapshot, as ignored files are never committed.
+
+        :rtype: Dict[str, TreeFile | TreeFolder]
+        :return: A dictionary containing all children
+        """
+        if self._children:
+            return self._children
+        with self._lock:
+            if not self._children:
+                prefix = self.path + '/' if self.path else ''
+                children, files, folders = {}, {}, {}
+                for name, (mode, node) in self._entries().items():
+                    if mode == self._MODE_TREE:
+                        child = folders[name] = TreeFolder(self._repo, self.commit, prefix + name, node.sha, self, node)
+                    else:
+                        child = files[name] = TreeFile(self._repo, self.commit, prefix + name, node.sha, self, node)
+                    children[name] = child
+                # Other threads only use the children once they are all listed
+                self._files = files
+                self._folders = folders
+                self._children = children
+            return self._children
+
+    def _entries(self):
+        """
+        Get the entries of the tree of this folder, listed once for all the snapshots that contain it.
+        The nodes of the children are kept with them, so the unchanged children of a changed folder are shared.
+
+        :rtype: Dict[str, (str, _TreeNode)]
+        :return: The mode and shared node of every child by name, without submodules
+        """
+        node = self._node
+        if node.children is None:
+            with node.lock:
+                if node.children is None:
+                    prefix = self.path + '/' if self.path else ''
+                    children = {}
+                    for mode, sha, name in self._repo.read_tree(self.sha):
+                        if mode != self._MODE_SUBMODULE:
+                            children[name] = (mode, self._repo._trees.get(prefix + name, sha,
+                                                                          keep=mode == self._MODE_TREE))
+                    node.children = children
+        return node.children
+
+    def metric(self, func, combine=sum):
+        """
+        Compute a metric of this folder, by combining the metrics of all the files in it and its subfolders.
+        For example `folder.metric(len)` counts the characters of all the files in a folder.
+        The result is remembered for every folder and file, so it is computed once for all the snapshots that
+        contain it: computing a metric for a snapshot after another one only computes it for what changed.
+        To find the remembered results, the same function objects must be passed for every snapshot.
+
+        :type func: TreeFile -> object
+        :param func: The function that computes the metric of a file
+        :type combine: List[object] -> object
+        :param combine: The function that combines the metrics of the children of a folder, by default their sum
+        :rtype: object
+        :return: The combined metric of all the files in this folder
+        """
+        key = (func, combine)
+        metrics = self._node.metrics
+        if key not in metrics:
+            metrics[key] = combine([child.metric(func, combine) for _, child in sorted(self.children().items())])
+        return metrics[key]
+
+    def _blobs(self):
+        """
+        :rtype: List[(str, str)]
+        :return: The path and blob hash of every file in this folder and its subfolders
+        """
+        blobs = []
+        self.for_each_file(lambda f: blobs.append((f.relative_path, f.sha)))
+        return blobs
+
+    def compare(self, other, numstat=False):
+        """
+        Compare this snapshot with a newer snapshot of the same folder, see `Git.compare()`.
+
+        :type other: TreeFolder
+        :param other: The newer snapshot
+        :type numstat: bool
+        :param numstat: Whether to also count the added and removed lines of every changed file
+        :rtype: TreeDiff
+        :return: The changes from this snapshot to the other snapshot
+        """
+        removed = {}  # Path -> blob hash
+        added = {}    # Path -> blob hash
+        modified = []
+        folders = [(self, other)]
+        while folders:
+            old, new = folders.pop()
+            old_children, new_children = old.children(), new.children()
+            for name in set(old_children) | set(new_children):
+                old_child, new_child = old_children.get(name), new_children.get(name)
+                if old_child is not None and new_child is not None and old_child.sha == new_child.sha:
+                    # Equal hashes mean equal contents, so the whole subtree is skipped
+                    continue
+                if isinstance(old_child, TreeFolder) and isinstance(new_child, TreeFolder):
+                    folders.append((old_child, new_child))
+                elif isinstance(old_child, TreeFile) and isinstance(new_child, TreeFile):
+                    modified.append(new_child.relative_path)
+                else:
+                    for child, paths in ((old_child, removed), (new_child, added)):
+                        if isinstance(child, TreeFolder):
+                            paths.update(child._blobs())
+                        elif child is not None:
+                            paths[child.relative_path] = child.sha
+
+        # Exact renames: the blob of an added file is the blob of a removed file
+        sources = {}  # Blob hash -> removed paths
+        for path, sha in sorted(removed.items(), reverse=True):
+            sources.setdefault(sha, []).append(path)
+        renamed = []
+        for path, sha in sorted(added.items()):
+            if sources.get(sha):
+                old_path = sources[sha].pop()
+                renamed.append((old_path, path))
+                del removed[old_path]
+                del added[path]
+
+        stats = None
+        if numstat:
+            # The commits of the snapshots might differ outside this folder, so only the changes found above are kept
+            changed = set(added) | set(removed) | set(modified)
+            stats = dict((path, (0, 0)) for _, path in renamed)
+            for added_lines, removed_lines, path in self._repo.get_backend().diff_stats(other.commit.sha,
+                                                                                         base=self.commit.sha):
+                if path in changed:
+                    stats[path] = (added_lines, removed_lines)
+        return TreeDiff(sorted(added), sorted(removed), sorted(modified), renamed, stats)
@@ -0,0 +1,98 @@
+import threading
+import weakref
+from collections import OrderedDict
+
+from .stats import Stats
+
+
+class _TreeNode(object):
+    """
+    What was read or computed for a folder or file with a given path and hash, see `_TreeCache`.
+    The contents of files are not kept, they are read through the blob cache, see `Git.set_blob_cache_size()`.
+    As the contents of a hash never change, a node is shared by all the snapshots that contain it.
+    It does not know about any snapshot, that is left to the `TreeFolder` and `TreeFile` views on it.
+    """
+
+    def __init__(self, sha):
+        """
+        Constructor for a _TreeNode.
+
+        :type sha: str
+        :param sha: The SHA hash of the tree or blob
+        """
+        self.sha = sha
+        # The mode and node of every child by name, None when not listed yet or for files
+        self.children = None  # :type: Dict[str, (str, _TreeNode)] | None
+        # The computed metrics by function (and combine function for folders)
+        self.metrics = {}  # :type: Dict[object, object]
+        # Makes sure the children are only listed by a single thread
+        self.lock = threading.Lock()
+
+
+class _TreeCache(object):
+    """
+    The nodes of the tree snapshots of a repository (see `Git.tree_at()`), shared by their path and hash.
+    Snapshots that have a folder or file in common reuse the same node, with everything that was read or
+    computed for it, so reading a snapshot only costs as much as what changed since the snapshots before it.
+    A folder node keeps the nodes of its children, so unchanged files in a changed folder are also shared.
+
+    A node is kept as long as it is used by a snapshot, and the most recently used folders are also kept
+    when no snapshot uses them anymore, so a sweep over many commits shares the nodes between them.
+    The cache can be used from multiple threads at once.
+    """
+
+    # The default number of recently used folders that are kept
+    _DEFAULT_SIZE = 10000
+
+    def __init__(self, max_size=_DEFAULT_SIZE):
+        """
+        Constructor for a _TreeCache.
+
+        :type max_size: int
+        :param max_size: The number of recently used folders that are kept
+        """
+        self._max_size = max_size
+        self._nodes = weakref.WeakValueDictionary()  # (path, SHA hash) -> node
+        self._recent = OrderedDict()  # (path, SHA hash) -> folder
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        """
+        :rtype: int
+        :return: The number of nodes in the cache
+        """
+        return len(self._nodes)
+
+    def clear(self):
+        """
+        Remove all the nodes from the cache.
+        """
+        with self._lock:
+            self._nodes = weakref.WeakValueDictionary()
+            self._recent = OrderedDict()
+
+    def get(self, path, sha, keep=False):
+        """
+        Get the node of a path with the given hash, creating it when it is not in the cache.
+
+        :type path: str
+        :param path: The path of the node, relative to the root of the repository
+        :type sha: str
+        :param sha: The SHA hash of the tree or blob of the node
+        :type keep: bool
+        :param keep: Whether to keep the node when no snapshot uses it anymore, used for folders
+        :rtype: _TreeNode
+        :return: The node
+        """
+        key = (path, sha)
+        with self._lock:
+            node = self._nodes.get(key)
+            Stats._count('trees', hits=node is not None, misses=node is None)
+            if node is None:
+                node = self._nodes[key] = _TreeNode(sha)
+            if keep:
+                self._recent.pop(key, None)
+                self._recent[key] = node
+                while len(self._recent) > self._max_size:
+                    self._recent.popitem(last=False)
+            return node
@@ -0,0 +1,178 @@
+import contextlib
+import multiprocessing
+import os
+import threading
+
+import gitcovery
+from .git import Git
+
+
+class _Worktree(object):
+    """
+    A detached `git worktree` of a repository, with its own repository to analyse its files with.
+    """
+
+    def __init__(self, path):
+        """
+        Constructor for a _Worktree. The worktree itself is only added on the first checkout.
+
+        :type path: str
+        :param path: The folder of the worktree
+        """
+        self.path = path
+        # The repository of the worktree, None when the worktree is not added yet
+        self.repository = None  # :type: Repository | None
+        # The hash of the checked out commit
+        self.sha = None  # :type: str | None
+
+    def checkout(self, root, sha):
+        """
+        Check out a commit in the worktree, adding the worktree when needed.
+        As the worktree is reused, git only updates the files that differ from the previous checkout.
+        Local changes and untracked files, like the output of external tools, are removed.
+
+        :type root: str
+        :param root: The root of the main repository
+        :type sha: str
+        :param sha: The hash of the commit to check out
+        :raise IOError: When git fails to check out the commit
+        """
+        if not os.path.exists(os.path.join(self.path, '.git')):
+            # Unregister a worktree whose folder was removed, so its path can be used again
+            Git.call(['worktree', 'prune'], root=root, kill_on_error=False)
+            Git.call(['worktree', 'add', '--detach', self.path, sha], root=root, kill_on_error=False)
+        else:
+            Git.call(['clean', '-d', '-x', '--force'], root=self.path, kill_on_error=False)
+            Git.call(['checkout', '--force', '--detach', sha], root=self.path, kill_on_error=False)
+
+        if not self.repository:
+            self.repository = gitcovery.Repository()
+        self.repository.set_root(self.path)
+        self.sha = sha
+
+    def remove(self, root):
+        """
+        Remove the worktree and its folder.
+
+        :type root: str
+        :param root: The root of the main repository
+        """
+        if self.repository:
+            self.repository.close()
+        if os.path.exists(self.path):
+            Git.call(['worktree', 'remove', '--force', self.path], root=root, kill_on_error=False)
+        self.repository = None
+        self.sha = None
+
+
+class _WorktreePool(object):
+    """
+    A pool of detached `git worktree` checkouts of a repository, see `Git.lease_worktree()`.
+    The worktrees are added when needed, up to the limit, and are reused for later leases.
+    They are stored in `.git/gitcovery/worktrees`, so they do not show up in the working tree.
+    """
+
+    def __init__(self, repository, limit=None):
+        """
+        Constructor for a _WorktreePool.
+
+        :type repository: Repository
+        :param repository: The repository to check out
+        :type limit: int
+        :param limit: The maximum number of worktrees, by default the number of processors
+        """
+        self._repo = repository
+        self._limit = limit or multiprocessing.cpu_count()
+        self._worktrees = []  # :type: List[_Worktree]
+        self._idle = []  # :type: List[_Worktree]
+        self._condition = threading.Condition()
+        # Adding worktrees is done by a single thread at a time, as git updates the shared administration
+        self._add_lock = threading.Lock()
+
+    def set_limit(self, limit):
+        """
+        Set the maximum number of worktrees. When lowered, the worktrees that are already added are kept.
+
+        :type limit: int
+        :param limit: The maximum number of worktrees
+        """
+        with self._condition:
+            self._limit = limit
+            self._condition.notify_all()
+
+    def _acquire(self, sha):
+        """
+        Take an idle worktree, preferring one that has the commit checked out, or a new one when below the limit.
+        When neither is available, wait until a worktree is released.
+
+        :type sha: str
+        :param sha: The hash of the commit that will be checked out
+        :rtype: _Worktree
+        :return: The worktree
+        """
+        with self._condition:
+            while not self._idle and len(self._worktrees) >= self._limit:
+                self._condition.wait()
+            if self._idle:
+                worktrees = [worktree for worktree in self._idle if worktree.sha == sha]
+                worktree = worktrees[0] if worktrees else self._idle[-1]
+                self._idle.remove(worktree)
+                return worktree
+
+            git_dir = Git.call(['rev-parse', '--git-common-dir'], root=self._repo.root.path).strip()
+            folder = os.path.normpath(os.path.join(self._repo.root.path, git_dir, 'gitcovery', 'worktrees'))
+            # The folders of removed worktrees are used again
+            paths = set(worktree.path for worktree in self._worktrees)
+            number = 0
+            while os.path.join(folder, str(number)) in paths:
+                number += 1
+            worktree = _Worktree(os.path.join(folder, str(number)))
+            self._worktrees.append(worktree)
+            return worktree
+
+    def _release(self, worktree):
+        """
+        Make a worktree available for other leases.
+
+        :type worktree: _Worktree
+        :param worktree: The worktree
+        """
+        with self._condition:
+            self._idle.append(worktree)
+            self._condition.notify()
+
+    @contextlib.contextmanager
+    def lease(self, sha):
+        """
+        Lease a worktree with a commit checked out for the duration of a with statement, see `Git.lease_worktree()`.
+
+        :type sha: str
+        :param sha: The hash of the commit to check out
+        """
+        worktree = self._acquire(sha)
+        try:
+            if not worktree.repository:
+                with self._add_lock:
+                    worktree.checkout(self._repo.root.path, sha)
+            else:
+                worktree.checkout(self._repo.root.path, sha)
+        except Exception:
+            worktree.sha = None
+            self._release(worktree)
+            raise
+        try:
+            yield worktree.repository.root
+        finally:
+            self._release(worktree)
+
+    def close(self):
+        """
+        Remove all the worktrees that are not leased, the other worktrees are kept.
+        """
+        with self._condition:
+            idle = self._idle
+            self._idle = []
+            for worktree in idle:
+                self._worktrees.remove(worktree)
+        for worktree in idle:
+            worktree.remove(self._repo.root.path)